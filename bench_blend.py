@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+混合后端性能基准
+
+比较各混合后端每百万像素的透明度缩放和图层混合耗时
+"""
+
+import time
+
+from PIL import Image
+
+from photo_watermark.core.blend_backend import available_backends, get_backend
+
+
+def measure(func, repeat: int = 5) -> float:
+    """返回多次运行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(size=(4000, 3000)):
+    """运行基准测试"""
+    megapixels = size[0] * size[1] / 1_000_000
+    layer = Image.new('RGBA', size, (255, 255, 255, 0))
+    # 半透明渐变图层，避免全透明/全不透明的快速路径
+    layer.putalpha(Image.linear_gradient('L').resize(size))
+
+    print(f"图片尺寸: {size[0]}x{size[1]} ({megapixels:.1f} MP)")
+    print(f"{'后端':<10}{'模式':<8}{'透明度缩放 ms/MP':>18}{'图层混合 ms/MP':>18}")
+
+    for name in available_backends():
+        backend = get_backend(name)
+        for mode in ('RGB', 'RGBA'):
+            base = Image.new(mode, size, (70, 130, 180, 255)[:len(mode)])
+
+            scale_time = measure(lambda: backend.scale_alpha(layer, 128))
+            composite_time = measure(lambda: backend.composite(base, layer, (0, 0)))
+
+            print(
+                f"{name:<10}{mode:<8}"
+                f"{scale_time * 1000 / megapixels:>18.2f}"
+                f"{composite_time * 1000 / megapixels:>18.2f}"
+            )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,140 @@
+"""
+图片水印素材缓存模块
+
+每个水印图片只解码一次，并按 (尺寸, 透明度) 缓存可直接粘贴的RGBA版本，
+文件修改时间变化时自动失效
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from .blend_backend import get_backend
+from .image_cache import ImageLRUCache
+
+
+class WatermarkAssetCache:
+    """图片水印素材缓存"""
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024, revalidate_interval: float = 1.0):
+        """
+        初始化素材缓存
+
+        Args:
+            max_bytes: 缓存总字节预算
+            revalidate_interval: 两次检查文件修改时间的最小间隔（秒）
+        """
+        self._images = ImageLRUCache(max_bytes=max_bytes)
+        self.revalidate_interval = revalidate_interval
+        # path -> (修改时间, 上次检查时间)
+        self._stats: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def _get_mtime(self, path: str) -> int:
+        """
+        获取文件修改时间，在检查间隔内直接使用上次的结果以避免重复stat
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            int: 文件修改时间（纳秒）
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._stats.get(path)
+            if cached and now - cached[1] < self.revalidate_interval:
+                return cached[0]
+
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            self._stats[path] = (mtime, now)
+        return mtime
+
+    def get_source(self, path: str) -> Image.Image:
+        """
+        获取解码后的原始水印图片（RGBA）
+
+        Args:
+            path: 水印图片路径
+
+        Returns:
+            Image.Image: RGBA图片，调用方不应修改
+        """
+        key = (path, self._get_mtime(path))
+
+        def load():
+            with Image.open(path) as img:
+                return img.convert('RGBA')
+
+        return self._images.get_or_create(key, load)
+
+    def get_size(self, path: str) -> Tuple[int, int]:
+        """
+        获取水印图片的原始尺寸
+
+        Args:
+            path: 水印图片路径
+
+        Returns:
+            Tuple[int, int]: 图片尺寸 (width, height)
+        """
+        return self.get_source(path).size
+
+    def get_variant(
+        self,
+        path: str,
+        size: Optional[Tuple[int, int]] = None,
+        opacity: int = 255
+    ) -> Image.Image:
+        """
+        获取指定尺寸和透明度的可粘贴水印图片
+
+        Args:
+            path: 水印图片路径
+            size: 目标尺寸 (width, height)，None表示保持原大小
+            opacity: 透明度 (0-255)
+
+        Returns:
+            Image.Image: RGBA图片，调用方不应修改
+        """
+        mtime = self._get_mtime(path)
+        size = tuple(size) if size else None
+        key = (path, mtime, size, opacity)
+
+        def build():
+            variant = self.get_source(path)
+
+            # 调整大小
+            if size and size != variant.size:
+                variant = variant.resize(size, Image.Resampling.LANCZOS)
+
+            # 调整透明度
+            if opacity < 255:
+                variant = get_backend().scale_alpha(variant, opacity)
+
+            return variant
+
+        return self._images.get_or_create(key, build)
+
+    def clear(self):
+        """清空缓存"""
+        self._images.clear()
+        with self._lock:
+            self._stats.clear()
+
+
+_asset_cache = WatermarkAssetCache()
+
+
+def get_asset_cache() -> WatermarkAssetCache:
+    """
+    获取进程级共享的图片水印素材缓存
+
+    Returns:
+        WatermarkAssetCache: 素材缓存
+    """
+    return _asset_cache
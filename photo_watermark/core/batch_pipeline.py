@@ -0,0 +1,291 @@
+"""
+批量处理流水线模块
+
+把单张图片的处理拆成 读取 -> 解码 -> 加水印 -> 编码 -> 写入 五个阶段，
+阶段之间用有界队列连接，每个阶段有独立的工作线程数，读取阶段由预读器完成。
+磁盘读写和CPU运算可以同时进行；下游较慢时上游在队列满时阻塞，
+内存中等待的图片数量有上限
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional
+
+from .image_processor import ImageProcessor
+from .job_manifest import fingerprint_file
+from .memory_budget import MemoryBudget
+from .read_ahead import ReadAheadPrefetcher
+from .watermark_plan import WatermarkPlan
+
+if TYPE_CHECKING:
+    from .batch_processor import BatchProcessor, BatchResult
+
+
+# 队列结束标记
+_STOP = object()
+
+
+class _Decoded:
+    """解码后的图片，从解码阶段一直占用内存预算，编码完成或被丢弃时释放"""
+
+    __slots__ = ('processor', 'cost', 'memory_budget')
+
+    def __init__(self, processor: ImageProcessor, cost: int, memory_budget: Optional[MemoryBudget]):
+        self.processor = processor
+        self.cost = cost
+        self.memory_budget = memory_budget
+
+    def release(self):
+        """释放占用的内存预算，可重复调用"""
+        if self.memory_budget is not None and self.cost:
+            self.memory_budget.release(self.cost)
+        self.cost = 0
+        self.processor = None
+
+
+class BatchPipeline:
+    """分阶段的批量处理流水线"""
+
+    STAGES = ('read', 'decode', 'composite', 'encode', 'write')
+
+    def __init__(
+        self,
+        batch_processor: "BatchProcessor",
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: Optional[int] = None,
+        read_ahead: Optional[ReadAheadPrefetcher] = None
+    ):
+        """
+        初始化流水线
+
+        Args:
+            batch_processor: 提供加水印、输出路径和取消标志的批量处理器
+            workers: 各阶段线程数，如 {'read': 2, 'decode': 4, 'composite': 8,
+                'encode': 4, 'write': 2}，未指定的阶段读写各2个线程，
+                解码、加水印和编码各为CPU核数
+            queue_size: 阶段之间每个队列的最大长度，None表示最多的CPU阶段线程数的2倍
+            read_ahead: 读取阶段使用的预读器，None表示按读取线程数和队列长度创建
+        """
+        self.batch_processor = batch_processor
+        cpu_count = os.cpu_count() or 1
+        self.workers = {'read': 2, 'decode': cpu_count, 'composite': cpu_count, 'encode': cpu_count, 'write': 2}
+        if workers:
+            self.workers.update(workers)
+        self.queue_size = queue_size or 2 * max(
+            self.workers['decode'], self.workers['composite'], self.workers['encode']
+        )
+        self.read_ahead = read_ahead or ReadAheadPrefetcher(
+            depth=self.queue_size, max_workers=self.workers['read']
+        )
+
+    def run(
+        self,
+        image_paths: Iterable[str],
+        output_dir: str,
+        plan: WatermarkPlan,
+        naming_rule: Dict,
+        fingerprint: bool = False
+    ) -> Iterator["BatchResult"]:
+        """
+        运行流水线，每完成一张图片就产出其结果
+
+        Args:
+            image_paths: 图片路径列表或任意可迭代对象；其中已经是BatchResult的项
+                不读取也不处理，直接产出
+            output_dir: 输出目录
+            plan: 编译好的水印计划
+            naming_rule: 命名规则配置
+            fingerprint: 是否记录输入和输出文件的指纹（任务清单使用）
+
+        Yields:
+            BatchResult: 单张图片的处理结果
+        """
+        from .batch_processor import BatchResult
+
+        cancel_flag = self.batch_processor.cancel_flag
+
+        decode_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        composite_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        encode_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        write_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        # 结果队列不设上限，保证最后一个阶段不会阻塞
+        result_queue: "queue.Queue" = queue.Queue()
+
+        memory_budget = self.batch_processor.memory_budget
+
+        def decode(result: BatchResult, prefetched) -> Optional[_Decoded]:
+            """解码阶段：在内存预算内从预读的内容解码图片"""
+            data = prefetched.data
+            if fingerprint:
+                # 指纹对应预读的内容和读取之前的文件状态
+                result.input_fingerprint = fingerprint_file(result.input_path, data, prefetched.stat)
+            cost = self.batch_processor.estimate_cost(result.input_path, data)
+            if memory_budget is not None:
+                memory_budget.acquire(cost)
+            decoded = _Decoded(ImageProcessor(), cost, memory_budget)
+            try:
+                start = time.perf_counter()
+                loaded = decoded.processor.load_image(io.BytesIO(data))
+                result.timings['load'] = time.perf_counter() - start
+            except BaseException:
+                decoded.release()
+                raise
+            if not loaded:
+                decoded.release()
+                result.error = "加载图片失败"
+                return None
+            return decoded
+
+        def composite(result: BatchResult, decoded: _Decoded) -> Optional[_Decoded]:
+            """加水印阶段"""
+            start = time.perf_counter()
+            success = plan.apply(decoded.processor, image_path=result.input_path)
+            result.timings['watermark'] = time.perf_counter() - start
+            if not success:
+                result.error = "添加水印失败"
+                return None
+            return decoded
+
+        def encode(result: BatchResult, decoded: _Decoded) -> Optional[bytes]:
+            """编码阶段：编码为输出格式，之后不再需要解码的图片，释放内存预算"""
+            try:
+                start = time.perf_counter()
+                encoded = decoded.processor.encode_image(result.output_path, plan.spec.quality)
+                result.timings['encode'] = time.perf_counter() - start
+            finally:
+                decoded.release()
+            if encoded is None:
+                result.error = "编码图片失败"
+            return encoded
+
+        def write(result: BatchResult, encoded: bytes):
+            """写入阶段：把编码结果写入输出文件"""
+            start = time.perf_counter()
+            with open(result.output_path, 'wb') as f:
+                f.write(encoded)
+            result.timings['write'] = time.perf_counter() - start
+            result.bytes_written = len(encoded)
+            if fingerprint:
+                result.output_fingerprint = fingerprint_file(result.output_path, encoded)
+            result.success = True
+            return None
+
+        def discard(decoded: _Decoded):
+            """取消或失败、没有进入下一阶段的图片归还内存预算"""
+            decoded.release()
+
+        stages = [
+            ('decode', decode_queue, composite_queue, decode, None),
+            ('composite', composite_queue, encode_queue, composite, discard),
+            ('encode', encode_queue, write_queue, encode, discard),
+            ('write', write_queue, None, write, None),
+        ]
+
+        for name, in_queue, out_queue, func, on_discard in stages:
+            self._start_stage(name, in_queue, out_queue, result_queue, func, on_discard)
+
+        def feed():
+            """读取阶段：从预读器按顺序取出已读入内存的文件放入解码队列，队列满时阻塞"""
+            try:
+                for prefetched in self.read_ahead.iter_files(image_paths):
+                    if cancel_flag.is_set():
+                        break
+                    if isinstance(prefetched, BatchResult):
+                        # 无需处理的图片直接产出
+                        result_queue.put(prefetched)
+                        continue
+                    result = BatchResult(input_path=prefetched.path)
+                    if prefetched.error is not None:
+                        print(f"读取图片失败 {prefetched.path}: {prefetched.error}")
+                        result.error = prefetched.error
+                        result_queue.put(result)
+                        continue
+                    result.output_path = self.batch_processor._generate_output_path(
+                        prefetched.path, output_dir, naming_rule
+                    )
+                    decode_queue.put((result, prefetched))
+            except Exception as e:
+                print(f"读取图片列表失败: {e}")
+            finally:
+                for _ in range(self.workers['decode']):
+                    decode_queue.put(_STOP)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feed", daemon=True)
+        feeder.start()
+
+        try:
+            while True:
+                result = result_queue.get()
+                if result is _STOP:
+                    break
+                yield result
+        except GeneratorExit:
+            # 调用方提前停止迭代：停止取新图片，已在流水线中的图片直接跳过
+            cancel_flag.set()
+            raise
+
+    def _start_stage(
+        self,
+        name: str,
+        in_queue: "queue.Queue",
+        out_queue: Optional["queue.Queue"],
+        result_queue: "queue.Queue",
+        func: Callable,
+        on_discard: Optional[Callable] = None
+    ):
+        """
+        启动一个阶段的工作线程
+
+        每个线程从in_queue取 (result, data)，调用func(result, data)。
+        成功时把 (result, 输出数据) 放入out_queue（最后一个阶段放入结果队列），
+        取消或失败时把result直接放入结果队列，没有进入下一阶段的data交给
+        on_discard。该阶段全部线程结束后，向下游发送结束标记。
+        """
+        cancel_flag = self.batch_processor.cancel_flag
+        count = self.workers[name]
+        downstream_count = self.workers[self.STAGES[self.STAGES.index(name) + 1]] if out_queue else 0
+        remaining = [count]
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                item = in_queue.get()
+                if item is _STOP:
+                    break
+
+                result, data = item
+                output = None
+                if cancel_flag.is_set():
+                    result.error = "已取消"
+                else:
+                    try:
+                        output = func(result, data)
+                    except Exception as e:
+                        print(f"处理图片失败 {result.input_path}: {e}")
+                        result.error = str(e)
+
+                if result.error is not None:
+                    if on_discard is not None:
+                        on_discard(data)
+                    result_queue.put(result)
+                elif out_queue is None:
+                    result_queue.put(result)
+                else:
+                    out_queue.put((result, output))
+
+            # 本阶段最后一个线程结束时通知下游
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                if out_queue is None:
+                    result_queue.put(_STOP)
+                else:
+                    for _ in range(downstream_count):
+                        out_queue.put(_STOP)
+
+        for i in range(count):
+            threading.Thread(target=worker, name=f"pipeline-{name}-{i}", daemon=True).start()
@@ -4,102 +4,462 @@
 处理多张图片的批量水印添加和导出功能
 """
 
+import io
+import multiprocessing
 import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Callable, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Callable, Iterable, Iterator, Optional, Tuple, Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 import threading
 
+from .batch_pipeline import BatchPipeline
 from .image_processor import ImageProcessor
-from .watermark import TextWatermark, ImageWatermark, WatermarkLayout, WatermarkType
+from .job_manifest import JobManifest, compute_config_hash, fingerprint_file
+from .memory_budget import MemoryBudget, estimate_image_bytes, estimate_working_set
+from .metadata_index import MetadataIndex
+from .read_ahead import ReadAheadPrefetcher, ReadAheadStats
+from .watermark import WatermarkLayout
+from .watermark_plan import WatermarkPlan
+from .watermark_spec import WatermarkSpec
+
+
+# 进程模式默认的最大进程数（Windows上ProcessPoolExecutor最多支持61个）
+MAX_DEFAULT_PROCESS_WORKERS = 61
+
+# 默认提交窗口的上限，工作线程/进程数更多时窗口等于其数量
+MAX_DEFAULT_IN_FLIGHT = 64
+
+
+@dataclass
+class BatchResult:
+    """单张图片的批量处理结果"""
+    input_path: str
+    output_path: Optional[str] = None
+    success: bool = False
+    error: Optional[str] = None
+    bytes_written: int = 0
+    # 任务清单中记录的输出已是最新，本次未处理
+    skipped: bool = False
+    # 启用任务清单时由工作线程记录的 (大小, 修改时间ns, 内容哈希)：
+    # 输入在处理之前获取，输出在保存之后获取
+    input_fingerprint: Optional[Tuple[int, int, str]] = None
+    output_fingerprint: Optional[Tuple[int, int, str]] = None
+    # 各阶段耗时（秒）：load、watermark、save
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_time(self) -> float:
+        """各阶段耗时之和（秒）"""
+        return sum(self.timings.values())
+
+
+# 进程池工作进程中的处理器和任务参数，由_init_worker在每个进程中设置一次
+_worker_processor: Optional["BatchProcessor"] = None
+_worker_job: Optional[tuple] = None
+
+
+def _init_worker(
+    output_dir: str,
+    spec: WatermarkSpec,
+    layout: WatermarkLayout,
+    naming_rule: Dict,
+    fingerprint: bool = False,
+    cancel_flag=None
+):
+    """
+    进程池工作进程初始化：在每个进程中编译一次水印计划并保存任务参数
+
+    Args:
+        output_dir: 输出目录
+        spec: 水印规格
+        layout: 布局配置
+        naming_rule: 命名规则配置
+        fingerprint: 是否记录输入和输出文件的指纹
+        cancel_flag: 主进程取消处理时设置的multiprocessing.Event，
+            工作进程在处理的各阶段之间检查
+    """
+    global _worker_processor, _worker_job
+    _worker_processor = BatchProcessor(max_workers=1)
+    if cancel_flag is not None:
+        _worker_processor.cancel_flag = cancel_flag
+    _worker_job = (output_dir, WatermarkPlan(spec, layout), naming_rule, fingerprint)
+
+
+def _process_in_worker(
+    image_path: str,
+    data: Optional[bytes] = None,
+    stat: Optional[os.stat_result] = None
+) -> "BatchResult":
+    """进程池任务：只传入图片路径（和预读的文件内容），其余参数来自工作进程初始化"""
+    return _worker_processor._process_single_image(image_path, *_worker_job, data=data, stat=stat)
 
 
 class BatchProcessor:
     """批量处理器"""
 
-    def __init__(self, max_workers: int = 4):
+    EXECUTOR_TYPES = ('thread', 'process', 'pipeline')
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        executor_type: str = 'thread',
+        pipeline_workers: Optional[Dict[str, int]] = None,
+        read_ahead: Optional[ReadAheadPrefetcher] = None,
+        memory_budget: Optional[int] = None,
+        metadata_index: Optional[MetadataIndex] = None
+    ):
         """
         初始化批量处理器
 
         Args:
-            max_workers: 最大工作线程数
+            max_workers: 最大工作线程/进程数，None表示线程模式4个、进程模式为CPU核数
+                （最多MAX_DEFAULT_PROCESS_WORKERS个）
+            max_in_flight: 同时提交的最大任务数，None表示工作线程数的2倍，
+                但不超过MAX_DEFAULT_IN_FLIGHT和工作线程数中的较大者
+            executor_type: 执行方式，'thread'（线程池）、'process'（进程池，
+                文字栅格化和编码等持有GIL的工作可以利用多核）或 'pipeline'
+                （读取/解码/加水印/编码/写入分阶段并行，见BatchPipeline）
+            pipeline_workers: 流水线模式下各阶段的线程数，
+                如 {'read': 2, 'decode': 4, 'composite': 8, 'encode': 4, 'write': 2}
+            read_ahead: 预读器，在解码之前把原图读入内存；None表示线程/进程模式
+                由工作线程直接读取文件，流水线模式使用按读取线程数创建的默认预读器
+            memory_budget: 同时处理中的图片的内存预算（字节），如DEFAULT_MEMORY_BUDGET，
+                按图片尺寸估算每张图片的占用，预算不足时暂缓提交；None表示不限制。
+                线程/进程模式在提交前估算，没有元数据索引和预读内容时要在调度线程中
+                逐个打开文件头，网络存储上建议同时传入metadata_index
+            metadata_index: 元数据索引，估算内存占用时优先使用索引中的尺寸，
+                不必打开文件头
         """
+        if executor_type not in self.EXECUTOR_TYPES:
+            raise ValueError(f"不支持的执行方式: {executor_type}")
+
+        if max_workers is None:
+            if executor_type == 'process':
+                max_workers = min(os.cpu_count() or 1, MAX_DEFAULT_PROCESS_WORKERS)
+            else:
+                max_workers = 4
+        self.executor_type = executor_type
         self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or min(max_workers * 2, max(max_workers, MAX_DEFAULT_IN_FLIGHT))
+        self.pipeline_workers = pipeline_workers
+        self.read_ahead = read_ahead
+        self.memory_budget = MemoryBudget(memory_budget) if memory_budget else None
+        self.metadata_index = metadata_index
+        # 最近一次批量处理的预读统计，未使用预读时为None
+        self.read_ahead_stats: Optional[ReadAheadStats] = None
         self.is_processing = False
         self.cancel_flag = threading.Event()
+        # 进程模式下传给工作进程的取消标志，每次批量处理创建一个
+        self._worker_cancel_flag = None
+
+    def iter_process(
+        self,
+        image_paths: Iterable[str],
+        output_dir: str,
+        watermark_config: Union[WatermarkSpec, Dict],
+        layout: WatermarkLayout,
+        naming_rule: Dict,
+        manifest: Optional[JobManifest] = None
+    ) -> Iterator[BatchResult]:
+        """
+        逐张产出批量处理结果，可按任务清单跳过输出已是最新的图片
+
+        Args:
+            image_paths: 图片路径列表或任意可迭代对象
+            output_dir: 输出目录
+            watermark_config: 水印规格，也可以传入水印配置字典
+            layout: 布局配置
+            naming_rule: 命名规则配置
+            manifest: 任务清单，None表示全部重新处理。输入内容、水印配置和
+                输出文件都与清单记录一致的图片产出skipped=True的结果，
+                处理成功的图片写入清单，中断后再次运行时从断点继续
+
+        Yields:
+            BatchResult: 单张图片的处理结果
+        """
+        # 配置只在这里解析一次，之后各线程/进程直接读取规格的属性
+        spec = WatermarkSpec.coerce(watermark_config)
+
+        if manifest is None:
+            yield from self._iter_results(image_paths, output_dir, spec, layout, naming_rule)
+            return
+
+        config_hash = compute_config_hash(spec, layout, naming_rule)
+
+        def classified_paths() -> Iterator[Union[str, BatchResult]]:
+            """需要处理的图片产出路径，输出已是最新的图片直接产出跳过的结果"""
+            for image_path in image_paths:
+                output_path = self._generate_output_path(image_path, output_dir, naming_rule)
+                if manifest.is_up_to_date(image_path, output_path, config_hash):
+                    yield BatchResult(
+                        input_path=image_path, output_path=output_path, success=True, skipped=True
+                    )
+                else:
+                    yield image_path
+
+        try:
+            # 跳过的结果随处理结果一起按顺序产出，不在内存中累积
+            for result in self._iter_results(
+                classified_paths(), output_dir, spec, layout, naming_rule, fingerprint=True
+            ):
+                if not result.skipped:
+                    manifest.record(result, config_hash)
+                yield result
+        finally:
+            manifest.flush()
+
+    def _iter_results(
+        self,
+        image_paths: Iterable[str],
+        output_dir: str,
+        spec: WatermarkSpec,
+        layout: WatermarkLayout,
+        naming_rule: Dict,
+        fingerprint: bool = False
+    ) -> Iterator[BatchResult]:
+        """
+        批量处理图片，每完成一张就产出其结果
+
+        任务从image_paths中逐个取出，同时在处理中的任务不超过max_in_flight个，
+        因此内存占用与图片总数无关，也可以传入生成器。结果按完成顺序产出。
+
+        Args:
+            image_paths: 图片路径列表或任意可迭代对象；其中已经是BatchResult的项
+                （如任务清单中已是最新的图片）不处理，轮到时直接产出
+            output_dir: 输出目录
+            spec: 水印规格
+            layout: 布局配置
+            naming_rule: 命名规则配置
+            fingerprint: 是否由工作线程记录输入和输出文件的指纹（任务清单使用）
+
+        Yields:
+            BatchResult: 单张图片的处理结果
+        """
+        self.is_processing = True
+        self.cancel_flag.clear()
+
+        # 确保输出目录存在
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.read_ahead_stats = None
+
+        # 水印只编译一次，每张图片只计算位置和混合
+        plan = WatermarkPlan(spec, layout)
+        if not plan.ok:
+            print(f"水印无效: {plan.error}")
+
+        if self.executor_type == 'pipeline':
+            pipeline = BatchPipeline(self, self.pipeline_workers, self.max_in_flight, self.read_ahead)
+            try:
+                yield from pipeline.run(image_paths, output_dir, plan, naming_rule, fingerprint)
+            finally:
+                self.read_ahead_stats = pipeline.read_ahead.stats
+                self.is_processing = False
+            return
+
+        if self.read_ahead is not None:
+            # 预读：按顺序产出已读入内存的文件
+            source = self.read_ahead.iter_files(image_paths)
+        else:
+            source = iter(image_paths)
+        job = (output_dir, plan, naming_rule, fingerprint)
+
+        # future -> (图片路径, 占用的内存预算)
+        in_flight = {}
+        # 内存预算不足、暂缓提交的图片
+        held = []
+        # 不需要处理、等待产出的结果，最多一个
+        ready: deque = deque()
+
+        try:
+            with self._create_executor((output_dir, spec, layout, naming_rule, fingerprint)) as executor:
+
+                def submit_next() -> bool:
+                    """
+                    提交下一张图片，没有更多图片、内存预算不足或取出的是
+                    无需处理的结果（放入ready等待产出）时返回False
+                    """
+                    if not held:
+                        item = next(source, None)
+                        if item is None:
+                            return False
+                        if isinstance(item, BatchResult):
+                            ready.append(item)
+                            return False
+                        if self.read_ahead is not None:
+                            self.read_ahead_stats = self.read_ahead.stats
+                            image_path, data, stat = item.path, item.data, item.stat
+                        else:
+                            image_path, data, stat = item, None, None
+                        cost = self.estimate_cost(image_path, data)
+                        held.append((image_path, data, stat, cost))
+
+                    image_path, data, stat, cost = held[0]
+                    if self.memory_budget is not None and not self.memory_budget.try_acquire(cost):
+                        # 等处理中的图片完成、释放预算后再提交
+                        return False
+                    held.pop()
+
+                    if self.executor_type == 'process':
+                        # 进程池任务只传路径，任务参数在工作进程初始化时传入一次
+                        future = executor.submit(_process_in_worker, image_path, data, stat)
+                    else:
+                        future = executor.submit(
+                            self._process_single_image, image_path, *job, data=data, stat=stat
+                        )
+                    in_flight[future] = (image_path, cost)
+                    return True
+
+                def fill_window():
+                    """在提交窗口内尽量提交任务"""
+                    while (
+                        len(in_flight) < self.max_in_flight
+                        and not ready
+                        and not self.cancel_flag.is_set()
+                        and submit_next()
+                    ):
+                        pass
+
+                # 先填满提交窗口
+                fill_window()
+
+                # 每完成一个任务补充一个新任务
+                while (in_flight or ready) and not self.cancel_flag.is_set():
+                    if ready:
+                        yield ready.popleft()
+                        fill_window()
+                        continue
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        image_path, cost = in_flight.pop(future)
+                        if self.memory_budget is not None:
+                            self.memory_budget.release(cost)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            print(f"处理图片失败 {image_path}: {e}")
+                            result = BatchResult(input_path=image_path, error=str(e))
+                        yield result
+
+                    fill_window()
+
+        except GeneratorExit:
+            # 调用方提前停止迭代：撤销尚未开始的任务，已在执行的任务在下一阶段之前停止
+            self.cancel_processing()
+            for future in in_flight:
+                future.cancel()
+            raise
+
+        finally:
+            # 提前结束时归还未取走结果的任务占用的预算
+            if self.memory_budget is not None:
+                for _, cost in in_flight.values():
+                    self.memory_budget.release(cost)
+            self.is_processing = False
+
+    def estimate_cost(self, image_path: str, data: Optional[bytes] = None) -> int:
+        """
+        估算处理一张图片占用的内存预算
+
+        依次使用元数据索引中的尺寸、预读的文件内容，都没有时才读取文件头
+
+        Args:
+            image_path: 图片路径
+            data: 预读的文件内容，None表示从文件读取文件头
+
+        Returns:
+            int: 估算的字节数，未启用内存预算时为0
+        """
+        if self.memory_budget is None:
+            return 0
+        if self.metadata_index is not None:
+            record = self.metadata_index.lookup(image_path)
+            if record is not None:
+                # 索引中没有图片模式，按每像素4字节的多通道图片估算
+                return estimate_working_set(record.width, record.height, 'RGB')
+        return estimate_image_bytes(data if data is not None else image_path)
+
+    def _create_executor(self, init_args: tuple) -> Executor:
+        """
+        按执行方式创建线程池或进程池
+
+        Args:
+            init_args: 进程池工作进程的初始化参数 (output_dir, spec, layout, naming_rule, fingerprint)
+
+        Returns:
+            Executor: 执行器
+        """
+        if self.executor_type == 'process':
+            self._worker_cancel_flag = multiprocessing.Event()
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=init_args + (self._worker_cancel_flag,)
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers)
 
     def process_images(
         self,
-        image_paths: List[str],
+        image_paths: Iterable[str],
         output_dir: str,
-        watermark_config: Dict,
+        watermark_config: Union[WatermarkSpec, Dict],
         layout: WatermarkLayout,
         naming_rule: Dict,
-        progress_callback: Optional[Callable[[int, int, str], None]] = None
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        manifest: Optional[JobManifest] = None
     ) -> Dict[str, bool]:
         """
         批量处理图片
 
+        基于iter_process实现，处理完成后汇总为 路径->是否成功 的字典。
+
         Args:
-            image_paths: 图片路径列表
+            image_paths: 图片路径列表或任意可迭代对象
             output_dir: 输出目录
-            watermark_config: 水印配置
+            watermark_config: 水印规格，也可以传入水印配置字典
             layout: 布局配置
             naming_rule: 命名规则配置
-            progress_callback: 进度回调函数 (current, total, current_file)
+            progress_callback: 进度回调函数 (current, total, current_file)，
+                总数未知（传入生成器）时total为0
+            manifest: 任务清单，见iter_process
 
         Returns:
             Dict[str, bool]: 处理结果，文件路径->是否成功
         """
-        self.is_processing = True
-        self.cancel_flag.clear()
         results = {}
 
-        # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
-
-        total_images = len(image_paths)
+        # 生成器等无法预知长度的输入，总数记为0
+        try:
+            total_images = len(image_paths)
+        except TypeError:
+            total_images = 0
         completed = 0
+        skipped = 0
 
         try:
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # 提交所有任务
-                future_to_path = {
-                    executor.submit(
-                        self._process_single_image,
-                        image_path,
-                        output_dir,
-                        watermark_config,
-                        layout,
-                        naming_rule
-                    ): image_path
-                    for image_path in image_paths
-                }
-
-                # 处理完成的任务
-                for future in as_completed(future_to_path):
-                    if self.cancel_flag.is_set():
-                        break
-
-                    image_path = future_to_path[future]
-                    completed += 1
-
-                    try:
-                        success = future.result()
-                        results[image_path] = success
-                    except Exception as e:
-                        print(f"处理图片失败 {image_path}: {e}")
-                        results[image_path] = False
-
-                    # 调用进度回调
-                    if progress_callback:
-                        progress_callback(completed, total_images, os.path.basename(image_path))
+            for result in self.iter_process(
+                image_paths, output_dir, watermark_config, layout, naming_rule, manifest=manifest
+            ):
+                completed += 1
+                skipped += result.skipped
+                results[result.input_path] = result.success
+
+                # 调用进度回调
+                if progress_callback:
+                    progress_callback(completed, total_images, os.path.basename(result.input_path))
 
         except Exception as e:
             print(f"批量处理出错: {e}")
 
-        finally:
-            self.is_processing = False
+        if skipped:
+            print(f"跳过 {skipped} 张输出已是最新的图片")
+        if self.read_ahead_stats is not None:
+            print(self.read_ahead_stats)
 
         return results
 
@@ -107,139 +467,86 @@ class BatchProcessor:
         self,
         image_path: str,
         output_dir: str,
-        watermark_config: Dict,
-        layout: WatermarkLayout,
-        naming_rule: Dict
-    ) -> bool:
+        plan: WatermarkPlan,
+        naming_rule: Dict,
+        fingerprint: bool = False,
+        data: Optional[bytes] = None,
+        stat: Optional[os.stat_result] = None
+    ) -> BatchResult:
         """
         处理单张图片
 
         Args:
             image_path: 图片路径
             output_dir: 输出目录
-            watermark_config: 水印配置
-            layout: 布局配置
+            plan: 编译好的水印计划
             naming_rule: 命名规则
+            fingerprint: 是否记录输入和输出文件的指纹
+            data: 预读的文件内容，None表示直接读取文件
+            stat: 预读之前获取的文件状态
 
         Returns:
-            bool: 处理是否成功
+            BatchResult: 处理结果
         """
+        result = BatchResult(input_path=image_path)
         if self.cancel_flag.is_set():
-            return False
+            result.error = "已取消"
+            return result
 
         try:
+            if fingerprint:
+                # 在读取图片之前记录输入，处理期间被修改的输入下次会重新处理
+                result.input_fingerprint = fingerprint_file(image_path, data, stat)
+
             # 创建图像处理器
             processor = ImageProcessor()
 
             # 加载图片
-            if not processor.load_image(image_path):
-                return False
+            start = time.perf_counter()
+            loaded = processor.load_image(io.BytesIO(data) if data is not None else image_path)
+            result.timings['load'] = time.perf_counter() - start
+            if not loaded:
+                result.error = "加载图片失败"
+                return result
+            if self.cancel_flag.is_set():
+                result.error = "已取消"
+                return result
 
             # 添加水印
-            success = self._add_watermark(processor, watermark_config, layout)
+            start = time.perf_counter()
+            success = plan.apply(processor, image_path=image_path)
+            result.timings['watermark'] = time.perf_counter() - start
             if not success:
-                return False
+                result.error = "添加水印失败"
+                return result
+            if self.cancel_flag.is_set():
+                result.error = "已取消"
+                return result
 
             # 生成输出文件名
             output_path = self._generate_output_path(
                 image_path, output_dir, naming_rule
             )
+            result.output_path = output_path
 
             # 保存图片
-            quality = watermark_config.get('quality', 95)
-            return processor.save_image(output_path, quality)
+            start = time.perf_counter()
+            saved = processor.save_image(output_path, plan.spec.quality)
+            result.timings['save'] = time.perf_counter() - start
+            if not saved:
+                result.error = "保存图片失败"
+                return result
+
+            result.bytes_written = os.path.getsize(output_path)
+            if fingerprint:
+                result.output_fingerprint = fingerprint_file(output_path)
+            result.success = True
+            return result
 
         except Exception as e:
             print(f"处理单张图片失败 {image_path}: {e}")
-            return False
-
-    def _add_watermark(
-        self,
-        processor: ImageProcessor,
-        watermark_config: Dict,
-        layout: WatermarkLayout
-    ) -> bool:
-        """
-        添加水印到图片
-
-        Args:
-            processor: 图像处理器
-            watermark_config: 水印配置
-            layout: 布局配置
-
-        Returns:
-            bool: 添加是否成功
-        """
-        watermark_type = watermark_config.get('type', WatermarkType.TEXT)
-
-        if watermark_type == WatermarkType.TEXT:
-            return self._add_text_watermark(processor, watermark_config, layout)
-        elif watermark_type == WatermarkType.IMAGE:
-            return self._add_image_watermark(processor, watermark_config, layout)
-
-        return False
-
-    def _add_text_watermark(
-        self,
-        processor: ImageProcessor,
-        watermark_config: Dict,
-        layout: WatermarkLayout
-    ) -> bool:
-        """添加文本水印"""
-        text_config = watermark_config.get('text_config', {})
-
-        # 计算位置
-        from .watermark import WatermarkCalculator
-        image_size = processor.get_image_size()
-        text_size = WatermarkCalculator.get_text_size(
-            text_config.get('text', 'Watermark'),
-            text_config.get('font_size', 36)
-        )
-        position = WatermarkCalculator.calculate_position(image_size, text_size, layout)
-
-        return processor.add_text_watermark(
-            text=text_config.get('text', 'Watermark'),
-            position=position,
-            font_size=text_config.get('font_size', 36),
-            color=text_config.get('color', (255, 255, 255)),
-            opacity=text_config.get('opacity', 128)
-        )
-
-    def _add_image_watermark(
-        self,
-        processor: ImageProcessor,
-        watermark_config: Dict,
-        layout: WatermarkLayout
-    ) -> bool:
-        """添加图片水印"""
-        image_config = watermark_config.get('image_config', {})
-        watermark_path = image_config.get('image_path', '')
-
-        if not watermark_path or not os.path.exists(watermark_path):
-            return False
-
-        # 计算位置和大小
-        from .watermark import WatermarkCalculator
-        image_size = processor.get_image_size()
-
-        # 获取水印图片尺寸
-        from PIL import Image
-        with Image.open(watermark_path) as wm_img:
-            wm_size = wm_img.size
-
-        # 如果指定了新尺寸，使用新尺寸
-        target_size = image_config.get('size')
-        if target_size:
-            wm_size = target_size
-
-        position = WatermarkCalculator.calculate_position(image_size, wm_size, layout)
-
-        return processor.add_image_watermark(
-            watermark_path=watermark_path,
-            position=position,
-            size=target_size,
-            opacity=image_config.get('opacity', 128)
-        )
+            result.error = str(e)
+            return result
 
     def _generate_output_path(
         self,
@@ -253,13 +560,14 @@ class BatchProcessor:
         Args:
             input_path: 输入文件路径
             output_dir: 输出目录
-            naming_rule: 命名规则
+            naming_rule: 命名规则，支持 keep_original_name、add_prefix/prefix、
+                add_suffix/suffix 和 format（输出扩展名，默认保持原格式）
 
         Returns:
             str: 输出文件路径
         """
         input_file = Path(input_path)
-        name_stem = input_file.stem
+        name_stem = input_file.stem if naming_rule.get('keep_original_name', True) else ''
         extension = naming_rule.get('format', input_file.suffix)
 
         # 应用命名规则
@@ -273,8 +581,10 @@ class BatchProcessor:
         return os.path.join(output_dir, output_filename)
 
     def cancel_processing(self):
-        """取消当前的批量处理"""
+        """取消当前的批量处理，正在处理的图片在当前阶段（读取、加水印或保存）完成后停止"""
         self.cancel_flag.set()
+        if self._worker_cancel_flag is not None:
+            self._worker_cancel_flag.set()
 
     def is_busy(self) -> bool:
         """检查是否正在处理"""
@@ -0,0 +1,184 @@
+"""
+混合后端模块
+
+集中实现透明度缩放和图层混合运算。提供纯Pillow后端和基于NumPy的
+向量化后端，可在运行时切换；未安装NumPy时自动回退到Pillow后端。
+
+默认使用Pillow后端。实测（bench_blend.py）NumPy后端的透明度缩放略快，
+但图层混合比Pillow的C实现慢一个数量级，因此只在显式选择
+（参数或环境变量PHOTO_WATERMARK_BLEND_BACKEND）时使用
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖
+    np = None
+
+
+class PillowBlendBackend:
+    """纯Pillow混合后端"""
+
+    name = 'pillow'
+
+    def scale_alpha(self, image: Image.Image, opacity: int) -> Image.Image:
+        """
+        按透明度缩放RGBA图片的alpha通道
+
+        Args:
+            image: RGBA图片（不会被修改）
+            opacity: 透明度 (0-255)
+
+        Returns:
+            Image.Image: 缩放后的新RGBA图片
+        """
+        result = image.copy()
+        alpha = result.getchannel('A')
+        result.putalpha(alpha.point([int(p * opacity / 255) for p in range(256)]))
+        return result
+
+    def composite(
+        self,
+        base: Image.Image,
+        layer: Image.Image,
+        position: Tuple[int, int]
+    ) -> Image.Image:
+        """
+        将RGBA图层混合到底图的指定区域
+
+        图层必须已裁剪到底图范围内。RGB底图原地混合，无需转换为RGBA。
+
+        Args:
+            base: 底图（RGB或RGBA，原地修改）
+            layer: RGBA图层
+            position: 图层左上角坐标 (x, y)
+
+        Returns:
+            Image.Image: 混合后的底图
+        """
+        if base.mode == 'RGB':
+            # 不透明底图：以图层alpha作为蒙版直接混合
+            base.paste(layer, position, layer)
+        else:
+            if base.mode != 'RGBA':
+                base = base.convert('RGBA')
+            base.alpha_composite(layer, position)
+        return base
+
+
+class NumpyBlendBackend(PillowBlendBackend):
+    """
+    基于NumPy的向量化混合后端
+
+    结果与Pillow后端一致：RGB底图逐像素相同，RGBA底图因舍入方式不同
+    个别通道最多相差1
+    """
+
+    name = 'numpy'
+
+    def scale_alpha(self, image: Image.Image, opacity: int) -> Image.Image:
+        """按透明度缩放RGBA图片的alpha通道"""
+        pixels = np.array(image, dtype=np.uint8)
+        alpha = pixels[..., 3].astype(np.uint16)
+        alpha *= opacity
+        alpha //= 255
+        pixels[..., 3] = alpha
+        return Image.fromarray(pixels, 'RGBA')
+
+    def composite(
+        self,
+        base: Image.Image,
+        layer: Image.Image,
+        position: Tuple[int, int]
+    ) -> Image.Image:
+        """将RGBA图层混合到底图的指定区域"""
+        if base.mode not in ('RGB', 'RGBA'):
+            base = base.convert('RGBA')
+
+        x, y = position
+        box = (x, y, x + layer.width, y + layer.height)
+
+        src = np.asarray(layer)
+        src_a = src[..., 3:4].astype(np.uint16)
+        inv_a = 255 - src_a
+
+        if base.mode == 'RGB':
+            # RGB直接混合：out = src * a + dst * (1 - a)，uint16即可容纳中间结果
+            out = np.asarray(base.crop(box)).astype(np.uint16)
+            out *= inv_a
+            out += src[..., :3] * src_a
+            out = _div255(out)
+        else:
+            # 预乘alpha的Porter-Duff over运算
+            dst = np.asarray(base.crop(box)).astype(np.uint32)
+            dst_a = dst[..., 3:4]
+            out_a = src_a * 255 + dst_a * inv_a
+            premul = src[..., :3] * (src_a * 255).astype(np.uint32) + dst[..., :3] * (dst_a * inv_a)
+            rgb = (premul + out_a // 2) // np.maximum(out_a, 1)
+            # 两者都完全透明时与Pillow一致，保留底图像素
+            rgb = np.where(out_a == 0, dst[..., :3], rgb)
+            out = np.concatenate([rgb, (out_a + 127) // 255], axis=-1).astype(np.uint8)
+
+        base.paste(Image.fromarray(out, base.mode), box)
+        return base
+
+
+def _div255(values):
+    """对uint16数组做四舍五入的除以255运算，结果为uint8"""
+    values = values + 128
+    values += values >> 8
+    values >>= 8
+    return values.astype(np.uint8)
+
+
+_BACKENDS: Dict[str, type] = {'pillow': PillowBlendBackend}
+if np is not None:
+    _BACKENDS['numpy'] = NumpyBlendBackend
+
+_default_backend_name = os.environ.get('PHOTO_WATERMARK_BLEND_BACKEND', 'pillow')
+
+
+def available_backends() -> List[str]:
+    """
+    列出当前环境可用的混合后端
+
+    Returns:
+        List[str]: 后端名称列表
+    """
+    return list(_BACKENDS.keys())
+
+
+def get_backend(name: Optional[str] = None) -> PillowBlendBackend:
+    """
+    获取混合后端实例
+
+    Args:
+        name: 后端名称（'pillow' 或 'numpy'），None表示使用默认后端
+
+    Returns:
+        PillowBlendBackend: 后端实例，请求的后端不可用时回退到Pillow后端
+    """
+    name = name or _default_backend_name
+    backend_class = _BACKENDS.get(name, PillowBlendBackend)
+    return backend_class()
+
+
+def set_default_backend(name: str) -> bool:
+    """
+    设置默认混合后端
+
+    Args:
+        name: 后端名称（'pillow' 或 'numpy'）
+
+    Returns:
+        bool: 后端可用返回True
+    """
+    global _default_backend_name
+    if name not in _BACKENDS:
+        return False
+    _default_backend_name = name
+    return True
@@ -0,0 +1,305 @@
+"""
+字体注册表模块
+
+扫描系统字体目录建立 字体族/样式 -> 字体文件 的索引并持久化，
+按 (路径, 字号) 缓存字体对象，使热路径上的字体查找几乎没有开销
+"""
+
+import json
+import os
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from PIL import ImageFont
+
+from ..utils.app_config import get_default_config_dir
+
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+
+# 请求的字体族不存在时依次尝试的后备字体族
+FALLBACK_FAMILIES = [
+    'Arial',
+    'Helvetica',
+    'Liberation Sans',
+    'DejaVu Sans',
+    'Noto Sans',
+    'Microsoft YaHei',
+    'PingFang SC',
+]
+
+INDEX_VERSION = 1
+
+
+def get_system_font_dirs() -> List[str]:
+    """
+    获取当前平台的系统字体目录
+
+    Returns:
+        List[str]: 字体目录列表
+    """
+    home = Path.home()
+    if sys.platform.startswith('win'):
+        windir = os.environ.get('WINDIR', 'C:/Windows')
+        dirs = [os.path.join(windir, 'Fonts')]
+        local_appdata = os.environ.get('LOCALAPPDATA')
+        if local_appdata:
+            dirs.append(os.path.join(local_appdata, 'Microsoft', 'Windows', 'Fonts'))
+    elif sys.platform == 'darwin':
+        dirs = [
+            '/System/Library/Fonts',
+            '/Library/Fonts',
+            str(home / 'Library' / 'Fonts'),
+        ]
+    else:
+        dirs = [
+            '/usr/share/fonts',
+            '/usr/local/share/fonts',
+            str(home / '.fonts'),
+            str(home / '.local' / 'share' / 'fonts'),
+        ]
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def _style_key(bold: bool, italic: bool) -> str:
+    """根据粗体/斜体生成样式键"""
+    if bold and italic:
+        return 'bold italic'
+    if bold:
+        return 'bold'
+    if italic:
+        return 'italic'
+    return 'regular'
+
+
+def _parse_style(style_name: str) -> str:
+    """将字体文件中的样式名归一化为样式键"""
+    style = style_name.lower()
+    bold = any(word in style for word in ('bold', 'black', 'heavy'))
+    italic = 'italic' in style or 'oblique' in style
+    return _style_key(bold, italic)
+
+
+@lru_cache(maxsize=128)
+def _load_truetype(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """按 (路径, 字号) 缓存的字体加载"""
+    return ImageFont.truetype(path, size)
+
+
+class FontRegistry:
+    """系统字体注册表"""
+
+    def __init__(
+        self,
+        font_dirs: Optional[List[str]] = None,
+        index_path: Optional[Union[str, Path]] = None
+    ):
+        """
+        初始化字体注册表
+
+        Args:
+            font_dirs: 要扫描的字体目录，None表示使用系统字体目录
+            index_path: 持久化索引文件路径，None表示应用配置目录下的font_index.json
+        """
+        if index_path is None:
+            index_path = get_default_config_dir() / "font_index.json"
+
+        self.font_dirs = font_dirs if font_dirs is not None else get_system_font_dirs()
+        self.index_path = Path(index_path)
+        self._families: Optional[Dict[str, Dict[str, str]]] = None
+        self._lock = threading.Lock()
+        # 每个注册表各自的解析缓存，重新扫描时清空
+        self.resolve = lru_cache(maxsize=256)(self._resolve)
+
+    def _dirs_signature(self) -> Dict[str, float]:
+        """
+        字体目录及其所有子目录的修改时间，用于判断持久化索引是否过期
+
+        在子目录（如 /usr/share/fonts/truetype/dejavu）中增删字体文件只会
+        改变该子目录的修改时间，因此需要逐级记录
+        """
+        signature = {}
+        for font_dir in self.font_dirs:
+            for root, _, _ in os.walk(font_dir):
+                try:
+                    signature[root] = os.path.getmtime(root)
+                except OSError:
+                    pass
+        return signature
+
+    def _ensure_index(self) -> Dict[str, Dict[str, str]]:
+        """确保索引已加载，首次调用时读取持久化索引或扫描字体目录"""
+        if self._families is not None:
+            return self._families
+
+        with self._lock:
+            if self._families is None:
+                families = self._load_index()
+                if families is None:
+                    families = self._scan()
+                    self._save_index(families)
+                self._families = families
+        return self._families
+
+    def _load_index(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """读取持久化索引，过期或损坏时返回None"""
+        try:
+            if not self.index_path.exists():
+                return None
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return None
+            if data.get('dirs') != self._dirs_signature():
+                return None
+            return data.get('families', {})
+        except Exception as e:
+            print(f"读取字体索引失败: {e}")
+            return None
+
+    def _save_index(self, families: Dict[str, Dict[str, str]]):
+        """保存索引到磁盘"""
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            data = {
+                'version': INDEX_VERSION,
+                'dirs': self._dirs_signature(),
+                'families': families,
+            }
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"保存字体索引失败: {e}")
+
+    def _scan(self) -> Dict[str, Dict[str, str]]:
+        """
+        扫描字体目录，建立 字体族 -> {样式: 路径} 索引
+
+        Returns:
+            Dict[str, Dict[str, str]]: 以小写字体族名为键的索引
+        """
+        families: Dict[str, Dict[str, str]] = {}
+        for font_dir in self.font_dirs:
+            for root, _, files in os.walk(font_dir):
+                for filename in files:
+                    if not filename.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(root, filename)
+                    try:
+                        family, style = ImageFont.truetype(path, 12).getname()
+                    except Exception:
+                        continue
+                    if not family:
+                        continue
+                    styles = families.setdefault(family.lower(), {})
+                    styles.setdefault(_parse_style(style or ''), path)
+        return families
+
+    def rescan(self):
+        """强制重新扫描字体目录并更新持久化索引"""
+        with self._lock:
+            families = self._scan()
+            self._save_index(families)
+            self._families = families
+            self.resolve.cache_clear()
+
+    def list_families(self) -> List[str]:
+        """
+        列出已索引的字体族
+
+        Returns:
+            List[str]: 小写字体族名列表
+        """
+        return sorted(self._ensure_index().keys())
+
+    def _resolve(
+        self,
+        family: Optional[str] = None,
+        bold: bool = False,
+        italic: bool = False
+    ) -> Optional[str]:
+        """
+        解析字体族和样式对应的字体文件路径，结果缓存在self.resolve中
+
+        Args:
+            family: 字体族名称
+            bold: 是否粗体
+            italic: 是否斜体
+
+        Returns:
+            Optional[str]: 字体文件路径，找不到任何可用字体时返回None
+        """
+        families = self._ensure_index()
+        wanted = _style_key(bold, italic)
+
+        candidates = []
+        if family:
+            candidates.append(family.lower())
+        candidates.extend(name.lower() for name in FALLBACK_FAMILIES)
+
+        for name in candidates:
+            styles = families.get(name)
+            if styles:
+                return styles.get(wanted) or styles.get('regular') or next(iter(styles.values()))
+
+        # 后备字体族都不存在时，使用索引中的任意字体
+        for styles in families.values():
+            return styles.get('regular') or next(iter(styles.values()))
+        return None
+
+    def get_font(
+        self,
+        family: Optional[str] = None,
+        size: int = 36,
+        bold: bool = False,
+        italic: bool = False,
+        font_path: Optional[str] = None
+    ):
+        """
+        获取字体对象
+
+        Args:
+            family: 字体族名称
+            size: 字体大小
+            bold: 是否粗体
+            italic: 是否斜体
+            font_path: 显式指定的字体文件路径，优先于字体族
+
+        Returns:
+            ImageFont.FreeTypeFont: 字体对象，没有可用字体时返回PIL默认字体
+        """
+        paths = []
+        if font_path:
+            paths.append(font_path)
+        resolved = self.resolve(family, bold, italic)
+        if resolved:
+            paths.append(resolved)
+
+        for path in paths:
+            try:
+                return _load_truetype(path, size)
+            except Exception:
+                continue
+        return ImageFont.load_default()
+
+
+_default_registry: Optional[FontRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_font_registry() -> FontRegistry:
+    """
+    获取进程级共享的字体注册表
+
+    Returns:
+        FontRegistry: 字体注册表
+    """
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = FontRegistry()
+    return _default_registry
@@ -0,0 +1,139 @@
+"""
+字形图集模块
+
+把每个字符按 (字体, 字号, 样式, 颜色, 透明度) 栅格化一次并缓存，
+逐图变化的水印文本（如含文件名、拍摄日期的模板文本）直接用缓存的字形
+拼接成图章，不必每张图片都重新栅格化整段文本
+"""
+
+from typing import Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from .font_registry import get_font_registry
+from .image_cache import ImageLRUCache, image_nbytes
+
+
+# 多行文本的行间距，与PIL多行绘制的默认值一致
+LINE_SPACING = 4
+
+
+def _glyph_nbytes(glyph) -> int:
+    """计算 (字形图片, 偏移, 步进) 缓存项的字节数"""
+    image = glyph[0]
+    return image_nbytes(image) if image is not None else 64
+
+
+class GlyphAtlas:
+    """字形图集"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        初始化字形图集
+
+        Args:
+            max_bytes: 字形缓存的字节预算
+        """
+        self._glyphs = ImageLRUCache(max_bytes=max_bytes, sizeof=_glyph_nbytes)
+
+    def get_glyph(self, font, font_key: tuple, char: str, ink: Tuple[int, int, int, int]) -> tuple:
+        """
+        获取单个字符的字形
+
+        Args:
+            font: 字体对象
+            font_key: 字体的缓存键
+            char: 字符
+            ink: 填充颜色 RGBA
+
+        Returns:
+            tuple: (字形图片，空白字符为None, 字形左上角相对绘制原点的偏移, 水平步进)
+        """
+        def rasterize():
+            bbox = font.getbbox(char)
+            advance = font.getlength(char)
+            width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            if width <= 0 or height <= 0:
+                return (None, (0, 0), advance)
+            glyph = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+            ImageDraw.Draw(glyph).text((-bbox[0], -bbox[1]), char, font=font, fill=ink)
+            return (glyph, (bbox[0], bbox[1]), advance)
+
+        return self._glyphs.get_or_create((font_key, char, ink), rasterize)
+
+    def render(
+        self,
+        text: str,
+        font_family: Optional[str] = None,
+        font_size: int = 36,
+        bold: bool = False,
+        italic: bool = False,
+        color: Tuple[int, int, int] = (255, 255, 255),
+        opacity: int = 128,
+        font_path: Optional[str] = None
+    ) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """
+        用缓存的字形拼接文本图章
+
+        字形按步进依次排列（不做字偶距调整），多行文本按PIL的行距排列
+
+        Args:
+            text: 水印文本，可以包含换行
+            font_family: 字体族名称
+            font_size: 字体大小
+            bold: 是否粗体
+            italic: 是否斜体
+            color: 文字颜色 RGB
+            opacity: 透明度 (0-255)
+            font_path: 显式指定的字体文件路径
+
+        Returns:
+            Optional[Tuple[Image.Image, Tuple[int, int]]]: (图章, 图章左上角相对
+            绘制原点的偏移)，与ImageProcessor.render_text_stamp的返回格式相同；
+            没有可见字符时返回None
+        """
+        font = get_font_registry().get_font(font_family, font_size, bold, italic, font_path=font_path)
+        font_key = (font_family, font_path, font_size, bold, italic)
+        ink = (*color, opacity)
+        line_step = font.getbbox('A')[3] + LINE_SPACING
+
+        # (字形, x, y)
+        placements = []
+        for line_index, line in enumerate(text.split('\n')):
+            x = 0.0
+            y = line_index * line_step
+            for char in line:
+                glyph, (offset_x, offset_y), advance = self.get_glyph(font, font_key, char, ink)
+                if glyph is not None:
+                    placements.append((glyph, int(round(x)) + offset_x, y + offset_y))
+                x += advance
+
+        if not placements:
+            return None
+
+        left = min(px for _, px, _ in placements)
+        top = min(py for _, _, py in placements)
+        right = max(px + glyph.width for glyph, px, _ in placements)
+        bottom = max(py + glyph.height for glyph, _, py in placements)
+
+        stamp = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        for glyph, px, py in placements:
+            stamp.alpha_composite(glyph, (px - left, py - top))
+        return stamp, (left, top)
+
+    def clear(self):
+        """清空字形缓存"""
+        self._glyphs.clear()
+
+
+_glyph_atlas = GlyphAtlas()
+
+
+def get_glyph_atlas() -> GlyphAtlas:
+    """
+    获取进程级共享的字形图集
+
+    Returns:
+        GlyphAtlas: 字形图集
+    """
+    return _glyph_atlas
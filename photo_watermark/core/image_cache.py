@@ -0,0 +1,157 @@
+"""
+图像缓存模块
+
+提供按字节预算淘汰的LRU图像缓存，以及进程级共享的水印图章缓存
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from PIL import Image
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """
+    估算图片占用的内存字节数
+
+    Args:
+        image: PIL图片对象
+
+    Returns:
+        int: 像素数据的字节数
+    """
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+class ImageLRUCache:
+    """按字节预算淘汰的线程安全LRU图像缓存"""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = image_nbytes
+    ):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存总字节预算
+            sizeof: 计算缓存值字节数的函数
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes = {}
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        获取缓存项，命中时将其移到最近使用的位置
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Any]: 缓存值，未命中返回None
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        写入缓存项，超出预算时淘汰最久未使用的项
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+        """
+        nbytes = self.sizeof(value)
+        # 单项超过总预算时不缓存
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._items:
+                self._current_bytes -= self._sizes.pop(key)
+                del self._items[key]
+
+            self._items[key] = value
+            self._sizes[key] = nbytes
+            self._current_bytes += nbytes
+
+            while self._current_bytes > self.max_bytes and self._items:
+                old_key, _ = self._items.popitem(last=False)
+                self._current_bytes -= self._sizes.pop(old_key)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        获取缓存项，未命中时调用factory生成并写入缓存
+
+        Args:
+            key: 缓存键
+            factory: 生成缓存值的函数
+
+        Returns:
+            Any: 缓存值
+        """
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def discard(self, key: Hashable):
+        """移除指定缓存项"""
+        with self._lock:
+            if key in self._items:
+                self._current_bytes -= self._sizes.pop(key)
+                del self._items[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._current_bytes = 0
+
+    @property
+    def current_bytes(self) -> int:
+        """当前缓存占用的字节数"""
+        return self._current_bytes
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+
+def _stamp_nbytes(stamp) -> int:
+    """计算 (图章图片, 偏移) 缓存项的字节数"""
+    return image_nbytes(stamp[0])
+
+
+# 进程级共享的文本水印图章缓存：批量处理和GUI预览共用
+_stamp_cache = ImageLRUCache(max_bytes=64 * 1024 * 1024, sizeof=_stamp_nbytes)
+
+
+def get_stamp_cache() -> ImageLRUCache:
+    """
+    获取进程级共享的水印图章缓存
+
+    Returns:
+        ImageLRUCache: 图章缓存，值为 (RGBA图章, 相对锚点的偏移)
+    """
+    return _stamp_cache
@@ -0,0 +1,250 @@
+"""
+图片库模块
+
+维护导入的图片集合：按路径去重，按路径/ID的增删查均为O(1)，
+每张图片有在会话内保持不变的ID，供界面按ID而非列表下标引用
+"""
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+class ImageLibrary:
+    """有序、去重的图片集合"""
+
+    def __init__(self, image_paths: Optional[Iterable[str]] = None):
+        """
+        初始化图片库
+
+        Args:
+            image_paths: 初始图片路径
+        """
+        self._next_id = 0
+        # 按导入顺序排列的ID，已删除的位置为None（墓碑），按位置访问时再压缩
+        self._order: List[Optional[int]] = []
+        self._positions: Dict[int, int] = {}
+        self._paths: Dict[int, str] = {}
+        self._ids_by_key: Dict[str, int] = {}
+        # 图片ID -> 扫描得到的图片信息（格式、尺寸等）
+        self._infos: Dict[int, Any] = {}
+        self._tombstones = 0
+
+        if image_paths:
+            self.extend(image_paths)
+
+    @staticmethod
+    def _path_key(image_path: str) -> str:
+        """路径归一化，用于去重"""
+        return os.path.normcase(os.path.abspath(image_path))
+
+    def add(self, image_path: str, info: Any = None) -> Optional[int]:
+        """
+        添加图片
+
+        Args:
+            image_path: 图片路径
+            info: 图片信息（如ImageInfo），可选
+
+        Returns:
+            Optional[int]: 新图片的ID，图片已存在时返回None
+        """
+        key = self._path_key(image_path)
+        if key in self._ids_by_key:
+            return None
+
+        image_id = self._next_id
+        self._next_id += 1
+        self._ids_by_key[key] = image_id
+        self._paths[image_id] = image_path
+        if info is not None:
+            self._infos[image_id] = info
+        self._positions[image_id] = len(self._order)
+        self._order.append(image_id)
+        return image_id
+
+    def extend(self, image_paths: Iterable[str]) -> List[int]:
+        """
+        批量添加图片，已存在的图片被跳过
+
+        Args:
+            image_paths: 图片路径
+
+        Returns:
+            List[int]: 新添加图片的ID
+        """
+        added = []
+        for image_path in image_paths:
+            image_id = self.add(image_path)
+            if image_id is not None:
+                added.append(image_id)
+        return added
+
+    def remove(self, image_id: int) -> bool:
+        """
+        删除图片
+
+        Args:
+            image_id: 图片ID
+
+        Returns:
+            bool: 删除成功返回True，ID不存在返回False
+        """
+        image_path = self._paths.pop(image_id, None)
+        if image_path is None:
+            return False
+
+        del self._ids_by_key[self._path_key(image_path)]
+        self._infos.pop(image_id, None)
+        self._order[self._positions.pop(image_id)] = None
+        self._tombstones += 1
+        return True
+
+    def remove_path(self, image_path: str) -> bool:
+        """
+        按路径删除图片
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            bool: 删除成功返回True
+        """
+        image_id = self.get_id(image_path)
+        return image_id is not None and self.remove(image_id)
+
+    def clear(self):
+        """清空图片库（ID不会被复用）"""
+        self._order.clear()
+        self._positions.clear()
+        self._paths.clear()
+        self._ids_by_key.clear()
+        self._infos.clear()
+        self._tombstones = 0
+
+    def get_id(self, image_path: str) -> Optional[int]:
+        """
+        按路径查找图片ID
+
+        Args:
+            image_path: 图片路径
+
+        Returns:
+            Optional[int]: 图片ID，不存在时返回None
+        """
+        return self._ids_by_key.get(self._path_key(image_path))
+
+    def get_path(self, image_id: int) -> Optional[str]:
+        """
+        按ID查找图片路径
+
+        Args:
+            image_id: 图片ID
+
+        Returns:
+            Optional[str]: 图片路径，不存在时返回None
+        """
+        return self._paths.get(image_id)
+
+    def get_info(self, image_id: int) -> Any:
+        """
+        获取图片信息
+
+        Args:
+            image_id: 图片ID
+
+        Returns:
+            Any: 添加时提供的图片信息，没有时返回None
+        """
+        return self._infos.get(image_id)
+
+    def _compact(self):
+        """移除墓碑，重建位置索引"""
+        if not self._tombstones:
+            return
+        self._order = [image_id for image_id in self._order if image_id is not None]
+        self._positions = {image_id: i for i, image_id in enumerate(self._order)}
+        self._tombstones = 0
+
+    def id_at(self, index: int) -> int:
+        """
+        获取指定位置的图片ID
+
+        Args:
+            index: 位置（0起始，不含已删除图片）
+
+        Returns:
+            int: 图片ID
+
+        Raises:
+            IndexError: 位置越界
+        """
+        self._compact()
+        return self._order[index]
+
+    def path_at(self, index: int) -> str:
+        """
+        获取指定位置的图片路径
+
+        Args:
+            index: 位置（0起始，不含已删除图片）
+
+        Returns:
+            str: 图片路径
+
+        Raises:
+            IndexError: 位置越界
+        """
+        return self._paths[self.id_at(index)]
+
+    def index_of(self, image_id: int) -> int:
+        """
+        获取图片的当前位置
+
+        Args:
+            image_id: 图片ID
+
+        Returns:
+            int: 位置，ID不存在时返回-1
+        """
+        if image_id not in self._paths:
+            return -1
+        self._compact()
+        return self._positions[image_id]
+
+    def ids(self, start: int = 0, stop: Optional[int] = None) -> List[int]:
+        """
+        获取一段位置范围内的图片ID
+
+        Args:
+            start: 起始位置
+            stop: 结束位置（不含），None表示到末尾
+
+        Returns:
+            List[int]: 图片ID列表
+        """
+        self._compact()
+        return self._order[start:stop]
+
+    def paths(self) -> List[str]:
+        """
+        获取所有图片路径
+
+        Returns:
+            List[str]: 按导入顺序排列的图片路径
+        """
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __bool__(self) -> bool:
+        return bool(self._paths)
+
+    def __contains__(self, image_path: str) -> bool:
+        return self.get_id(image_path) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for image_id in list(self._order):
+            image_path = self._paths.get(image_id)
+            if image_path is not None:
+                yield image_path
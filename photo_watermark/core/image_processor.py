@@ -4,10 +4,18 @@
 负责图片的加载、处理、水印添加等核心功能
 """
 
-from PIL import Image, ImageDraw, ImageFont
-from typing import List, Tuple, Optional
+from PIL import Image, ImageDraw
+from typing import BinaryIO, List, Tuple, Optional, Union
+import io
 import os
 
+from .asset_cache import get_asset_cache
+from .blend_backend import get_backend
+from .font_registry import get_font_registry
+from .image_cache import get_stamp_cache
+from .stamp_transform import rotate_stamp
+from .text_metrics import measure_text
+
 
 class ImageProcessor:
     """图像处理器类"""
@@ -17,29 +25,138 @@ class ImageProcessor:
         'output': ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
     }
 
-    def __init__(self):
-        """初始化图像处理器"""
+    def __init__(self, blend_backend: Optional[str] = None):
+        """
+        初始化图像处理器
+
+        Args:
+            blend_backend: 混合后端名称（'pillow' 或 'numpy'），None表示默认后端
+        """
         self.current_image = None
         self.original_image = None
+        # 图片文件的完整分辨率尺寸（低分辨率加载时与original_image尺寸不同）
+        self.source_size: Optional[Tuple[int, int]] = None
+        # 图片文件的EXIF，供水印文本模板使用
+        self.exif: Optional[Image.Exif] = None
+        self.blend_backend = get_backend(blend_backend)
+
+    def set_blend_backend(self, name: str):
+        """
+        切换混合后端，请求的后端不可用时回退到Pillow
 
-    def load_image(self, image_path: str) -> bool:
+        Args:
+            name: 后端名称（'pillow' 或 'numpy'）
+        """
+        self.blend_backend = get_backend(name)
+
+    def load_image(self, image_path: Union[str, BinaryIO], target_size: Optional[Tuple[int, int]] = None) -> bool:
         """
         加载图片文件
 
         Args:
-            image_path: 图片文件路径
+            image_path: 图片文件路径，或已读入内存的文件对象（如BytesIO）
+            target_size: 目标尺寸 (width, height)，指定时以不小于该尺寸的
+                最低分辨率解码，None表示完整分辨率
 
         Returns:
             bool: 加载成功返回True，失败返回False
         """
         try:
-            self.original_image = Image.open(image_path)
+            image = Image.open(image_path)
+            self.source_size = image.size
+            self.exif = image.getexif()
+            if target_size:
+                image = self.decode_scaled(image, target_size)
+            self.original_image = image
             self.current_image = self.original_image.copy()
             return True
         except Exception as e:
             print(f"加载图片失败: {e}")
             return False
 
+    @staticmethod
+    def open_image_scaled(image_path: str, target_size: Tuple[int, int]) -> Image.Image:
+        """
+        以不小于目标尺寸的最低分辨率打开图片
+
+        Args:
+            image_path: 图片文件路径
+            target_size: 目标尺寸 (width, height)
+
+        Returns:
+            Image.Image: 已加载的图片
+        """
+        return ImageProcessor.decode_scaled(Image.open(image_path), target_size)
+
+    @staticmethod
+    def decode_scaled(image: Image.Image, target_size: Tuple[int, int]) -> Image.Image:
+        """
+        以不小于目标尺寸的最低分辨率解码已打开（尚未加载）的图片
+
+        JPEG使用DCT缩放（draft）直接解码为1/2、1/4或1/8分辨率；
+        其他格式解码后用reduce做整数倍缩小。
+
+        Args:
+            image: Image.open返回的图片对象
+            target_size: 目标尺寸 (width, height)
+
+        Returns:
+            Image.Image: 已加载的图片
+        """
+        if image.format == 'JPEG':
+            image.draft(image.mode, tuple(target_size))
+        image.load()
+
+        return ImageProcessor.reduce_image(image, target_size)
+
+    @staticmethod
+    def reduce_image(image: Image.Image, target_size: Tuple[int, int]) -> Image.Image:
+        """
+        将图片按整数倍缩小到不小于目标尺寸
+
+        Args:
+            image: 图片对象
+            target_size: 目标尺寸 (width, height)
+
+        Returns:
+            Image.Image: 缩小后的图片，无需缩小时返回原图片
+        """
+        target_width, target_height = target_size
+        factor = min(image.width // max(1, target_width), image.height // max(1, target_height))
+        if factor < 2:
+            return image
+
+        try:
+            return image.reduce(factor)
+        except ValueError:
+            # 部分模式（如调色板图）不支持reduce
+            return image.convert('RGBA').reduce(factor)
+
+    @staticmethod
+    def fit_image(image: Image.Image, target_size: Tuple[int, int]) -> Image.Image:
+        """
+        将图片等比缩小到目标尺寸以内（不放大）
+
+        先用reduce做廉价的整数倍缩小，再用LANCZOS缩放到精确尺寸。
+
+        Args:
+            image: 图片对象
+            target_size: 目标尺寸 (width, height)
+
+        Returns:
+            Image.Image: 缩放后的图片，无需缩放时返回原图片
+        """
+        target_width, target_height = target_size
+        scale = min(target_width / image.width, target_height / image.height, 1.0)
+        if scale >= 1.0:
+            return image
+
+        new_size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        image = ImageProcessor.reduce_image(image, new_size)
+        if image.size == new_size:
+            return image
+        return image.resize(new_size, Image.Resampling.LANCZOS)
+
     def add_text_watermark(
         self,
         text: str,
@@ -48,7 +165,10 @@ class ImageProcessor:
         font_size: int = 36,
         color: Tuple[int, int, int] = (255, 255, 255),
         opacity: int = 128,
-        rotation: float = 0.0
+        rotation: float = 0.0,
+        font_family: Optional[str] = None,
+        bold: bool = False,
+        italic: bool = False
     ) -> bool:
         """
         添加文本水印
@@ -61,6 +181,9 @@ class ImageProcessor:
             color: 文字颜色 RGB
             opacity: 透明度 (0-255)
             rotation: 旋转角度 (0-360)
+            font_family: 字体族名称，未指定font_path时使用
+            bold: 是否粗体
+            italic: 是否斜体
 
         Returns:
             bool: 添加成功返回True
@@ -69,81 +192,111 @@ class ImageProcessor:
             return False
 
         try:
-            # 创建透明图层
-            watermark = Image.new('RGBA', self.current_image.size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(watermark)
-
-            # 设置字体
-            try:
-                if font_path and os.path.exists(font_path):
-                    font = ImageFont.truetype(font_path, font_size)
-                else:
-                    # 使用默认字体但设置大小
-                    try:
-                        # 尝试使用系统默认字体
-                        font = ImageFont.truetype("arial.ttf", font_size)
-                    except:
-                        try:
-                            # Windows默认字体
-                            font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", font_size)
-                        except:
-                            try:
-                                # 使用PIL的默认字体并调整大小
-                                font = ImageFont.load_default()
-                                # 如果是默认字体，创建一个临时的文本图层来模拟大小调整
-                            except:
-                                font = None
-            except:
-                font = None
-
-            # 创建文本图层
-            if font:
-                # 获取文本尺寸
-                bbox = draw.textbbox((0, 0), text, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-            else:
-                # 如果没有字体，估算文本尺寸
-                text_width = len(text) * int(font_size * 0.6)
-                text_height = int(font_size * 1.2)
-                font = ImageFont.load_default()
-
-            # 如果需要旋转，创建单独的文本图像
-            if rotation != 0:
-                # 创建足够大的临时图像来容纳旋转的文本
-                temp_size = int(max(text_width, text_height) * 1.5)
-                temp_img = Image.new('RGBA', (temp_size, temp_size), (0, 0, 0, 0))
-                temp_draw = ImageDraw.Draw(temp_img)
-
-                # 在临时图像中心绘制文本
-                text_color = (*color, opacity)
-                temp_x = (temp_size - text_width) // 2
-                temp_y = (temp_size - text_height) // 2
-                temp_draw.text((temp_x, temp_y), text, font=font, fill=text_color)
-
-                # 旋转文本图像
-                rotated_text = temp_img.rotate(rotation, expand=True)
-
-                # 将旋转后的文本粘贴到水印图层
-                paste_x = position[0] - rotated_text.width // 2
-                paste_y = position[1] - rotated_text.height // 2
-                watermark.paste(rotated_text, (paste_x, paste_y), rotated_text)
-            else:
-                # 直接绘制文本（无旋转）
-                text_color = (*color, opacity)
-                draw.text(position, text, font=font, fill=text_color)
-
-            # 合并图层
-            if self.current_image.mode != 'RGBA':
-                self.current_image = self.current_image.convert('RGBA')
-
-            self.current_image = Image.alpha_composite(self.current_image, watermark)
+            # 从进程级缓存获取预渲染的图章，同参数只栅格化一次
+            key = (
+                text, font_path, font_family, bold, italic,
+                font_size, tuple(color), opacity, rotation
+            )
+            stamp = get_stamp_cache().get_or_create(
+                key,
+                lambda: self.render_text_stamp(
+                    text, font_path, font_size, color, opacity, rotation,
+                    font_family, bold, italic
+                )
+            )
+            if stamp is None:
+                return True
+
+            layer, (offset_x, offset_y) = stamp
+
+            # 仅在水印覆盖的区域内混合
+            self.composite_layer(layer, (position[0] + offset_x, position[1] + offset_y))
             return True
 
         except Exception as e:
             print(f"添加文本水印失败: {e}")
             return False
 
+    @staticmethod
+    def render_text_stamp(
+        text: str,
+        font_path: Optional[str] = None,
+        font_size: int = 36,
+        color: Tuple[int, int, int] = (255, 255, 255),
+        opacity: int = 128,
+        rotation: float = 0.0,
+        font_family: Optional[str] = None,
+        bold: bool = False,
+        italic: bool = False
+    ) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """
+        将文本渲染为紧凑的RGBA图章
+
+        Args:
+            text: 水印文本
+            font_path: 字体文件路径
+            font_size: 字体大小
+            color: 文字颜色 RGB
+            opacity: 透明度 (0-255)
+            rotation: 旋转角度 (0-360)
+            font_family: 字体族名称
+            bold: 是否粗体
+            italic: 是否斜体
+
+        Returns:
+            Optional[Tuple[Image.Image, Tuple[int, int]]]: (图章, 图章左上角相对
+            水印位置的偏移)，文本为空时返回None
+        """
+        # 通过字体注册表解析字体，字体对象按 (路径, 字号) 缓存
+        font = get_font_registry().get_font(
+            font_family, font_size, bold, italic, font_path=font_path
+        )
+
+        # 文本包围盒由度量缓存提供，不必为测量分配图层
+        metrics = measure_text(text, font_family, font_size, bold, italic, font_path=font_path)
+        text_width, text_height = metrics.size
+        if text_width <= 0 or text_height <= 0:
+            return None
+        bbox = (metrics.offset_x, metrics.offset_y)
+
+        text_color = (*color, opacity)
+
+        # 只在文本包围盒大小的图层上绘制
+        stamp = Image.new('RGBA', (text_width, text_height), (0, 0, 0, 0))
+        ImageDraw.Draw(stamp).text((-bbox[0], -bbox[1]), text, font=font, fill=text_color)
+
+        # 旋转时直接变换紧凑图章并裁剪到实际包围盒，以水印位置为中心放置
+        if rotation % 360 != 0:
+            return rotate_stamp(stamp, rotation)
+        return stamp, (bbox[0], bbox[1])
+
+    def composite_layer(self, layer: Image.Image, position: Tuple[int, int]):
+        """
+        将RGBA图层混合到当前图片的对应区域
+
+        只处理图层与图片相交的部分，内存和耗时与水印面积成正比，
+        与图片尺寸无关。
+
+        Args:
+            layer: RGBA水印图层
+            position: 图层左上角在图片中的坐标 (x, y)
+        """
+        x, y = position
+        img_width, img_height = self.current_image.size
+
+        # 将图层裁剪到图片范围内
+        left = max(0, x)
+        top = max(0, y)
+        right = min(img_width, x + layer.width)
+        bottom = min(img_height, y + layer.height)
+        if right <= left or bottom <= top:
+            return
+
+        if (left, top, right, bottom) != (x, y, x + layer.width, y + layer.height):
+            layer = layer.crop((left - x, top - y, right - x, bottom - y))
+
+        self.current_image = self.blend_backend.composite(self.current_image, layer, (left, top))
+
     def add_image_watermark(
         self,
         watermark_path: str,
@@ -167,27 +320,11 @@ class ImageProcessor:
             return False
 
         try:
-            # 加载水印图片
-            watermark_img = Image.open(watermark_path)
-
-            # 调整大小
-            if size:
-                watermark_img = watermark_img.resize(size, Image.Resampling.LANCZOS)
-
-            # 确保图片有透明度通道
-            if watermark_img.mode != 'RGBA':
-                watermark_img = watermark_img.convert('RGBA')
-
-            # 调整透明度
-            alpha = watermark_img.getchannel('A')
-            alpha = alpha.point(lambda p: int(p * opacity / 255))
-            watermark_img.putalpha(alpha)
+            # 从素材缓存获取已调整尺寸和透明度的水印图片，同一素材只解码一次
+            watermark_img = get_asset_cache().get_variant(watermark_path, size, opacity)
 
-            # 合并图片
-            if self.current_image.mode != 'RGBA':
-                self.current_image = self.current_image.convert('RGBA')
-
-            self.current_image.paste(watermark_img, position, watermark_img)
+            # 仅在水印覆盖的区域内混合
+            self.composite_layer(watermark_img, position)
             return True
 
         except Exception as e:
@@ -209,42 +346,75 @@ class ImageProcessor:
             return False
 
         try:
-            # 根据输出格式转换图片模式
             ext = os.path.splitext(output_path)[1].lower()
-
-            if ext in ['.jpg', '.jpeg']:
-                # JPEG不支持透明度，转换为RGB
-                if self.current_image.mode == 'RGBA':
-                    # 创建白色背景
-                    background = Image.new('RGB', self.current_image.size, (255, 255, 255))
-                    background.paste(self.current_image, mask=self.current_image.split()[-1])
-                    background.save(output_path, 'JPEG', quality=quality)
-                else:
-                    self.current_image.save(output_path, 'JPEG', quality=quality)
-            elif ext in ['.png']:
-                # PNG支持透明度
-                self.current_image.save(output_path, 'PNG')
-            elif ext in ['.bmp']:
-                # BMP不支持透明度，转换为RGB
-                if self.current_image.mode == 'RGBA':
-                    background = Image.new('RGB', self.current_image.size, (255, 255, 255))
-                    background.paste(self.current_image, mask=self.current_image.split()[-1])
-                    background.save(output_path, 'BMP')
-                else:
-                    self.current_image.save(output_path, 'BMP')
-            elif ext in ['.tiff', '.tif']:
-                # TIFF支持透明度
-                self.current_image.save(output_path, 'TIFF')
-            else:
-                # 默认保存为PNG
-                self.current_image.save(output_path, 'PNG')
-
+            self._write_image(output_path, ext, quality)
             return True
 
         except Exception as e:
             print(f"保存图片失败: {e}")
             return False
 
+    def encode_image(self, output_path: str, quality: int = 95) -> Optional[bytes]:
+        """
+        按输出路径的格式把处理后的图片编码到内存，不写文件
+
+        Args:
+            output_path: 输出文件路径（只用于确定格式）
+            quality: JPEG质量 (1-100)
+
+        Returns:
+            Optional[bytes]: 编码后的文件内容，失败返回None
+        """
+        if not self.current_image:
+            return None
+
+        try:
+            buffer = io.BytesIO()
+            ext = os.path.splitext(output_path)[1].lower()
+            self._write_image(buffer, ext, quality)
+            return buffer.getvalue()
+
+        except Exception as e:
+            print(f"编码图片失败: {e}")
+            return None
+
+    def _write_image(self, fp, ext: str, quality: int):
+        """
+        按扩展名对应的格式写出当前图片
+
+        Args:
+            fp: 文件路径或可写的文件对象
+            ext: 小写扩展名，如 '.jpg'
+            quality: JPEG质量 (1-100)
+        """
+        # 根据输出格式转换图片模式
+        if ext in ['.jpg', '.jpeg']:
+            # JPEG不支持透明度，转换为RGB
+            if self.current_image.mode == 'RGBA':
+                # 创建白色背景
+                background = Image.new('RGB', self.current_image.size, (255, 255, 255))
+                background.paste(self.current_image, mask=self.current_image.split()[-1])
+                background.save(fp, 'JPEG', quality=quality)
+            else:
+                self.current_image.save(fp, 'JPEG', quality=quality)
+        elif ext in ['.png']:
+            # PNG支持透明度
+            self.current_image.save(fp, 'PNG')
+        elif ext in ['.bmp']:
+            # BMP不支持透明度，转换为RGB
+            if self.current_image.mode == 'RGBA':
+                background = Image.new('RGB', self.current_image.size, (255, 255, 255))
+                background.paste(self.current_image, mask=self.current_image.split()[-1])
+                background.save(fp, 'BMP')
+            else:
+                self.current_image.save(fp, 'BMP')
+        elif ext in ['.tiff', '.tif']:
+            # TIFF支持透明度
+            self.current_image.save(fp, 'TIFF')
+        else:
+            # 默认保存为PNG
+            self.current_image.save(fp, 'PNG')
+
     def reset_image(self):
         """重置图片到原始状态"""
         if self.original_image:
@@ -0,0 +1,276 @@
+"""
+图片扫描模块
+
+并行遍历目录树，按文件头的魔数识别图片格式（不依赖扩展名），
+并只读取文件头获得宽高，不解码像素。扫描结果分批产出，
+调用方可以边扫描边显示
+"""
+
+import os
+import queue
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+
+@dataclass
+class ImageInfo:
+    """扫描得到的图片信息"""
+    path: str
+    format: str
+    width: int = 0
+    height: int = 0
+    file_size: int = 0
+    mtime_ns: int = 0
+
+
+# 魔数 -> 格式，格式名与Pillow一致
+MAGIC_NUMBERS = [
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'BM', 'BMP'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+]
+
+HEADER_BYTES = 32
+
+# 不含尺寸信息的JPEG SOF标记（DHT、JPG、DAC）
+_JPEG_NON_SOF = (0xC4, 0xC8, 0xCC)
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """
+    根据文件头识别图片格式
+
+    Args:
+        header: 文件开头的字节
+
+    Returns:
+        Optional[str]: 格式名（'JPEG'、'PNG'、'BMP'、'TIFF'），不支持时返回None
+    """
+    for magic, image_format in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return image_format
+    return None
+
+
+def _read_jpeg_size(f) -> Optional[Tuple[int, int]]:
+    """扫描JPEG标记段，从SOF段读取尺寸"""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        # 跳过填充字节
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+
+        marker = byte[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            # 无数据段的独立标记
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            # 到达图像数据仍未找到SOF
+            return None
+
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+
+        if 0xC0 <= marker <= 0xCF and marker not in _JPEG_NON_SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return width, height
+
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_size(f, image_format: str, header: bytes) -> Optional[Tuple[int, int]]:
+    """
+    从文件头读取图片尺寸
+
+    Args:
+        f: 以二进制模式打开的文件
+        image_format: sniff_format识别出的格式
+        header: 文件开头的字节
+
+    Returns:
+        Optional[Tuple[int, int]]: 尺寸 (width, height)，无法解析时返回None
+    """
+    if image_format == 'PNG':
+        if len(header) >= 24 and header[12:16] == b'IHDR':
+            return struct.unpack('>II', header[16:24])
+        return None
+
+    if image_format == 'BMP':
+        if len(header) >= 26:
+            width, height = struct.unpack('<ii', header[18:26])
+            # 高度为负表示自上而下存储
+            return width, abs(height)
+        return None
+
+    if image_format == 'JPEG':
+        return _read_jpeg_size(f)
+
+    # TIFF的尺寸在IFD中，交给Pillow解析文件头（不解码像素）
+    f.seek(0)
+    with Image.open(f) as img:
+        return img.size
+
+
+def sniff_image(path: str, stat: Optional[os.stat_result] = None) -> Optional[ImageInfo]:
+    """
+    识别单个文件
+
+    Args:
+        path: 文件路径
+        stat: 已有的stat结果，None表示重新获取
+
+    Returns:
+        Optional[ImageInfo]: 图片信息，不是支持的图片时返回None
+    """
+    try:
+        if stat is None:
+            stat = os.stat(path)
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_BYTES)
+            image_format = sniff_format(header)
+            if image_format is None:
+                return None
+            size = read_image_size(f, image_format, header) or (0, 0)
+    except Exception as e:
+        print(f"读取文件头失败: {path}, 错误: {e}")
+        return None
+
+    return ImageInfo(
+        path=path,
+        format=image_format,
+        width=size[0],
+        height=size[1],
+        file_size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+
+class ImageScanner:
+    """并行图片扫描器"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 256, recursive: bool = True):
+        """
+        初始化扫描器
+
+        Args:
+            max_workers: 工作线程数，None表示按CPU核数确定（目录扫描以I/O为主，适当多开）
+            chunk_size: 每批产出的最大图片数
+            recursive: 是否递归扫描子目录
+        """
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.recursive = recursive
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """取消正在进行的扫描"""
+        self._cancelled.set()
+
+    def scan(self, paths: Iterable[str]) -> Iterator[List[ImageInfo]]:
+        """
+        扫描文件和目录，分批产出识别出的图片
+
+        Args:
+            paths: 文件或目录路径
+
+        Yields:
+            List[ImageInfo]: 一批图片信息（批内按路径排序，批之间无顺序保证）
+        """
+        self._cancelled.clear()
+        results: "queue.Queue" = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image-scan")
+        lock = threading.Lock()
+        outstanding = [0]
+
+        def run(func, *args):
+            try:
+                if not self._cancelled.is_set():
+                    func(*args)
+            except Exception as e:
+                print(f"扫描失败: {e}")
+            finally:
+                # 子任务在父任务结束前提交，计数归零即全部完成
+                with lock:
+                    outstanding[0] -= 1
+                    finished = outstanding[0] == 0
+                if finished:
+                    results.put(None)
+
+        def submit(func, *args):
+            with lock:
+                outstanding[0] += 1
+            executor.submit(run, func, *args)
+
+        def sniff_batch(batch: List[Tuple[str, Optional[os.stat_result]]]):
+            infos = []
+            for path, stat in batch:
+                if self._cancelled.is_set():
+                    return
+                info = sniff_image(path, stat)
+                if info is not None:
+                    infos.append(info)
+            if infos:
+                infos.sort(key=lambda info: info.path)
+                results.put(infos)
+
+        def scan_dir(directory: str):
+            batch = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if self._cancelled.is_set():
+                        return
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                submit(scan_dir, entry.path)
+                        elif entry.is_file():
+                            batch.append((entry.path, entry.stat()))
+                    except OSError as e:
+                        print(f"读取目录项失败: {entry.path}, 错误: {e}")
+                        continue
+
+                    # 大目录按批提交，多个线程并行读取文件头
+                    if len(batch) >= self.chunk_size:
+                        submit(sniff_batch, batch)
+                        batch = []
+            if batch:
+                submit(sniff_batch, batch)
+
+        def scan_roots(roots: List[str]):
+            files = []
+            for path in roots:
+                if os.path.isdir(path):
+                    submit(scan_dir, path)
+                elif os.path.isfile(path):
+                    files.append((path, None))
+            for start in range(0, len(files), self.chunk_size):
+                submit(sniff_batch, files[start:start + self.chunk_size])
+
+        submit(scan_roots, list(paths))
+        try:
+            while True:
+                chunk = results.get()
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            # 调用方提前停止迭代时取消剩余任务
+            self._cancelled.set()
+            executor.shutdown(wait=False)
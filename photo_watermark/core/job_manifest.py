@@ -0,0 +1,310 @@
+"""
+批量任务清单模块
+
+在本地SQLite数据库中记录每张输入图片的内容哈希、水印配置哈希，
+以及输出文件的路径和内容哈希。重新运行同一任务时，输入、配置和输出
+都未变化的图片直接跳过，只处理新增或修改过的图片；任务中途崩溃或取消后
+再次运行即可从断点继续
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from .metadata_index import compute_content_hash
+from .watermark import WatermarkLayout
+from .watermark_spec import WatermarkSpec
+
+if TYPE_CHECKING:
+    from .batch_processor import BatchResult
+
+
+# 不指定清单目录时，清单以隐藏文件保存在输出目录下
+MANIFEST_FILENAME = ".watermark_manifest.db"
+
+# 累计多少条记录提交一次
+FLUSH_EVERY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    input_path TEXT PRIMARY KEY,
+    input_size INTEGER NOT NULL,
+    input_mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    output_size INTEGER NOT NULL,
+    output_mtime_ns INTEGER NOT NULL,
+    output_hash TEXT NOT NULL,
+    completed_at REAL NOT NULL
+);
+"""
+
+
+def _json_default(value):
+    """配置中的枚举、数据类和路径转换为可序列化的值"""
+    if isinstance(value, Enum):
+        return value.value
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, Path):
+        return str(value)
+    return repr(value)
+
+
+def compute_config_hash(spec: WatermarkSpec, layout: WatermarkLayout, naming_rule: Dict) -> str:
+    """
+    计算水印配置哈希
+
+    图片水印还会计入水印图片的内容哈希，替换同名水印图片后输出视为过期
+
+    Args:
+        spec: 水印规格
+        layout: 布局配置
+        naming_rule: 命名规则配置
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    payload = {
+        'watermark': spec.digest,
+        'layout': layout,
+        'naming': naming_rule,
+    }
+
+    watermark_path = spec.image_path if spec.is_image else None
+    if watermark_path:
+        try:
+            payload['watermark_image'] = compute_content_hash(watermark_path)
+        except OSError:
+            payload['watermark_image'] = None
+
+    encoded = json.dumps(payload, sort_keys=True, default=_json_default, ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def fingerprint_file(
+    path: str,
+    data: Optional[bytes] = None,
+    stat: Optional[os.stat_result] = None
+) -> Tuple[int, int, str]:
+    """
+    获取文件的 (大小, 修改时间, 内容哈希)，写入清单时使用
+
+    Args:
+        path: 文件路径
+        data: 已读入内存的文件内容，None表示从文件读取
+        stat: 读取data之前获取的文件状态，None表示现在获取
+
+    Returns:
+        Tuple[int, int, str]: (大小, 修改时间ns, 内容哈希)
+    """
+    if stat is None:
+        stat = os.stat(path)
+    if data is not None:
+        # 大小以读入的内容为准，读取时文件正在变化的话下次会按大小不一致重新处理
+        return (len(data), stat.st_mtime_ns, compute_content_hash(path, data=data))
+    return (stat.st_size, stat.st_mtime_ns, compute_content_hash(path, stat.st_size))
+
+
+@dataclasses.dataclass
+class ManifestEntry:
+    """清单中一张输入图片的记录"""
+    input_path: str
+    input_size: int
+    input_mtime_ns: int
+    content_hash: str
+    config_hash: str
+    output_path: str
+    output_size: int
+    output_mtime_ns: int
+    output_hash: str
+
+
+class JobManifest:
+    """可续跑的批量任务清单"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        初始化任务清单
+
+        Args:
+            db_path: 清单数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        # 尚未提交的记录
+        self._pending: List[tuple] = []
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 流水线模式下在读取线程中查询，所有访问都在锁内进行
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def for_output_dir(
+        cls,
+        output_dir: Union[str, Path],
+        manifest_dir: Optional[Union[str, Path]] = None
+    ) -> "JobManifest":
+        """
+        打开输出目录对应的任务清单
+
+        Args:
+            output_dir: 输出目录
+            manifest_dir: 保存清单的目录（如应用配置目录下的manifests），
+                清单按输出目录的绝对路径命名，输出目录中不产生额外文件；
+                None表示以隐藏文件保存在输出目录下
+
+        Returns:
+            JobManifest: 任务清单
+        """
+        if manifest_dir is None:
+            return cls(Path(output_dir) / MANIFEST_FILENAME)
+
+        key = os.path.normcase(os.path.abspath(str(output_dir)))
+        name = hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+        return cls(Path(manifest_dir) / f"{name}.db")
+
+    def lookup(self, input_path: str) -> Optional[ManifestEntry]:
+        """
+        读取输入图片的记录
+
+        Args:
+            input_path: 输入图片路径
+
+        Returns:
+            Optional[ManifestEntry]: 记录，没有时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT input_path, input_size, input_mtime_ns, content_hash, config_hash, "
+                "output_path, output_size, output_mtime_ns, output_hash "
+                "FROM entries WHERE input_path = ?",
+                (input_path,)
+            ).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    @staticmethod
+    def _file_matches(path: str, size: int, mtime_ns: int, content_hash: str) -> bool:
+        """
+        文件与记录一致：大小和修改时间相同时直接认为一致，
+        否则（如文件被touch或复制过）按内容哈希比较
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+        try:
+            return compute_content_hash(path, stat.st_size) == content_hash
+        except OSError:
+            return False
+
+    def is_up_to_date(self, input_path: str, output_path: str, config_hash: str) -> bool:
+        """
+        检查输入图片的输出是否已是最新
+
+        Args:
+            input_path: 输入图片路径
+            output_path: 本次任务的输出路径
+            config_hash: 本次任务的水印配置哈希
+
+        Returns:
+            bool: 输入、配置和输出文件都与记录一致时返回True
+        """
+        entry = self.lookup(input_path)
+        if entry is None or entry.config_hash != config_hash or entry.output_path != output_path:
+            return False
+        return (
+            self._file_matches(input_path, entry.input_size, entry.input_mtime_ns, entry.content_hash)
+            and self._file_matches(output_path, entry.output_size, entry.output_mtime_ns, entry.output_hash)
+        )
+
+    def record(self, result: "BatchResult", config_hash: str) -> bool:
+        """
+        记录一张处理成功的图片
+
+        输入和输出的指纹由工作线程在处理前、保存后记录（见BatchResult），
+        这里只写入记录；处理期间被修改的输入与记录不一致，下次运行时重新处理。
+        记录先缓存在内存中，每FLUSH_EVERY条提交一次；
+        崩溃时最多丢失最近一批记录，这些图片下次运行时重新处理
+
+        Args:
+            result: 处理结果
+            config_hash: 本次任务的水印配置哈希
+
+        Returns:
+            bool: 记录是否成功
+        """
+        if not result.success or not result.output_path:
+            return False
+
+        try:
+            # 没有指纹的结果（如直接调用）在这里补齐
+            input_fingerprint = result.input_fingerprint or fingerprint_file(result.input_path)
+            output_fingerprint = result.output_fingerprint or fingerprint_file(result.output_path)
+        except OSError as e:
+            print(f"记录任务清单失败: {result.input_path}, 错误: {e}")
+            return False
+
+        row = (
+            result.input_path,
+            *input_fingerprint,
+            config_hash,
+            result.output_path,
+            *output_fingerprint,
+            time.time(),
+        )
+
+        with self._lock:
+            self._pending.append(row)
+            should_flush = len(self._pending) >= FLUSH_EVERY
+        if should_flush:
+            self.flush()
+        return True
+
+    def flush(self):
+        """提交缓存的记录"""
+        with self._lock:
+            if not self._pending:
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries "
+                "(input_path, input_size, input_mtime_ns, content_hash, config_hash, "
+                "output_path, output_size, output_mtime_ns, output_hash, completed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+            self._conn.commit()
+            self._pending = []
+
+    def clear(self):
+        """清空清单，下次运行时全部重新处理"""
+        with self._lock:
+            self._pending = []
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        """提交缓存的记录并关闭数据库连接"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
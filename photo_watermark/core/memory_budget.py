@@ -0,0 +1,139 @@
+"""
+内存预算模块
+
+按图片文件头中的尺寸和模式估算处理一张图片所需的内存，
+并用按字节计数的信号量限制同时处理的图片的内存总量。
+大图和小图可以混合并发，不必手工调整工作线程数
+"""
+
+import io
+import threading
+from typing import Optional, Union
+
+from PIL import Image
+
+
+# 默认处理中的图片内存预算：2 GB
+DEFAULT_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024
+
+# 文件头无法解析时的估算值（按2400万像素RGB计）
+DEFAULT_ESTIMATE = 24_000_000 * 4 * 3
+
+
+def bytes_per_pixel(mode: str) -> int:
+    """
+    Pillow在内存中存储一个像素所用的字节数
+
+    多通道8位模式（RGB、RGBA、CMYK等）按每像素4字节存储
+
+    Args:
+        mode: 图片模式
+
+    Returns:
+        int: 每像素字节数
+    """
+    if mode in ('1', 'L', 'P'):
+        return 1
+    if mode.startswith('I;16'):
+        return 2
+    return 4
+
+
+def estimate_working_set(width: int, height: int, mode: str) -> int:
+    """
+    估算处理一张图片的内存峰值
+
+    包括解码后的原图、用于加水印的副本，以及转换为RGBA或导出时合成
+    白色背景所需的一张4字节/像素的图片
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        mode: 图片模式
+
+    Returns:
+        int: 估算的字节数
+    """
+    pixels = width * height
+    return pixels * (2 * bytes_per_pixel(mode) + 4)
+
+
+def estimate_image_bytes(source: Union[str, bytes]) -> int:
+    """
+    只读取文件头估算处理一张图片的内存峰值
+
+    Args:
+        source: 图片路径或已读入内存的文件内容
+
+    Returns:
+        int: 估算的字节数，文件头无法解析时返回DEFAULT_ESTIMATE
+    """
+    try:
+        fp = io.BytesIO(source) if isinstance(source, bytes) else source
+        with Image.open(fp) as img:
+            return estimate_working_set(img.width, img.height, img.mode)
+    except Exception:
+        return DEFAULT_ESTIMATE
+
+
+class MemoryBudget:
+    """按字节计数的信号量"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BUDGET):
+        """
+        初始化内存预算
+
+        Args:
+            max_bytes: 同时占用的最大字节数
+        """
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._condition = threading.Condition()
+
+    def _fits(self, nbytes: int) -> bool:
+        """预算内放得下；超出整个预算的请求在没有其他占用时也放行，避免永远等待"""
+        return self.used_bytes == 0 or self.used_bytes + nbytes <= self.max_bytes
+
+    def try_acquire(self, nbytes: int) -> bool:
+        """
+        尝试占用预算，不阻塞
+
+        Args:
+            nbytes: 字节数
+
+        Returns:
+            bool: 占用成功返回True
+        """
+        with self._condition:
+            if not self._fits(nbytes):
+                return False
+            self.used_bytes += nbytes
+            return True
+
+    def acquire(self, nbytes: int, timeout: Optional[float] = None) -> bool:
+        """
+        占用预算，预算不足时阻塞直到其他占用释放
+
+        Args:
+            nbytes: 字节数
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            bool: 占用成功返回True，超时返回False
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._fits(nbytes), timeout):
+                return False
+            self.used_bytes += nbytes
+            return True
+
+    def release(self, nbytes: int):
+        """
+        释放预算
+
+        Args:
+            nbytes: 字节数
+        """
+        with self._condition:
+            self.used_bytes = max(0, self.used_bytes - nbytes)
+            self._condition.notify_all()
@@ -0,0 +1,375 @@
+"""
+图片元数据索引模块
+
+在本地SQLite数据库中记录每个图片文件的大小、修改时间、格式、尺寸、
+EXIF方向和内容哈希。文件大小和修改时间未变时直接使用索引中的记录，
+批量处理估算内存占用、按尺寸和格式排序筛选时直接读取索引，
+无需重新打开图片文件
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+
+from PIL import Image
+
+from ..utils.app_config import get_default_config_dir
+from .image_scanner import ImageInfo, sniff_image
+
+
+# EXIF方向标签
+EXIF_ORIENTATION_TAG = 0x0112
+
+# 内容哈希采样的头尾字节数
+HASH_SAMPLE_BYTES = 64 * 1024
+
+# 允许排序的列
+SORTABLE_COLUMNS = ('path', 'file_size', 'mtime_ns', 'format', 'width', 'height')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    format TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    orientation INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_format ON images (format);
+CREATE INDEX IF NOT EXISTS idx_images_content_hash ON images (content_hash);
+"""
+
+
+@dataclass
+class ImageRecord:
+    """索引中的图片记录"""
+    path: str
+    file_size: int
+    mtime_ns: int
+    format: str
+    width: int
+    height: int
+    orientation: int = 1
+    content_hash: str = ''
+
+    @property
+    def size(self) -> tuple:
+        """图片尺寸 (width, height)"""
+        return (self.width, self.height)
+
+
+def compute_content_hash(path: str, file_size: Optional[int] = None, data: Optional[bytes] = None) -> str:
+    """
+    计算文件的内容哈希
+
+    对文件大小和头尾各64KB取哈希，足以区分同名文件的不同版本，
+    又不必读完整个文件
+
+    Args:
+        path: 文件路径
+        file_size: 文件大小，None表示重新获取
+        data: 已读入内存的文件内容，提供时直接对其取哈希，不再读取文件
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    if data is not None:
+        file_size = len(data)
+    elif file_size is None:
+        file_size = os.path.getsize(path)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(file_size).encode('ascii'))
+    if data is not None:
+        digest.update(data[:HASH_SAMPLE_BYTES])
+        if file_size > HASH_SAMPLE_BYTES * 2:
+            digest.update(data[-HASH_SAMPLE_BYTES:])
+        else:
+            digest.update(data[HASH_SAMPLE_BYTES:])
+        return digest.hexdigest()
+
+    with open(path, 'rb') as f:
+        digest.update(f.read(HASH_SAMPLE_BYTES))
+        if file_size > HASH_SAMPLE_BYTES * 2:
+            f.seek(-HASH_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+        else:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def read_orientation(path: str, image_format: str) -> int:
+    """
+    读取EXIF方向（只解析文件头）
+
+    Args:
+        path: 图片路径
+        image_format: 图片格式
+
+    Returns:
+        int: EXIF方向 (1-8)，没有EXIF时为1
+    """
+    if image_format not in ('JPEG', 'TIFF'):
+        return 1
+    try:
+        with Image.open(path) as img:
+            return int(img.getexif().get(EXIF_ORIENTATION_TAG, 1))
+    except Exception:
+        return 1
+
+
+def build_record(path: str, info: Optional[ImageInfo] = None) -> Optional[ImageRecord]:
+    """
+    读取文件生成索引记录
+
+    Args:
+        path: 图片路径
+        info: 扫描时已得到的图片信息，None表示重新识别
+
+    Returns:
+        Optional[ImageRecord]: 索引记录，不是支持的图片时返回None
+    """
+    if info is None:
+        info = sniff_image(path)
+        if info is None:
+            return None
+
+    try:
+        content_hash = compute_content_hash(path, info.file_size)
+    except OSError as e:
+        print(f"计算内容哈希失败: {path}, 错误: {e}")
+        return None
+
+    return ImageRecord(
+        path=path,
+        file_size=info.file_size,
+        mtime_ns=info.mtime_ns,
+        format=info.format,
+        width=info.width,
+        height=info.height,
+        orientation=read_orientation(path, info.format),
+        content_hash=content_hash,
+    )
+
+
+class MetadataIndex:
+    """SQLite图片元数据索引"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None, max_workers: int = 4):
+        """
+        初始化元数据索引
+
+        Args:
+            db_path: 数据库文件路径，None表示应用配置目录下的metadata.db
+            max_workers: 刷新索引时读取文件的线程数
+        """
+        if db_path is None:
+            db_path = get_default_config_dir() / "metadata.db"
+
+        self.db_path = Path(db_path)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 连接在多个线程间共享，所有访问都在锁内进行
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_record(row) -> ImageRecord:
+        """数据库行转换为记录"""
+        return ImageRecord(*row)
+
+    def lookup(self, path: str) -> Optional[ImageRecord]:
+        """
+        读取索引中的记录（不检查文件是否已修改）
+
+        Args:
+            path: 图片路径
+
+        Returns:
+            Optional[ImageRecord]: 记录，未索引时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, file_size, mtime_ns, format, width, height, orientation, content_hash "
+                "FROM images WHERE path = ?",
+                (path,)
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def get(self, path: str) -> Optional[ImageRecord]:
+        """
+        获取最新的记录，文件修改过或尚未索引时重新读取文件
+
+        Args:
+            path: 图片路径
+
+        Returns:
+            Optional[ImageRecord]: 记录，文件不存在或不是支持的图片时返回None
+        """
+        records = self.refresh([path])
+        return records[0] if records else None
+
+    def _is_fresh(self, record: Optional[ImageRecord], stat: os.stat_result) -> bool:
+        """记录与文件当前的大小和修改时间一致"""
+        return (
+            record is not None
+            and record.file_size == stat.st_size
+            and record.mtime_ns == stat.st_mtime_ns
+        )
+
+    def refresh(self, paths: Iterable[Union[str, ImageInfo]]) -> List[ImageRecord]:
+        """
+        增量刷新索引：只重新读取新增或修改过的文件
+
+        Args:
+            paths: 图片路径或扫描得到的ImageInfo
+
+        Returns:
+            List[ImageRecord]: 各文件的最新记录（跳过不存在或不支持的文件）
+        """
+        records = []
+        stale = []
+        for item in paths:
+            info = item if isinstance(item, ImageInfo) else None
+            path = info.path if info else item
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            record = self.lookup(path)
+            if self._is_fresh(record, stat):
+                records.append(record)
+            else:
+                # ImageInfo与文件不一致时丢弃，重新识别
+                if info is not None and (info.file_size, info.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                    info = None
+                stale.append((path, info))
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                built = list(executor.map(lambda item: build_record(*item), stale))
+            new_records = [record for record in built if record is not None]
+            self.put_many(new_records)
+            records.extend(new_records)
+
+        return records
+
+    def put_many(self, records: Sequence[ImageRecord]):
+        """
+        写入或更新记录
+
+        Args:
+            records: 记录列表
+        """
+        if not records:
+            return
+
+        now = time.time()
+        rows = [
+            (r.path, r.file_size, r.mtime_ns, r.format, r.width, r.height, r.orientation, r.content_hash, now)
+            for r in records
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO images "
+                "(path, file_size, mtime_ns, format, width, height, orientation, content_hash, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def remove(self, paths: Iterable[str]):
+        """
+        删除记录
+
+        Args:
+            paths: 图片路径
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM images WHERE path = ?", [(p,) for p in paths])
+            self._conn.commit()
+
+    def prune(self) -> int:
+        """
+        删除文件已不存在的记录
+
+        Returns:
+            int: 删除的记录数
+        """
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM images")]
+        missing = [path for path in paths if not os.path.exists(path)]
+        self.remove(missing)
+        return len(missing)
+
+    def query(
+        self,
+        paths: Optional[Iterable[str]] = None,
+        formats: Optional[Iterable[str]] = None,
+        min_width: int = 0,
+        min_height: int = 0,
+        order_by: str = 'path',
+        descending: bool = False
+    ) -> List[ImageRecord]:
+        """
+        按条件筛选和排序索引中的记录（不访问图片文件，也不检查记录是否过期）
+
+        Args:
+            paths: 只在这些路径中查找，None表示全部
+            formats: 格式筛选，如 ['JPEG', 'PNG']
+            min_width: 最小宽度
+            min_height: 最小高度
+            order_by: 排序列，见SORTABLE_COLUMNS
+            descending: 是否降序
+
+        Returns:
+            List[ImageRecord]: 记录列表
+        """
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"不支持的排序列: {order_by}")
+
+        conditions = ["width >= ?", "height >= ?"]
+        params: list = [min_width, min_height]
+        if formats is not None:
+            formats = list(formats)
+            if not formats:
+                return []
+            conditions.append(f"format IN ({', '.join('?' * len(formats))})")
+            params.extend(formats)
+
+        sql = (
+            "SELECT path, file_size, mtime_ns, format, width, height, orientation, content_hash "
+            f"FROM images WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        records = [self._row_to_record(row) for row in rows]
+
+        if paths is not None:
+            wanted = set(paths)
+            records = [record for record in records if record.path in wanted]
+        return records
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
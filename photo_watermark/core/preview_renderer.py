@@ -0,0 +1,182 @@
+"""
+预览渲染模块
+
+维护当前图片的显示分辨率代理图，预览时只在代理图上合成按比例缩放的水印，
+完整分辨率的处理只在导出时进行。解码过的代理图保存在LRU缓存中，
+并可在后台预取相邻图片的代理图
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Tuple
+
+from PIL import Image
+
+from .image_cache import ImageLRUCache, image_nbytes
+from .image_processor import ImageProcessor
+
+
+def _proxy_nbytes(entry) -> int:
+    """计算 (代理图, 原始尺寸) 缓存项的字节数"""
+    return image_nbytes(entry[0])
+
+
+class PreviewRenderer:
+    """非破坏性预览渲染器"""
+
+    def __init__(self, cache_bytes: int = 256 * 1024 * 1024, prefetch_workers: int = 2):
+        """
+        初始化预览渲染器
+
+        Args:
+            cache_bytes: 代理图缓存的内存预算（字节）
+            prefetch_workers: 后台预取线程数
+        """
+        self.image_path: Optional[str] = None
+        self.display_size: Optional[Tuple[int, int]] = None
+        self.proxy: Optional[Image.Image] = None
+        self.source_size: Optional[Tuple[int, int]] = None
+
+        # (路径, 修改时间, 显示尺寸) -> (代理图, 原始尺寸)
+        self.proxy_cache = ImageLRUCache(max_bytes=cache_bytes, sizeof=_proxy_nbytes)
+        self._prefetch_executor = ThreadPoolExecutor(
+            max_workers=prefetch_workers, thread_name_prefix="preview-prefetch"
+        )
+        self._prefetch_generation = 0
+        self._prefetch_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(image_path: str, display_size: Tuple[int, int]) -> tuple:
+        """生成代理图缓存键，文件修改后自动失效"""
+        return (image_path, os.stat(image_path).st_mtime_ns, tuple(display_size))
+
+    @staticmethod
+    def decode_proxy(image_path: str, display_size: Tuple[int, int]) -> Optional[tuple]:
+        """
+        以显示分辨率解码图片
+
+        Args:
+            image_path: 图片文件路径
+            display_size: 显示区域尺寸 (width, height)
+
+        Returns:
+            Optional[tuple]: (代理图, 原始尺寸)，解码失败返回None
+        """
+        processor = ImageProcessor()
+        if not processor.load_image(image_path, display_size):
+            return None
+        proxy = ImageProcessor.fit_image(processor.original_image, display_size)
+        return proxy, processor.source_size
+
+    def get_proxy(self, image_path: str, display_size: Tuple[int, int]) -> Optional[tuple]:
+        """
+        获取代理图，优先从缓存读取
+
+        Args:
+            image_path: 图片文件路径
+            display_size: 显示区域尺寸 (width, height)
+
+        Returns:
+            Optional[tuple]: (代理图, 原始尺寸)，解码失败返回None
+        """
+        try:
+            key = self._cache_key(image_path, display_size)
+        except OSError as e:
+            print(f"读取图片信息失败: {e}")
+            return None
+        return self.proxy_cache.get_or_create(
+            key, lambda: self.decode_proxy(image_path, display_size)
+        )
+
+    def load(self, image_path: str, display_size: Tuple[int, int]) -> bool:
+        """
+        加载图片并生成显示分辨率代理图，路径和显示尺寸未变时直接复用
+
+        Args:
+            image_path: 图片文件路径
+            display_size: 显示区域尺寸 (width, height)
+
+        Returns:
+            bool: 加载成功返回True
+        """
+        display_size = tuple(display_size)
+        if self.proxy is not None and image_path == self.image_path and display_size == self.display_size:
+            return True
+
+        entry = self.get_proxy(image_path, display_size)
+        if entry is None:
+            return False
+
+        self.proxy, self.source_size = entry
+        self.image_path = image_path
+        self.display_size = display_size
+        return True
+
+    def has_image(self) -> bool:
+        """是否已加载代理图"""
+        return self.proxy is not None
+
+    @property
+    def scale(self) -> float:
+        """代理图相对完整分辨率图片的缩放比例"""
+        if self.proxy is None or not self.source_size:
+            return 1.0
+        return self.proxy.width / self.source_size[0]
+
+    def create_processor(self) -> Optional[ImageProcessor]:
+        """
+        基于代理图创建用于渲染一帧预览的图像处理器
+
+        Returns:
+            Optional[ImageProcessor]: 处理器，其当前图片为代理图的副本；未加载图片时返回None
+        """
+        if self.proxy is None:
+            return None
+
+        processor = ImageProcessor()
+        processor.original_image = self.proxy
+        processor.current_image = self.proxy.copy()
+        processor.source_size = self.source_size
+        return processor
+
+    def prefetch(self, image_paths: Iterable[str], display_size: Tuple[int, int]):
+        """
+        在后台预取图片的代理图，新的预取请求会取消尚未开始的旧请求
+
+        Args:
+            image_paths: 要预取的图片路径，按优先级排序
+            display_size: 显示区域尺寸 (width, height)
+        """
+        with self._prefetch_lock:
+            self._prefetch_generation += 1
+            generation = self._prefetch_generation
+
+        display_size = tuple(display_size)
+        for image_path in image_paths:
+            self._prefetch_executor.submit(self._prefetch_one, generation, image_path, display_size)
+
+    def _prefetch_one(self, generation: int, image_path: str, display_size: Tuple[int, int]):
+        """预取单张图片，请求已过期时跳过"""
+        if generation != self._prefetch_generation:
+            return
+        try:
+            self.get_proxy(image_path, display_size)
+        except Exception as e:
+            print(f"预取图片失败 {image_path}: {e}")
+
+    def clear(self):
+        """清除当前代理图和代理图缓存"""
+        with self._prefetch_lock:
+            self._prefetch_generation += 1
+        self.image_path = None
+        self.display_size = None
+        self.proxy = None
+        self.source_size = None
+        self.proxy_cache.clear()
+
+    def shutdown(self):
+        """停止后台预取"""
+        with self._prefetch_lock:
+            self._prefetch_generation += 1
+        self._prefetch_executor.shutdown(wait=False)
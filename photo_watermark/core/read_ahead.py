@@ -0,0 +1,154 @@
+"""
+预读模块
+
+在解码之前由后台线程把原图文件完整读入内存，读取深度和内存预算可配置，
+解码时直接从内存缓冲区打开，网络存储上的读取延迟与CPU运算重叠。
+同时统计解码端等待读取的次数和时间，用于调整预读深度
+"""
+
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+
+@dataclass
+class ReadAheadStats:
+    """预读统计"""
+    files: int = 0
+    bytes_read: int = 0
+    # 后台线程读取文件的累计耗时（秒）
+    read_time: float = 0.0
+    # 取下一个文件时数据尚未读完的次数，以及累计等待时间（秒）
+    waits: int = 0
+    wait_time: float = 0.0
+
+    @property
+    def wait_ratio(self) -> float:
+        """需要等待读取的文件比例，接近0说明预读深度足够"""
+        return self.waits / self.files if self.files else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"预读 {self.files} 个文件 / {self.bytes_read / (1024 * 1024):.1f} MB，"
+            f"读取耗时 {self.read_time:.2f}s，等待 {self.waits} 次 "
+            f"({self.wait_ratio:.0%}) 共 {self.wait_time:.2f}s"
+        )
+
+
+@dataclass
+class PrefetchedFile:
+    """已读入内存的文件"""
+    path: str
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+    # 读取之前获取的文件状态，与data对应
+    stat: Optional[os.stat_result] = None
+
+    def open(self) -> io.BytesIO:
+        """以内存缓冲区打开文件内容"""
+        return io.BytesIO(self.data)
+
+
+class ReadAheadPrefetcher:
+    """按顺序预读文件"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, depth: int = 16, max_workers: int = 4):
+        """
+        初始化预读器
+
+        Args:
+            max_bytes: 已读入但尚未取走的数据的内存预算（字节），
+                单个文件超过预算时仍会读取，但不再并行预读其他文件
+            depth: 最多提前读取的文件数
+            max_workers: 读取线程数
+        """
+        self.max_bytes = max_bytes
+        self.depth = max(1, depth)
+        self.max_workers = max_workers
+        self.stats = ReadAheadStats()
+
+    @staticmethod
+    def _read(path: str) -> tuple:
+        """读取线程：读入整个文件，返回 (数据, 耗时, 读取前的文件状态)"""
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        return data, time.perf_counter() - start, stat
+
+    def iter_files(self, paths: Iterable[Any]) -> Iterator[PrefetchedFile]:
+        """
+        按输入顺序产出已读入内存的文件，后台保持预读
+
+        Args:
+            paths: 文件路径；其中不是路径的项（如已有结果、无需读取的图片）
+                不读取，按原顺序原样产出
+
+        Yields:
+            PrefetchedFile: 文件内容，读取失败时data为None、error为错误信息
+        """
+        self.stats = ReadAheadStats()
+        path_iter = iter(paths)
+        # (路径, 预计大小, future或错误信息)
+        pending: deque = deque()
+        buffered_bytes = 0
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="read-ahead") as executor:
+            while True:
+                # 在深度和内存预算内提交新的读取
+                while not exhausted and len(pending) < self.depth:
+                    if pending and buffered_bytes >= self.max_bytes:
+                        break
+                    path = next(path_iter, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    if not isinstance(path, (str, os.PathLike)):
+                        pending.append((path, 0, None))
+                        continue
+                    try:
+                        size = os.path.getsize(path)
+                    except OSError as e:
+                        pending.append((path, 0, str(e)))
+                        continue
+                    buffered_bytes += size
+                    pending.append((path, size, executor.submit(self._read, path)))
+
+                if not pending:
+                    break
+
+                path, size, future = pending.popleft()
+                if future is None:
+                    yield path
+                    continue
+                buffered_bytes -= size
+                self.stats.files += 1
+
+                if isinstance(future, str):
+                    yield PrefetchedFile(path=path, error=future)
+                    continue
+
+                if not future.done():
+                    # 解码端追上了预读，记录等待
+                    self.stats.waits += 1
+                    start = time.perf_counter()
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+                    self.stats.wait_time += time.perf_counter() - start
+
+                try:
+                    data, read_time, stat = future.result()
+                except Exception as e:
+                    yield PrefetchedFile(path=path, error=str(e))
+                    continue
+
+                self.stats.read_time += read_time
+                self.stats.bytes_read += len(data)
+                yield PrefetchedFile(path=path, data=data, stat=stat)
@@ -0,0 +1,121 @@
+"""
+图章变换模块
+
+把水印图章按布局角度旋转：直接对紧凑的图章做仿射变换（变换矩阵按
+尺寸和角度缓存），再裁剪到不透明像素的实际包围盒。不需要额外的大画布，
+旋转后的图章也不带多余的透明边。GUI拖动角度时可以先把角度量化，
+相邻的角度共用同一个缓存的图章
+"""
+
+import math
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from PIL import Image
+
+
+# GUI预览时旋转角度的量化步长（度）
+PREVIEW_ROTATION_STEP = 1.0
+
+
+def quantize_rotation(rotation: float, step: Optional[float] = None) -> float:
+    """
+    把旋转角度规范到 [0, 360) 并按步长量化
+
+    Args:
+        rotation: 旋转角度
+        step: 量化步长（度），None表示不量化
+
+    Returns:
+        float: 规范后的角度
+    """
+    if step:
+        rotation = round(rotation / step) * step
+    return rotation % 360
+
+
+def rotated_size(size: Tuple[int, int], rotation: float) -> Tuple[int, int]:
+    """
+    计算矩形旋转后的外接矩形尺寸
+
+    Args:
+        size: 原尺寸 (width, height)
+        rotation: 旋转角度
+
+    Returns:
+        Tuple[int, int]: 外接矩形尺寸 (width, height)
+    """
+    if rotation % 360 == 0:
+        return size
+    width, height = size
+    radians = math.radians(rotation)
+    cos_a, sin_a = abs(math.cos(radians)), abs(math.sin(radians))
+    return (
+        int(math.ceil(width * cos_a + height * sin_a)),
+        int(math.ceil(width * sin_a + height * cos_a)),
+    )
+
+
+@lru_cache(maxsize=256)
+def rotation_transform(width: int, height: int, rotation: float) -> Tuple[Tuple[int, int], tuple]:
+    """
+    计算把 width x height 的图章绕中心逆时针旋转后放入外接矩形所用的仿射变换
+
+    与Image.rotate(expand=True)的几何一致
+
+    Args:
+        width: 图章宽度
+        height: 图章高度
+        rotation: 旋转角度
+
+    Returns:
+        Tuple[Tuple[int, int], tuple]: (输出尺寸, 从输出坐标映射到输入坐标的
+        仿射系数 (a, b, c, d, e, f))
+    """
+    radians = -math.radians(rotation)
+    cos_a = round(math.cos(radians), 15)
+    sin_a = round(math.sin(radians), 15)
+
+    # 输出图像四个角在原图坐标系中的范围
+    corners = [(0, 0), (width, 0), (width, height), (0, height)]
+    center_x, center_y = width / 2.0, height / 2.0
+    xs, ys = [], []
+    for x, y in corners:
+        dx, dy = x - center_x, y - center_y
+        xs.append(cos_a * dx + sin_a * dy)
+        ys.append(-sin_a * dx + cos_a * dy)
+    out_width = int(math.ceil(max(xs)) - math.floor(min(xs)))
+    out_height = int(math.ceil(max(ys)) - math.floor(min(ys)))
+
+    # 输出中心对齐原图中心
+    out_cx, out_cy = out_width / 2.0, out_height / 2.0
+    c = center_x - cos_a * out_cx - sin_a * out_cy
+    f = center_y + sin_a * out_cx - cos_a * out_cy
+    return (out_width, out_height), (cos_a, sin_a, c, -sin_a, cos_a, f)
+
+
+def rotate_stamp(stamp: Image.Image, rotation: float) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    旋转RGBA图章并裁剪到不透明像素的包围盒
+
+    Args:
+        stamp: RGBA图章
+        rotation: 旋转角度（逆时针）
+
+    Returns:
+        Tuple[Image.Image, Tuple[int, int]]: (旋转后的图章, 其左上角相对
+        原图章中心的偏移)；角度为0时返回原图章
+    """
+    rotation = rotation % 360
+    if rotation == 0:
+        return stamp, (-(stamp.width // 2), -(stamp.height // 2))
+
+    size, coefficients = rotation_transform(stamp.width, stamp.height, rotation)
+    rotated = stamp.transform(size, Image.Transform.AFFINE, coefficients, resample=Image.Resampling.BICUBIC)
+
+    bbox = rotated.getchannel('A').getbbox()
+    if bbox is None:
+        bbox = (0, 0) + size
+    elif bbox != (0, 0) + size:
+        rotated = rotated.crop(bbox)
+    return rotated, (bbox[0] - size[0] // 2, bbox[1] - size[1] // 2)
@@ -0,0 +1,80 @@
+"""
+文本度量模块
+
+用渲染水印时实际使用的字体测量文本包围盒（支持多行文本），
+结果按 (文本, 字体族, 字号, 样式) 缓存。布局计算、图章渲染和
+预览叠加层共用同一份度量，首次之后的精确布局几乎没有开销
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from .font_registry import get_font_registry
+
+
+class TextMetrics(NamedTuple):
+    """文本度量结果"""
+    # 包围盒尺寸
+    width: int
+    height: int
+    # 包围盒左上角相对绘制原点的偏移，绘制到图章上时需要抵消
+    offset_x: int
+    offset_y: int
+    # 行数
+    line_count: int
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """包围盒尺寸 (width, height)"""
+        return (self.width, self.height)
+
+
+# 只用于测量的1x1画布
+_measure_draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+
+
+@lru_cache(maxsize=4096)
+def measure_text(
+    text: str,
+    font_family: Optional[str] = None,
+    font_size: int = 36,
+    bold: bool = False,
+    italic: bool = False,
+    font_path: Optional[str] = None
+) -> TextMetrics:
+    """
+    测量文本的包围盒
+
+    字体通过字体注册表解析，与渲染时使用的字体一致；没有TrueType字体时
+    测量的是实际会使用的PIL默认字体。多行文本按渲染时的行距整体测量
+
+    Args:
+        text: 文本内容，可以包含换行
+        font_family: 字体族名称
+        font_size: 字体大小
+        bold: 是否粗体
+        italic: 是否斜体
+        font_path: 显式指定的字体文件路径
+
+    Returns:
+        TextMetrics: 度量结果，空文本的尺寸为0
+    """
+    line_count = text.count('\n') + 1
+    if not text:
+        return TextMetrics(0, 0, 0, 0, line_count)
+
+    font = get_font_registry().get_font(font_family, font_size, bold, italic, font_path=font_path)
+    if '\n' in text:
+        bbox = _measure_draw.multiline_textbbox((0, 0), text, font=font)
+    else:
+        bbox = _measure_draw.textbbox((0, 0), text, font=font)
+
+    return TextMetrics(
+        width=max(0, bbox[2] - bbox[0]),
+        height=max(0, bbox[3] - bbox[1]),
+        offset_x=bbox[0],
+        offset_y=bbox[1],
+        line_count=line_count,
+    )
@@ -0,0 +1,103 @@
+"""
+水印文本模板模块
+
+文本水印中可以使用模板变量，按每张图片的EXIF和文件名填入：
+    {author}      EXIF作者（Artist）
+    {date_taken}  拍摄日期（DateTimeOriginal，没有时用DateTime），格式为YYYY-MM-DD
+    {filename}    文件名（含扩展名）
+例如 "© {author} {date_taken} {filename}"。未知的变量保持原样，
+取不到值的变量替换为空字符串
+"""
+
+import os
+import re
+from typing import Dict, Optional
+
+from PIL import Image
+
+
+# 支持的模板变量
+TEMPLATE_FIELDS = ('author', 'date_taken', 'filename')
+
+_FIELD_PATTERN = re.compile(r'\{(' + '|'.join(TEMPLATE_FIELDS) + r')\}')
+
+# EXIF标签
+EXIF_ARTIST_TAG = 0x013B
+EXIF_DATETIME_TAG = 0x0132
+EXIF_DATETIME_ORIGINAL_TAG = 0x9003
+EXIF_IFD_TAG = 0x8769
+
+
+def has_template_fields(text: str) -> bool:
+    """
+    检查文本中是否包含模板变量
+
+    Args:
+        text: 水印文本
+
+    Returns:
+        bool: 包含模板变量返回True
+    """
+    return bool(_FIELD_PATTERN.search(text))
+
+
+def _format_exif_date(value) -> str:
+    """EXIF日期 'YYYY:MM:DD HH:MM:SS' 转换为 'YYYY-MM-DD'"""
+    value = str(value).strip().strip('\x00')
+    date = value.split(' ')[0]
+    parts = date.split(':')
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        return '-'.join(parts)
+    return date
+
+
+def read_template_values(image_path: Optional[str], exif: Optional[Image.Exif] = None) -> Dict[str, str]:
+    """
+    读取一张图片的模板变量值
+
+    Args:
+        image_path: 图片路径，None表示没有文件名
+        exif: 已解析的EXIF，None表示从文件头读取
+
+    Returns:
+        Dict[str, str]: 变量名 -> 值
+    """
+    values = {field: '' for field in TEMPLATE_FIELDS}
+    if image_path:
+        values['filename'] = os.path.basename(image_path)
+
+    if exif is None and image_path:
+        try:
+            with Image.open(image_path) as img:
+                exif = img.getexif()
+        except Exception:
+            exif = None
+    if not exif:
+        return values
+
+    try:
+        artist = exif.get(EXIF_ARTIST_TAG)
+        if artist:
+            values['author'] = str(artist).strip().strip('\x00')
+
+        date = exif.get_ifd(EXIF_IFD_TAG).get(EXIF_DATETIME_ORIGINAL_TAG) or exif.get(EXIF_DATETIME_TAG)
+        if date:
+            values['date_taken'] = _format_exif_date(date)
+    except Exception as e:
+        print(f"读取EXIF失败: {image_path}, 错误: {e}")
+
+    return values
+
+
+def render_template(text: str, values: Dict[str, str]) -> str:
+    """
+    把模板变量替换为对应的值
+
+    Args:
+        text: 含模板变量的水印文本
+        values: 变量名 -> 值
+
+    Returns:
+        str: 替换后的文本
+    """
+    return _FIELD_PATTERN.sub(lambda match: values.get(match.group(1), ''), text)
@@ -0,0 +1,183 @@
+"""
+缩略图缓存模块
+
+以低分辨率解码生成缩略图，并按 (路径, 修改时间, 文件大小, 缩略图尺寸)
+持久化到磁盘，重新导入同一批图片时直接读取缓存。缓存总大小有上限，
+超出时按访问时间删除最久未使用的缩略图
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from PIL import Image
+
+from ..utils.app_config import get_default_config_dir
+from .image_processor import ImageProcessor
+
+
+# 默认的缓存大小上限：256 MB（64x64缩略图约数万张）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 清理时删除到上限的这一比例，避免每写入一张就清理一次
+PRUNE_TARGET_RATIO = 0.8
+
+class ThumbnailCache:
+    """磁盘缩略图缓存"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        size: Tuple[int, int] = (64, 64),
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        初始化缩略图缓存
+
+        Args:
+            cache_dir: 缓存目录，None表示应用配置目录下的thumbnails
+            size: 缩略图最大尺寸 (width, height)
+            max_bytes: 缓存文件的总大小上限（字节）
+        """
+        if cache_dir is None:
+            cache_dir = get_default_config_dir() / "thumbnails"
+
+        self.cache_dir = Path(cache_dir)
+        self.size = tuple(size)
+        self.max_bytes = max_bytes
+        # 上次清理之后写入的字节数，累计到上限的1/10时再检查一次
+        self._bytes_since_prune = 0
+        self._prune_lock = threading.Lock()
+
+    def cache_path(self, image_path: str) -> Path:
+        """
+        计算图片对应的缓存文件路径，图片修改后路径随之改变
+
+        Args:
+            image_path: 图片文件路径
+
+        Returns:
+            Path: 缓存文件路径
+        """
+        stat = os.stat(image_path)
+        key = "{}|{}|{}|{}x{}".format(
+            os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, *self.size
+        )
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        # 按前两位分目录，避免单个目录下文件过多
+        return self.cache_dir / digest[:2] / f"{digest}.png"
+
+    def generate(self, image_path: str) -> Image.Image:
+        """
+        从原图生成缩略图（不读写缓存）
+
+        Args:
+            image_path: 图片文件路径
+
+        Returns:
+            Image.Image: 缩略图
+        """
+        thumbnail = ImageProcessor.open_image_scaled(image_path, self.size)
+        thumbnail.thumbnail(self.size, Image.Resampling.LANCZOS)
+        return thumbnail
+
+    def get_thumbnail(self, image_path: str) -> Image.Image:
+        """
+        获取缩略图，优先读取磁盘缓存，未命中时生成并写入缓存
+
+        Args:
+            image_path: 图片文件路径
+
+        Returns:
+            Image.Image: 缩略图
+        """
+        cache_path = self.cache_path(image_path)
+
+        if cache_path.exists():
+            try:
+                with Image.open(cache_path) as cached:
+                    cached.load()
+                    thumbnail = cached.copy()
+            except Exception as e:
+                print(f"读取缩略图缓存失败: {cache_path}, 错误: {e}")
+            else:
+                self._touch(cache_path)
+                return thumbnail
+
+        thumbnail = self.generate(image_path)
+        self._save(thumbnail, cache_path)
+        return thumbnail
+
+    @staticmethod
+    def _touch(cache_path: Path):
+        """
+        记录访问时间，清理时最近使用的缩略图最后删除
+        （文件系统挂载为noatime/relatime时不会自动更新访问时间）
+        """
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+
+    def _save(self, thumbnail: Image.Image, cache_path: Path):
+        """写入缓存文件，先写临时文件再替换，避免并发读到不完整的文件"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+            thumbnail.save(tmp_path, format='PNG')
+            written = os.path.getsize(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"保存缩略图缓存失败: {cache_path}, 错误: {e}")
+            return
+
+        with self._prune_lock:
+            self._bytes_since_prune += written
+            should_prune = self._bytes_since_prune >= self.max_bytes // 10
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        缓存超过大小上限时，按访问时间从旧到新删除缩略图，
+        直到总大小降到上限的PRUNE_TARGET_RATIO以下
+
+        Returns:
+            int: 删除的文件数
+        """
+        with self._prune_lock:
+            self._bytes_since_prune = 0
+
+        entries = []
+        total = 0
+        try:
+            for subdir in os.scandir(self.cache_dir):
+                if not subdir.is_dir():
+                    continue
+                for entry in os.scandir(subdir.path):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return 0
+
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * PRUNE_TARGET_RATIO
+        removed = 0
+        for _, file_size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= file_size
+            removed += 1
+        return removed
@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from typing import Tuple, Optional
 from enum import Enum
 
+from .text_metrics import measure_text
+
 
 class WatermarkType(Enum):
     """水印类型枚举"""
@@ -32,6 +34,7 @@ class WatermarkPosition(Enum):
 @dataclass
 class TextWatermark:
     """文本水印配置类"""
+    # 可以包含模板变量 {author}、{date_taken}、{filename}，见text_template
     text: str = "Sample Watermark"
     font_family: str = "Arial"
     font_size: int = 36
@@ -136,25 +139,23 @@ class WatermarkCalculator:
     def get_text_size(
         text: str,
         font_size: int,
-        font_family: str = "Arial"
+        font_family: str = "Arial",
+        bold: bool = False,
+        italic: bool = False
     ) -> Tuple[int, int]:
         """
-        估算文本尺寸
+        计算文本尺寸
+
+        用渲染时实际使用的字体测量（支持多行文本），结果有缓存
 
         Args:
             text: 文本内容
             font_size: 字体大小
             font_family: 字体族
+            bold: 是否粗体
+            italic: 是否斜体
 
         Returns:
-            Tuple[int, int]: 估算的文本尺寸 (width, height)
+            Tuple[int, int]: 文本尺寸 (width, height)
         """
-        # 简单估算，实际应用中可能需要更精确的计算
-        char_width = font_size * 0.6  # 平均字符宽度
-        line_height = font_size * 1.2  # 行高
-
-        lines = text.split('\n')
-        max_width = max(len(line) for line in lines) * char_width
-        total_height = len(lines) * line_height
-
-        return (int(max_width), int(total_height))
\ No newline at end of file
+        return measure_text(text, font_family, font_size, bold, italic).size
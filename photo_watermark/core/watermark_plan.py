@@ -0,0 +1,274 @@
+"""
+水印执行计划模块
+
+WatermarkPlan由水印规格编译一次：解析字体、预渲染（并旋转）图章、
+求出图章在完整分辨率下的实际尺寸。旋转在编译时对紧凑的图章做一次
+仿射变换并裁剪到实际包围盒，旋转水印每张图片的开销与不旋转时相同。
+之后每张图片只需计算位置并在水印覆盖的区域内混合。批量处理、
+单张导出和预览都执行同一个计划，三处的水印效果（包括旋转）保持一致。
+
+文本含模板变量（见text_template）时，每张图片的文本不同，
+图章由字形图集中缓存的字形拼接而成，不重新栅格化整段文本
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from .asset_cache import get_asset_cache
+from .glyph_atlas import get_glyph_atlas
+from .image_cache import get_stamp_cache
+from .image_processor import ImageProcessor
+from .stamp_transform import quantize_rotation, rotate_stamp
+from .text_template import has_template_fields, read_template_values, render_template
+from .watermark import WatermarkCalculator, WatermarkLayout
+from .watermark_spec import WatermarkSpec
+
+
+class WatermarkPlan:
+    """编译后的水印"""
+
+    def __init__(
+        self,
+        spec: WatermarkSpec,
+        layout: Optional[WatermarkLayout] = None,
+        scale: float = 1.0,
+        rotation_step: Optional[float] = None
+    ):
+        """
+        编译水印
+
+        Args:
+            spec: 水印规格
+            layout: 布局配置，None表示使用规格中的布局；传入时位置和旋转角度
+                都以它为准
+            scale: 目标图片相对完整分辨率的缩放比例（预览代理图小于1）
+            rotation_step: 旋转角度的量化步长，None表示使用精确角度
+        """
+        if layout is not None:
+            spec = spec.with_layout(layout)
+        self.spec = spec
+        self.layout = spec.layout
+        self.scale = scale
+        # 实际使用的旋转角度，GUI拖动时量化后相邻角度共用缓存的图章
+        self.rotation = quantize_rotation(spec.rotation, rotation_step)
+        # 按scale渲染的RGBA图章，文本为空时为None
+        self.layer: Optional[Image.Image] = None
+        # 图章在完整分辨率下的实际尺寸（旋转后裁剪到不透明像素），用于计算位置
+        self.true_size: Tuple[int, int] = (0, 0)
+        # 编译失败的原因，如水印图片不存在
+        self.error: Optional[str] = None
+        # 文本含模板变量时每张图片单独拼接图章
+        self.is_template = spec.is_text and has_template_fields(spec.text)
+        self.font_size = max(1, round(spec.font_size * scale))
+
+        try:
+            if spec.is_text:
+                self._compile_text()
+            elif spec.is_image:
+                self._compile_image()
+        except Exception as e:
+            print(f"编译水印失败: {e}")
+            self.error = str(e)
+            self.layer = None
+
+    @property
+    def ok(self) -> bool:
+        """编译是否成功"""
+        return self.error is None
+
+    def _compile_text(self):
+        """预渲染文本图章"""
+        spec = self.spec
+        if not spec.text or self.is_template:
+            return
+
+        font_size = self.font_size
+        key = (
+            spec.text, None, spec.font_family, spec.font_bold, spec.font_italic,
+            font_size, spec.color, spec.opacity, 0.0
+        )
+        stamp = get_stamp_cache().get_or_create(
+            key,
+            lambda: ImageProcessor.render_text_stamp(
+                spec.text, None, font_size, spec.color, spec.opacity, 0.0,
+                spec.font_family, spec.font_bold, spec.font_italic
+            )
+        )
+        if stamp is None:
+            return
+
+        layer = stamp[0]
+        if self.rotation != 0:
+            # 旋转后的图章同样放入进程级缓存，批量处理的各线程共用
+            layer = get_stamp_cache().get_or_create(
+                key + ('rotated', self.rotation),
+                lambda: rotate_stamp(stamp[0], self.rotation)
+            )[0]
+        self.layer = layer
+        self.true_size = self._true_size(layer)
+
+    def _compile_image(self):
+        """
+        准备图片水印图章
+
+        图片水印与文本水印一样按布局中的角度旋转（早期版本只旋转文本水印）
+        """
+        spec = self.spec
+        watermark_path = spec.image_path
+        if not watermark_path or not os.path.exists(watermark_path):
+            self.error = f"水印图片不存在: {watermark_path}"
+            return
+
+        asset_cache = get_asset_cache()
+        base_size = spec.image_size or asset_cache.get_size(watermark_path)
+
+        size = spec.image_size
+        if self.scale != 1.0:
+            size = (max(1, round(base_size[0] * self.scale)), max(1, round(base_size[1] * self.scale)))
+
+        layer = asset_cache.get_variant(watermark_path, size, spec.opacity)
+        if self.rotation == 0:
+            self.layer = layer
+            self.true_size = base_size
+        else:
+            self.layer = rotate_stamp(layer, self.rotation)[0]
+            self.true_size = self._true_size(self.layer)
+
+    def _true_size(self, layer: Image.Image) -> Tuple[int, int]:
+        """按scale渲染的图章换算到完整分辨率下的尺寸"""
+        if self.scale == 1.0:
+            return layer.size
+        return (round(layer.width / self.scale), round(layer.height / self.scale))
+
+    def position(self, image_size: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        计算图章在完整分辨率图片中的左上角坐标
+
+        Args:
+            image_size: 完整分辨率图片尺寸 (width, height)
+
+        Returns:
+            Tuple[int, int]: 坐标 (x, y)
+        """
+        return WatermarkCalculator.calculate_position(image_size, self.true_size, self.layout)
+
+    def render_template_stamp(
+        self,
+        processor: ImageProcessor,
+        image_path: Optional[str] = None
+    ) -> Tuple[Optional[Image.Image], Tuple[int, int]]:
+        """
+        为一张图片填入模板变量并拼接文本图章
+
+        Args:
+            processor: 已加载图片的处理器，其中的EXIF用于填充变量
+            image_path: 图片路径，用于文件名，处理器中没有EXIF时从文件头读取
+
+        Returns:
+            Tuple[Optional[Image.Image], Tuple[int, int]]: (图章, 完整分辨率下的
+            实际尺寸)，没有可见文字时图章为None
+        """
+        spec = self.spec
+        values = read_template_values(image_path, processor.exif)
+        text = render_template(spec.text, values)
+
+        stamp = get_glyph_atlas().render(
+            text, spec.font_family, self.font_size, spec.font_bold, spec.font_italic,
+            spec.color, spec.opacity
+        )
+        if stamp is None:
+            return None, (0, 0)
+
+        layer = rotate_stamp(stamp[0], self.rotation)[0]
+        return layer, self._true_size(layer)
+
+    def apply(
+        self,
+        processor: ImageProcessor,
+        source_size: Optional[Tuple[int, int]] = None,
+        image_path: Optional[str] = None
+    ) -> bool:
+        """
+        把水印混合到处理器中的图片上
+
+        Args:
+            processor: 图像处理器
+            source_size: 处理器中图片对应的完整分辨率尺寸，None表示处理器中的图片尺寸
+            image_path: 图片路径，填充文本模板变量时使用
+
+        Returns:
+            bool: 成功返回True（文本为空时不绘制，也返回True）
+        """
+        if not self.ok or processor.current_image is None:
+            return False
+
+        if self.is_template:
+            layer, true_size = self.render_template_stamp(processor, image_path)
+        else:
+            layer, true_size = self.layer, self.true_size
+        if layer is None:
+            return True
+
+        image_size = source_size or processor.get_image_size()
+        x, y = WatermarkCalculator.calculate_position(image_size, true_size, self.layout)
+        if self.scale != 1.0:
+            x, y = int(x * self.scale), int(y * self.scale)
+
+        processor.composite_layer(layer, (x, y))
+        return True
+
+
+# 最近编译的计划，GUI反复预览同一设置时直接复用
+_plan_cache: "OrderedDict[tuple, WatermarkPlan]" = OrderedDict()
+_plan_cache_lock = threading.Lock()
+_PLAN_CACHE_SIZE = 16
+
+
+def get_plan(
+    spec: WatermarkSpec,
+    layout: Optional[WatermarkLayout] = None,
+    scale: float = 1.0,
+    rotation_step: Optional[float] = None
+) -> WatermarkPlan:
+    """
+    获取编译好的水印计划，相同参数只编译一次
+
+    Args:
+        spec: 水印规格
+        layout: 布局配置，None表示使用规格中的布局；传入时位置和旋转角度都以它为准
+        scale: 目标图片相对完整分辨率的缩放比例
+        rotation_step: 旋转角度的量化步长，None表示使用精确角度
+
+    Returns:
+        WatermarkPlan: 水印计划
+    """
+    mtime = None
+    if spec.is_image:
+        # 水印图片被替换后重新编译
+        try:
+            mtime = os.stat(spec.image_path).st_mtime_ns
+        except OSError:
+            pass
+    if layout is not None:
+        spec = spec.with_layout(layout)
+    if rotation_step:
+        # 只有角度不同且量化后相同的规格共用一个计划
+        spec = spec.replace(rotation=quantize_rotation(spec.rotation, rotation_step))
+    key = (spec, scale, mtime)
+
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = WatermarkPlan(spec, scale=scale, rotation_step=rotation_step)
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > _PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
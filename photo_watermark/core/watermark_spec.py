@@ -0,0 +1,470 @@
+"""
+水印规格模块
+
+WatermarkSpec是一次水印设置的不可变快照：文本或图片水印的全部属性、
+布局和导出质量。创建时统一完成默认值填充和类型校验，之后各模块直接读取属性，
+不必再用 .get() 解析配置字典。规格可以哈希，digest是跨进程稳定的内容哈希，
+适合作为水印图章、输出和预览等缓存的键；支持JSON和紧凑二进制两种序列化格式
+"""
+
+import hashlib
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .watermark import (
+    ImageWatermark,
+    TextWatermark,
+    WatermarkLayout,
+    WatermarkPosition,
+    WatermarkType,
+)
+
+
+# 二进制格式版本
+BINARY_VERSION = 2
+
+# (字段名, 编码类型, 默认值)，顺序即二进制编码顺序
+_FIELDS = (
+    ('type', 'enum', WatermarkType.TEXT),
+    # 文本水印
+    ('text', 'str', "Sample Watermark"),
+    ('font_family', 'str', "Arial"),
+    ('font_size', 'int', 36),
+    ('font_bold', 'bool', False),
+    ('font_italic', 'bool', False),
+    ('color', 'color', (255, 255, 255)),
+    ('text_opacity', 'int', 128),
+    ('shadow', 'bool', False),
+    ('shadow_color', 'color', (0, 0, 0)),
+    ('stroke', 'bool', False),
+    ('stroke_color', 'color', (0, 0, 0)),
+    ('stroke_width', 'int', 1),
+    # 图片水印
+    ('image_path', 'str', ""),
+    ('image_width', 'optint', None),
+    ('image_height', 'optint', None),
+    ('keep_aspect_ratio', 'bool', True),
+    ('image_opacity', 'int', 128),
+    # 布局
+    ('position', 'enum', WatermarkPosition.BOTTOM_RIGHT),
+    ('x_offset', 'int', 50),
+    ('y_offset', 'int', 50),
+    ('rotation', 'float', 0.0),
+    ('margin', 'int', 20),
+    # 导出
+    ('quality', 'int', 95),
+)
+
+FIELD_NAMES = tuple(name for name, _, _ in _FIELDS)
+
+_ENUM_TYPES = {'type': WatermarkType, 'position': WatermarkPosition}
+
+# 取值范围为0-255的字段
+_OPACITY_FIELDS = ('text_opacity', 'image_opacity')
+
+
+def _to_color(value) -> Tuple[int, int, int]:
+    """颜色规范为3个0-255整数的元组"""
+    r, g, b = tuple(value)[:3]
+    return tuple(max(0, min(255, int(c))) for c in (r, g, b))
+
+
+def _to_optint(value) -> Optional[int]:
+    """可选尺寸：None或非正数表示未指定"""
+    if value is None:
+        return None
+    value = int(value)
+    return value if value > 0 else None
+
+
+def _normalize(name: str, kind: str, value):
+    """按字段类型校验并规范化一个值"""
+    if kind == 'enum':
+        enum_type = _ENUM_TYPES[name]
+        return value if isinstance(value, enum_type) else enum_type(value)
+    if kind == 'str':
+        return str(value)
+    if kind == 'int':
+        return int(value)
+    if kind == 'bool':
+        return bool(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'color':
+        return _to_color(value)
+    if kind == 'optint':
+        return _to_optint(value)
+    raise ValueError(f"未知的字段类型: {kind}")
+
+
+class WatermarkSpec:
+    """不可变的水印规格"""
+
+    __slots__ = FIELD_NAMES + ('_key', '_digest')
+
+    def __init__(self, **fields):
+        """
+        创建水印规格
+
+        Args:
+            **fields: 字段值，未指定的字段使用默认值，字段见FIELD_NAMES
+
+        Raises:
+            TypeError: 存在未知字段
+            ValueError: 字段值无法转换为对应类型
+        """
+        unknown = set(fields) - set(FIELD_NAMES)
+        if unknown:
+            raise TypeError(f"未知的水印规格字段: {', '.join(sorted(unknown))}")
+
+        values = []
+        for name, kind, default in _FIELDS:
+            value = _normalize(name, kind, fields.get(name, default))
+            if name in _OPACITY_FIELDS:
+                value = max(0, min(255, value))
+            object.__setattr__(self, name, value)
+            values.append(value)
+
+        object.__setattr__(self, '_key', tuple(values))
+        object.__setattr__(self, '_digest', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WatermarkSpec是不可变的，请使用replace()创建修改后的副本")
+
+    def __delattr__(self, name):
+        raise AttributeError("WatermarkSpec是不可变的")
+
+    def replace(self, **changes) -> "WatermarkSpec":
+        """
+        创建修改了部分字段的副本
+
+        Args:
+            **changes: 要修改的字段
+
+        Returns:
+            WatermarkSpec: 新的规格
+        """
+        fields = {name: getattr(self, name) for name in FIELD_NAMES}
+        fields.update(changes)
+        return WatermarkSpec(**fields)
+
+    # 哈希和比较
+
+    @property
+    def digest(self) -> str:
+        """跨进程稳定的内容哈希（十六进制），首次访问时计算"""
+        if self._digest is None:
+            digest = hashlib.blake2b(self.to_bytes(), digest_size=16).hexdigest()
+            object.__setattr__(self, '_digest', digest)
+        return self._digest
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, WatermarkSpec):
+            return NotImplemented
+        return self._key == other._key
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in FIELD_NAMES)
+        return f"WatermarkSpec({fields})"
+
+    def __reduce__(self):
+        # 进程池传参时按二进制格式序列化
+        return (WatermarkSpec.from_bytes, (self.to_bytes(),))
+
+    # 常用派生值
+
+    @property
+    def is_text(self) -> bool:
+        """是否为文本水印"""
+        return self.type == WatermarkType.TEXT
+
+    @property
+    def is_image(self) -> bool:
+        """是否为图片水印"""
+        return self.type == WatermarkType.IMAGE
+
+    @property
+    def opacity(self) -> int:
+        """当前水印类型的透明度 (0-255)"""
+        return self.image_opacity if self.is_image else self.text_opacity
+
+    @property
+    def image_size(self) -> Optional[Tuple[int, int]]:
+        """指定的图片水印尺寸，未同时指定宽高时为None"""
+        if self.image_width and self.image_height:
+            return (self.image_width, self.image_height)
+        return None
+
+    @property
+    def layout(self) -> WatermarkLayout:
+        """布局配置（每次返回新的对象）"""
+        return WatermarkLayout(
+            position=self.position,
+            x_offset=self.x_offset,
+            y_offset=self.y_offset,
+            rotation=self.rotation,
+            margin=self.margin,
+        )
+
+    def with_layout(self, layout: WatermarkLayout) -> "WatermarkSpec":
+        """
+        创建布局字段（位置、偏移、旋转、边距）取自layout的副本
+
+        Args:
+            layout: 布局配置
+
+        Returns:
+            WatermarkSpec: 新的规格
+        """
+        return self.replace(
+            position=layout.position,
+            x_offset=layout.x_offset,
+            y_offset=layout.y_offset,
+            rotation=layout.rotation,
+            margin=layout.margin,
+        )
+
+    # 与其他表示之间的转换
+
+    @classmethod
+    def from_models(
+        cls,
+        watermark_type: WatermarkType,
+        text_watermark: TextWatermark,
+        image_watermark: ImageWatermark,
+        layout: WatermarkLayout,
+        quality: int = 95
+    ) -> "WatermarkSpec":
+        """
+        由界面使用的可变配置对象创建规格
+
+        Args:
+            watermark_type: 水印类型
+            text_watermark: 文本水印配置
+            image_watermark: 图片水印配置
+            layout: 布局配置
+            quality: 导出质量
+
+        Returns:
+            WatermarkSpec: 水印规格
+        """
+        return cls(
+            type=watermark_type,
+            text=text_watermark.text,
+            font_family=text_watermark.font_family,
+            font_size=text_watermark.font_size,
+            font_bold=text_watermark.font_bold,
+            font_italic=text_watermark.font_italic,
+            color=text_watermark.color,
+            text_opacity=text_watermark.opacity,
+            shadow=text_watermark.shadow,
+            shadow_color=text_watermark.shadow_color,
+            stroke=text_watermark.stroke,
+            stroke_color=text_watermark.stroke_color,
+            stroke_width=text_watermark.stroke_width,
+            image_path=image_watermark.image_path,
+            image_width=image_watermark.width,
+            image_height=image_watermark.height,
+            keep_aspect_ratio=image_watermark.keep_aspect_ratio,
+            image_opacity=image_watermark.opacity,
+            position=layout.position,
+            x_offset=layout.x_offset,
+            y_offset=layout.y_offset,
+            rotation=layout.rotation,
+            margin=layout.margin,
+            quality=quality,
+        )
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "WatermarkSpec":
+        """
+        由水印配置字典创建规格
+
+        配置字典即模板和设置文件中保存的格式：
+        {'type', 'text_config', 'image_config', 'layout', 'quality'}，
+        枚举可以是枚举对象或其字符串值
+
+        Args:
+            config: 水印配置字典
+
+        Returns:
+            WatermarkSpec: 水印规格
+        """
+        text_config = config.get('text_config') or {}
+        image_config = config.get('image_config') or {}
+        layout_config = config.get('layout') or {}
+
+        fields = {}
+        if 'type' in config:
+            fields['type'] = config['type']
+
+        for name in ('text', 'font_family', 'font_size', 'font_bold', 'font_italic', 'color',
+                     'shadow', 'shadow_color', 'stroke', 'stroke_color', 'stroke_width'):
+            if name in text_config:
+                fields[name] = text_config[name]
+
+        if 'image_path' in image_config:
+            fields['image_path'] = image_config['image_path']
+        size = image_config.get('size')
+        if size:
+            fields['image_width'], fields['image_height'] = size
+        else:
+            fields['image_width'] = image_config.get('width')
+            fields['image_height'] = image_config.get('height')
+        if 'keep_aspect_ratio' in image_config:
+            fields['keep_aspect_ratio'] = image_config['keep_aspect_ratio']
+
+        if 'opacity' in text_config:
+            fields['text_opacity'] = text_config['opacity']
+        if 'opacity' in image_config:
+            fields['image_opacity'] = image_config['opacity']
+
+        for name in ('position', 'x_offset', 'y_offset', 'rotation', 'margin'):
+            if name in layout_config:
+                fields[name] = layout_config[name]
+
+        if 'quality' in config:
+            fields['quality'] = config['quality']
+
+        return cls(**fields)
+
+    @classmethod
+    def coerce(cls, value: Union["WatermarkSpec", Dict[str, Any]]) -> "WatermarkSpec":
+        """
+        把规格或配置字典统一为规格
+
+        Args:
+            value: 水印规格或配置字典
+
+        Returns:
+            WatermarkSpec: 水印规格
+        """
+        if isinstance(value, WatermarkSpec):
+            return value
+        return cls.from_config(value)
+
+    def to_config(self) -> Dict[str, Any]:
+        """
+        转换为可直接写入JSON的配置字典（模板和设置文件格式），
+        文本和图片水印的属性都会保留
+
+        Returns:
+            Dict[str, Any]: 水印配置字典
+        """
+        return {
+            'type': self.type.value,
+            'text_config': {
+                'text': self.text,
+                'font_family': self.font_family,
+                'font_size': self.font_size,
+                'font_bold': self.font_bold,
+                'font_italic': self.font_italic,
+                'color': list(self.color),
+                'opacity': self.text_opacity,
+                'shadow': self.shadow,
+                'shadow_color': list(self.shadow_color),
+                'stroke': self.stroke,
+                'stroke_color': list(self.stroke_color),
+                'stroke_width': self.stroke_width,
+            },
+            'image_config': {
+                'image_path': self.image_path,
+                'width': self.image_width,
+                'height': self.image_height,
+                'opacity': self.image_opacity,
+                'keep_aspect_ratio': self.keep_aspect_ratio,
+            },
+            'layout': {
+                'position': self.position.value,
+                'x_offset': self.x_offset,
+                'y_offset': self.y_offset,
+                'rotation': self.rotation,
+                'margin': self.margin,
+            },
+            'quality': self.quality,
+        }
+
+    def to_json(self) -> str:
+        """序列化为JSON字符串"""
+        return json.dumps(self.to_config(), ensure_ascii=False, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text: str) -> "WatermarkSpec":
+        """从JSON字符串还原规格"""
+        return cls.from_config(json.loads(text))
+
+    def to_bytes(self) -> bytes:
+        """
+        序列化为紧凑的二进制格式
+
+        格式为1字节版本号，之后按_FIELDS顺序依次编码各字段（小端）：
+        字符串和枚举为4字节长度加UTF-8内容，整数4字节，布尔1字节，
+        浮点8字节，颜色3字节，可选整数为1字节标志加4字节整数
+
+        Returns:
+            bytes: 二进制数据
+        """
+        parts = [struct.pack('<B', BINARY_VERSION)]
+        for name, kind, _ in _FIELDS:
+            value = getattr(self, name)
+            if kind in ('str', 'enum'):
+                encoded = (value.value if kind == 'enum' else value).encode('utf-8')
+                parts.append(struct.pack('<I', len(encoded)))
+                parts.append(encoded)
+            elif kind == 'int':
+                parts.append(struct.pack('<i', value))
+            elif kind == 'bool':
+                parts.append(struct.pack('<?', value))
+            elif kind == 'float':
+                parts.append(struct.pack('<d', value))
+            elif kind == 'color':
+                parts.append(struct.pack('<3B', *value))
+            elif kind == 'optint':
+                parts.append(struct.pack('<?i', value is not None, value or 0))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WatermarkSpec":
+        """
+        从二进制格式还原规格
+
+        Args:
+            data: to_bytes() 生成的数据
+
+        Returns:
+            WatermarkSpec: 水印规格
+
+        Raises:
+            ValueError: 数据版本不支持或格式错误
+        """
+        try:
+            version, = struct.unpack_from('<B', data, 0)
+            if version != BINARY_VERSION:
+                raise ValueError(f"不支持的水印规格版本: {version}")
+            offset = 1
+            fields = {}
+            for name, kind, _ in _FIELDS:
+                if kind in ('str', 'enum'):
+                    length, = struct.unpack_from('<I', data, offset)
+                    offset += 4
+                    value = bytes(data[offset:offset + length]).decode('utf-8')
+                    offset += length
+                elif kind == 'color':
+                    value = struct.unpack_from('<3B', data, offset)
+                    offset += 3
+                elif kind == 'optint':
+                    present, number = struct.unpack_from('<?i', data, offset)
+                    offset += struct.calcsize('<?i')
+                    value = number if present else None
+                else:
+                    fmt = {'int': '<i', 'bool': '<?', 'float': '<d'}[kind]
+                    value, = struct.unpack_from(fmt, data, offset)
+                    offset += struct.calcsize(fmt)
+                fields[name] = value
+        except struct.error as e:
+            raise ValueError(f"水印规格数据格式错误: {e}")
+        return cls(**fields)
@@ -164,6 +164,30 @@ class ExportSettingsPanel:
             }
         }
 
+    def get_naming_rule(self) -> dict:
+        """
+        获取批量处理使用的命名规则，与generate_filename生成的文件名一致
+
+        Returns:
+            dict: 命名规则配置
+        """
+        naming_rule = {
+            'keep_original_name': self.keep_original_name.get(),
+            'add_prefix': self.add_prefix.get(),
+            'prefix': self.prefix_text.get(),
+            'add_suffix': self.add_suffix.get(),
+            'suffix': self.suffix_text.get()
+        }
+        format_map = {
+            "PNG": ".png",
+            "JPEG": ".jpg",
+            "BMP": ".bmp",
+            "TIFF": ".tiff"
+        }
+        if self.output_format.get() in format_map:
+            naming_rule['format'] = format_map[self.output_format.get()]
+        return naming_rule
+
     def generate_filename(self, original_path: str, target_format: str = None) -> str:
         """
         根据设置生成新文件名
@@ -0,0 +1,155 @@
+"""
+批量导出模块
+
+在后台线程中通过BatchProcessor.iter_process批量导出图片，处理结果经队列
+在主线程中分批回调。内存预算、有界提交窗口、预读和任务清单都在后台生效，
+导出期间界面保持响应
+"""
+
+import queue
+import threading
+import tkinter as tk
+from typing import Callable, Dict, List, Optional
+
+from photo_watermark.core.batch_processor import BatchProcessor, BatchResult
+from photo_watermark.core.job_manifest import JobManifest
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+# 队列结束标记
+_DONE = object()
+
+
+class ExportWorker:
+    """后台批量导出器"""
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        batch_processor: BatchProcessor,
+        on_progress: Callable[[int, int, BatchResult], None],
+        on_finished: Callable[[int, int, int], None],
+        poll_ms: int = 100,
+        results_per_poll: int = 64
+    ):
+        """
+        初始化导出器
+
+        Args:
+            root: Tk根窗口，用于after调度
+            batch_processor: 执行导出的批量处理器
+            on_progress: 在主线程中调用，参数为 (已完成数, 总数, 本张图片的结果)
+            on_finished: 在主线程中调用，参数为 (成功数, 失败数, 跳过数)
+            poll_ms: 检查处理结果的间隔（毫秒）
+            results_per_poll: 每次检查最多处理的结果数，避免长时间阻塞界面
+        """
+        self.root = root
+        self.batch_processor = batch_processor
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.poll_ms = poll_ms
+        self.results_per_poll = results_per_poll
+
+        self._results: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._total = 0
+        self._counts = [0, 0, 0]
+
+    def is_running(self) -> bool:
+        """是否有尚未完成的导出"""
+        return self._thread is not None
+
+    def start(
+        self,
+        image_paths: List[str],
+        output_dir: str,
+        spec: WatermarkSpec,
+        naming_rule: Dict,
+        manifest: Optional[JobManifest] = None
+    ) -> bool:
+        """
+        开始导出
+
+        Args:
+            image_paths: 图片路径（主线程中取得的快照）
+            output_dir: 输出目录
+            spec: 水印规格
+            naming_rule: 命名规则配置
+            manifest: 任务清单，输出已是最新的图片直接跳过；导出结束后关闭
+
+        Returns:
+            bool: 已有导出在进行或导出器已关闭时返回False
+        """
+        if self._closed or self._thread is not None:
+            return False
+
+        self._total = len(image_paths)
+        self._counts = [0, 0, 0]
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(image_paths, output_dir, spec, naming_rule, manifest),
+            name="batch-export",
+            daemon=True
+        )
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+        return True
+
+    def _run(
+        self,
+        image_paths: List[str],
+        output_dir: str,
+        spec: WatermarkSpec,
+        naming_rule: Dict,
+        manifest: Optional[JobManifest]
+    ):
+        """工作线程：逐张导出并把结果放入队列"""
+        try:
+            for result in self.batch_processor.iter_process(
+                image_paths, output_dir, spec, spec.layout, naming_rule, manifest=manifest
+            ):
+                self._results.put(result)
+        except Exception as e:
+            print(f"批量导出出错: {e}")
+        finally:
+            if manifest is not None:
+                manifest.close()
+            self._results.put(_DONE)
+
+    def _poll(self):
+        """主线程：分批处理导出结果"""
+        if self._closed:
+            return
+
+        for _ in range(self.results_per_poll):
+            try:
+                item = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is _DONE:
+                self._thread = None
+                succeeded, failed, skipped = self._counts
+                self.on_finished(succeeded, failed, skipped)
+                return
+
+            if item.skipped:
+                self._counts[2] += 1
+            elif item.success:
+                self._counts[0] += 1
+            else:
+                self._counts[1] += 1
+            self.on_progress(sum(self._counts), self._total, item)
+
+        self.root.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        """取消正在进行的导出，已在处理中的图片处理完后停止"""
+        if self._thread is not None:
+            self.batch_processor.cancel_processing()
+
+    def shutdown(self):
+        """取消导出，之后的请求将被忽略"""
+        self.cancel()
+        self._closed = True
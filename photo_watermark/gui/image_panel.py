@@ -7,14 +7,28 @@
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
-from typing import List, Callable, Optional
+from typing import Callable, Optional
 import os
 
+from photo_watermark.core.image_cache import ImageLRUCache
+from photo_watermark.core.image_library import ImageLibrary
+from photo_watermark.core.image_processor import ImageProcessor
+from photo_watermark.core.text_metrics import measure_text
+from photo_watermark.core.stamp_transform import rotated_size
+from photo_watermark.core.watermark_spec import WatermarkSpec
+from photo_watermark.gui.thumbnail_loader import ThumbnailLoader
+
 
 class ImagePanel:
     """图片面板类"""
 
-    def __init__(self, parent: tk.Widget, on_image_selected: Callable[[str, int], None], on_watermark_position_changed: Callable[[int, int], None] = None):
+    def __init__(
+        self,
+        parent: tk.Widget,
+        on_image_selected: Callable[[str, int], None],
+        on_watermark_position_changed: Callable[[int, int], None] = None,
+        library: Optional[ImageLibrary] = None
+    ):
         """
         初始化图片面板
 
@@ -22,11 +36,12 @@ class ImagePanel:
             parent: 父组件
             on_image_selected: 图片选择回调函数
             on_watermark_position_changed: 水印位置改变回调函数
+            library: 要显示的图片库，None表示新建
         """
         self.parent = parent
         self.on_image_selected = on_image_selected
         self.on_watermark_position_changed = on_watermark_position_changed
-        self.image_list: List[str] = []
+        self.library = library if library is not None else ImageLibrary()
         self.current_preview_image: Optional[ImageTk.PhotoImage] = None
 
         # 水印拖拽相关
@@ -41,9 +56,21 @@ class ImagePanel:
         self.current_image_offset = (0, 0)
         self.show_watermark_indicator = True
 
+        # 虚拟列表：Treeview中只创建可见窗口内的行
+        self.first_visible = 0
+        self.visible_rows = 8
+        self.selected_id: Optional[int] = None
+        self.rendered_ids = []
+        # 已生成的缩略图（PIL图片），按内存预算淘汰
+        self.thumbnail_images = ImageLRUCache(max_bytes=32 * 1024 * 1024)
+        self.pending_thumbnails = set()
+
         self.create_widgets()
         self.setup_layout()
 
+        # 缩略图在后台生成，完成后逐步填入列表
+        self.thumbnail_loader = ThumbnailLoader(self.parent, self.on_thumbnail_loaded)
+
     def create_widgets(self):
         """创建组件"""
         # 图片列表框架
@@ -67,16 +94,15 @@ class ImagePanel:
         self.image_treeview.column('#0', width=80, minwidth=80)
         self.image_treeview.column('filename', width=200, minwidth=150)
 
-        # 存储缩略图
+        # 存储可见行的缩略图（Tk图片），随可见窗口更新
         self.thumbnails = {}
 
-        # 列表滚动条
+        # 列表滚动条：滚动的是虚拟列表的可见窗口，而不是Treeview本身
         self.list_scrollbar = ttk.Scrollbar(
             self.list_container,
             orient=tk.VERTICAL,
-            command=self.image_treeview.yview
+            command=self.on_list_scroll
         )
-        self.image_treeview.config(yscrollcommand=self.list_scrollbar.set)
 
         # 预览框架
         self.preview_frame = ttk.LabelFrame(self.parent, text="预览")
@@ -108,6 +134,14 @@ class ImagePanel:
 
         # 绑定事件
         self.image_treeview.bind('<<TreeviewSelect>>', self.on_treeview_select)
+        self.image_treeview.bind('<Configure>', self.on_list_configure)
+        self.image_treeview.bind('<MouseWheel>', self.on_list_mousewheel)
+        self.image_treeview.bind('<Button-4>', self.on_list_mousewheel)
+        self.image_treeview.bind('<Button-5>', self.on_list_mousewheel)
+        self.image_treeview.bind('<Up>', lambda e: self.on_list_key(-1))
+        self.image_treeview.bind('<Down>', lambda e: self.on_list_key(1))
+        self.image_treeview.bind('<Prior>', lambda e: self.on_list_key(-self.visible_rows))
+        self.image_treeview.bind('<Next>', lambda e: self.on_list_key(self.visible_rows))
         self.preview_canvas.bind('<Button-1>', self.on_canvas_click)
         self.preview_canvas.bind('<B1-Motion>', self.on_canvas_drag)
         self.preview_canvas.bind('<ButtonRelease-1>', self.on_canvas_release)
@@ -135,58 +169,178 @@ class ImagePanel:
         self.preview_frame.grid_rowconfigure(0, weight=1)
         self.preview_frame.grid_columnconfigure(0, weight=1)
 
-    def update_image_list(self, image_paths: List[str]):
+    def refresh_list(self):
+        """图片库内容变化后刷新列表，可见行未变化时只更新滚动条"""
+        self.first_visible = self.clamp_first_visible(self.first_visible)
+        visible_ids = self.library.ids(self.first_visible, self.first_visible + self.visible_rows)
+        if visible_ids == self.rendered_ids:
+            self.update_list_scrollbar()
+        else:
+            self.render_visible_rows()
+
+    def clamp_first_visible(self, first: int) -> int:
+        """把可见窗口的起始位置限制在有效范围内"""
+        return max(0, min(first, len(self.library) - self.visible_rows))
+
+    def scroll_list_to(self, first: int):
         """
-        更新图片列表
+        滚动虚拟列表
 
         Args:
-            image_paths: 图片路径列表
+            first: 可见窗口第一行的位置
         """
-        self.image_list = image_paths
+        first = self.clamp_first_visible(first)
+        if first != self.first_visible:
+            self.first_visible = first
+            self.render_visible_rows()
+
+    def render_visible_rows(self):
+        """重建可见窗口内的Treeview行，并请求缺少的缩略图"""
+        visible_ids = self.library.ids(self.first_visible, self.first_visible + self.visible_rows)
+        self.rendered_ids = visible_ids
+
+        # 滚动后不再需要的缩略图请求直接取消，已生成的结果仍保留在磁盘缓存中
+        self.thumbnail_loader.cancel()
+        self.pending_thumbnails.clear()
 
-        # 清空列表
-        for item in self.image_treeview.get_children():
-            self.image_treeview.delete(item)
+        self.image_treeview.delete(*self.image_treeview.get_children())
         self.thumbnails.clear()
 
-        # 添加图片到列表，生成缩略图
-        for i, path in enumerate(image_paths):
+        missing = []
+        for image_id in visible_ids:
+            path = self.library.get_path(image_id)
             filename = os.path.basename(path)
+            item_id = f'item_{image_id}'
+
+            thumbnail = self.thumbnail_images.get(image_id)
+            if thumbnail is not None:
+                # 转换为Tkinter格式
+                thumbnail_tk = ImageTk.PhotoImage(thumbnail)
+                self.thumbnails[item_id] = thumbnail_tk
+                self.image_treeview.insert('', 'end', iid=item_id, image=thumbnail_tk, values=(filename,))
+            else:
+                # 先只显示文件名，缩略图在后台生成
+                self.image_treeview.insert('', 'end', iid=item_id, text=filename, values=(filename,))
+                if image_id not in self.pending_thumbnails:
+                    self.pending_thumbnails.add(image_id)
+                    missing.append((image_id, path))
+
+        if self.selected_id in visible_ids:
+            self.image_treeview.selection_set(f'item_{self.selected_id}')
+
+        self.thumbnail_loader.request(missing)
+        self.update_list_scrollbar()
+
+    def update_list_scrollbar(self):
+        """按可见窗口位置更新滚动条"""
+        total = len(self.library)
+        if total > 0:
+            self.list_scrollbar.set(
+                self.first_visible / total,
+                min(1.0, (self.first_visible + self.visible_rows) / total)
+            )
+        else:
+            self.list_scrollbar.set(0.0, 1.0)
 
-            try:
-                # 生成缩略图
-                with Image.open(path) as img:
-                    # 创建64x64的缩略图
-                    thumbnail = img.copy()
-                    thumbnail.thumbnail((64, 64), Image.Resampling.LANCZOS)
-
-                    # 转换为Tkinter格式
-                    thumbnail_tk = ImageTk.PhotoImage(thumbnail)
-                    self.thumbnails[f'item_{i}'] = thumbnail_tk
-
-                    # 添加到Treeview
-                    item_id = self.image_treeview.insert(
-                        '', 'end',
-                        iid=f'item_{i}',
-                        image=thumbnail_tk,
-                        values=(filename,)
-                    )
-            except Exception as e:
-                # 如果无法生成缩略图，只显示文件名
-                print(f"无法生成缩略图: {path}, 错误: {e}")
-                item_id = self.image_treeview.insert(
-                    '', 'end',
-                    iid=f'item_{i}',
-                    text=filename,
-                    values=(filename,)
-                )
+    def on_thumbnail_loaded(self, image_id: int, thumbnail: Optional[Image.Image]):
+        """
+        缩略图生成完成回调，在主线程中调用
+
+        Args:
+            image_id: 图片ID
+            thumbnail: 缩略图，生成失败时为None（只显示文件名）
+        """
+        self.pending_thumbnails.discard(image_id)
+        if thumbnail is None:
+            return
+        self.thumbnail_images.put(image_id, thumbnail)
+
+        # 只为仍然可见的行创建Tk图片
+        item_id = f'item_{image_id}'
+        if self.image_treeview.exists(item_id):
+            thumbnail_tk = ImageTk.PhotoImage(thumbnail)
+            self.thumbnails[item_id] = thumbnail_tk
+            self.image_treeview.item(item_id, image=thumbnail_tk, text='')
+
+    def on_list_scroll(self, *args):
+        """滚动条命令处理"""
+        total = len(self.library)
+        if not total:
+            return
+
+        if args[0] == 'moveto':
+            self.scroll_list_to(int(float(args[1]) * total))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self.scroll_list_to(self.first_visible + amount)
+
+    def on_list_mousewheel(self, event):
+        """鼠标滚轮滚动虚拟列表"""
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_list_to(self.first_visible - 3)
+        else:
+            self.scroll_list_to(self.first_visible + 3)
+        return 'break'
+
+    def on_list_key(self, step: int):
+        """方向键/翻页键在整个列表中移动选择"""
+        if not self.library:
+            return 'break'
+
+        index = self.get_selected_index()
+        index = 0 if index < 0 else max(0, min(index + step, len(self.library) - 1))
+        self.select_image(index)
+        self.on_image_selected(self.library.path_at(index), index)
+        return 'break'
+
+    def on_list_configure(self, event):
+        """列表尺寸变化时重新计算可见行数"""
+        style = ttk.Style(self.image_treeview)
+        try:
+            row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+        except (ValueError, tk.TclError):
+            row_height = 20
+        # 减去标题行
+        rows = max(1, event.height // row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh_list()
+
+    def clear_rows(self):
+        """删除列表中的所有行，并取消未完成的缩略图"""
+        self.thumbnail_loader.cancel()
+        self.image_treeview.delete(*self.image_treeview.get_children())
+        self.thumbnails.clear()
+        self.thumbnail_images.clear()
+        self.pending_thumbnails.clear()
+        self.first_visible = 0
+        self.selected_id = None
+        self.rendered_ids = []
+        self.list_scrollbar.set(0.0, 1.0)
+
+    def get_preview_size(self) -> tuple:
+        """
+        获取预览画布的可用尺寸
 
-    def update_preview(self, image: Optional[Image.Image]):
+        Returns:
+            tuple: 画布尺寸 (width, height)
+        """
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+
+        if canvas_width <= 1 or canvas_height <= 1:
+            canvas_width, canvas_height = 400, 300
+        return (canvas_width, canvas_height)
+
+    def update_preview(self, image: Optional[Image.Image], source_size: Optional[tuple] = None):
         """
         更新预览图片
 
         Args:
             image: PIL图片对象
+            source_size: 图片对应的完整分辨率尺寸，image为缩小的代理图时指定
         """
         # 清空画布
         self.preview_canvas.delete("all")
@@ -212,13 +366,12 @@ class ImagePanel:
         # 保存缩放信息供拖拽使用
         self.current_image_scale = scale
 
-        # 调整图片尺寸
-        if scale < 1.0:
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-            display_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        else:
-            display_image = image
+        # 调整图片尺寸：先整数倍reduce再LANCZOS，避免对全分辨率做LANCZOS
+        display_image = ImageProcessor.fit_image(image, (canvas_width, canvas_height))
+
+        # 显示的是代理图时，缩放比例相对完整分辨率计算
+        if source_size:
+            self.current_image_scale = display_image.width / source_size[0]
 
         # 转换为Tkinter可显示的格式
         self.current_preview_image = ImageTk.PhotoImage(display_image)
@@ -251,17 +404,9 @@ class ImagePanel:
         Returns:
             str: 图片路径，如果未选中则返回None
         """
-        selection = self.image_treeview.selection()
-        if selection and self.image_list:
-            # 从item_id提取索引
-            try:
-                item_id = selection[0]
-                index = int(item_id.split('_')[1])
-                if 0 <= index < len(self.image_list):
-                    return self.image_list[index]
-            except (ValueError, IndexError):
-                pass
-        return None
+        if self.selected_id is None:
+            return None
+        return self.library.get_path(self.selected_id)
 
     def get_selected_index(self) -> int:
         """
@@ -270,55 +415,69 @@ class ImagePanel:
         Returns:
             int: 图片索引，如果未选中则返回-1
         """
-        selection = self.image_treeview.selection()
-        if selection:
-            try:
-                item_id = selection[0]
-                return int(item_id.split('_')[1])
-            except (ValueError, IndexError):
-                pass
-        return -1
+        if self.selected_id is None:
+            return -1
+        return self.library.index_of(self.selected_id)
 
     def select_image(self, index: int):
         """
-        选中指定索引的图片
+        选中指定索引的图片，必要时滚动列表使其可见
 
         Args:
             index: 图片索引
         """
-        item_id = f'item_{index}'
-        if self.image_treeview.exists(item_id):
-            # 清除之前的选择
-            for item in self.image_treeview.selection():
-                self.image_treeview.selection_remove(item)
-            # 选中新项目
-            self.image_treeview.selection_set(item_id)
-            self.image_treeview.see(item_id)
+        if not 0 <= index < len(self.library):
+            return
+
+        self.selected_id = self.library.id_at(index)
+        if not self.first_visible <= index < self.first_visible + self.visible_rows:
+            self.first_visible = self.clamp_first_visible(index - self.visible_rows // 2)
+            self.render_visible_rows()
+        else:
+            item_id = f'item_{self.selected_id}'
+            if self.image_treeview.exists(item_id):
+                self.image_treeview.selection_set(item_id)
 
     def clear_list(self):
         """清空图片列表"""
-        self.image_list.clear()
-        for item in self.image_treeview.get_children():
-            self.image_treeview.delete(item)
-        self.thumbnails.clear()
+        self.library.clear()
+        self.clear_rows()
         self.preview_canvas.delete("all")
         self.current_preview_image = None
 
+    def shutdown(self):
+        """停止后台缩略图生成"""
+        self.thumbnail_loader.shutdown()
+
     def on_treeview_select(self, event):
         """Treeview选择事件处理"""
         selection = self.image_treeview.selection()
-        if selection and self.image_list:
-            try:
-                item_id = selection[0]
-                index = int(item_id.split('_')[1])
-                if 0 <= index < len(self.image_list):
-                    image_path = self.image_list[index]
-                    self.on_image_selected(image_path, index)
-            except (ValueError, IndexError):
-                pass
-
-    def add_watermark_overlay(self, watermark_config: dict):
-        """添加可拖拽的水印叠加层"""
+        if not selection:
+            return
+
+        try:
+            image_id = int(selection[0].split('_')[1])
+        except (ValueError, IndexError):
+            return
+
+        # 程序设置选择（如滚动后恢复选中行）不重复触发回调
+        if image_id == self.selected_id:
+            return
+
+        image_path = self.library.get_path(image_id)
+        if image_path is not None:
+            self.selected_id = image_id
+            self.on_image_selected(image_path, self.library.index_of(image_id))
+
+    def add_watermark_overlay(self, spec: WatermarkSpec, watermark_size: Optional[tuple] = None):
+        """
+        添加可拖拽的水印叠加层
+
+        Args:
+            spec: 水印规格
+            watermark_size: 预览计划给出的水印在完整分辨率下的实际尺寸，
+                None表示按文本度量估算
+        """
         if not self.current_preview_image or self.current_image_scale <= 0 or not self.show_watermark_indicator:
             return
 
@@ -326,27 +485,29 @@ class ImagePanel:
         img_offset_x, img_offset_y = self.current_image_offset
 
         # 根据水印类型创建不同的叠加层
-        from photo_watermark.core.watermark import WatermarkType
-        watermark_type = watermark_config.get('type', WatermarkType.TEXT)
-
-        if watermark_type == WatermarkType.TEXT:
-            self.create_text_watermark_overlay(watermark_config)
-        elif watermark_type == WatermarkType.IMAGE:
-            self.create_image_watermark_overlay(watermark_config)
+        if spec.is_text:
+            self.create_text_watermark_overlay(spec, watermark_size)
+        elif spec.is_image:
+            self.create_image_watermark_overlay(spec)
 
-    def create_text_watermark_overlay(self, config: dict):
+    def create_text_watermark_overlay(self, spec: WatermarkSpec, text_size: Optional[tuple] = None):
         """创建文本水印叠加层"""
-        text_config = config.get('text_config', {})
-        layout_config = config.get('layout', {})
-
         # 获取文本内容
-        text = text_config.get('text', 'Sample Watermark')
-        font_size = text_config.get('font_size', 36)
-        opacity = text_config.get('opacity', 128)
-        color = text_config.get('color', (255, 255, 255))
+        text = spec.text
+        font_size = spec.font_size
+        opacity = spec.opacity
+        color = spec.color
+
+        # 优先使用预览计划给出的实际尺寸，与导出时的布局一致；没有时
+        # （如模板文本每张图片不同）按原文测量旋转后的外接矩形估算
+        if not text_size:
+            text_size = rotated_size(
+                measure_text(text, spec.font_family, font_size, spec.font_bold, spec.font_italic).size,
+                spec.rotation
+            )
 
         # 计算水印在预览中的位置
-        watermark_pos = self.calculate_preview_watermark_position(config, text_size=(len(text) * font_size * 0.6, font_size))
+        watermark_pos = self.calculate_preview_watermark_position(spec, text_size=text_size)
 
         if watermark_pos:
             x, y = watermark_pos
@@ -355,8 +516,8 @@ class ImagePanel:
             alpha_value = int(opacity / 255 * 0.7 * 255)  # 预览中稍微透明一些
 
             # 创建背景框
-            text_width = len(text) * int(font_size * self.current_image_scale * 0.6)
-            text_height = int(font_size * self.current_image_scale)
+            text_width = int(text_size[0] * self.current_image_scale)
+            text_height = int(text_size[1] * self.current_image_scale)
 
             self.watermark_overlay_id = self.preview_canvas.create_rectangle(
                 x - 5, y - 5,
@@ -380,62 +541,56 @@ class ImagePanel:
             self.preview_canvas.tag_bind("watermark_overlay", "<B1-Motion>", self.on_watermark_drag)
             self.preview_canvas.tag_bind("watermark_overlay", "<ButtonRelease-1>", self.on_watermark_release)
 
-    def create_image_watermark_overlay(self, config: dict):
+    def create_image_watermark_overlay(self, spec: WatermarkSpec):
         """创建图片水印叠加层"""
-        image_config = config.get('image_config', {})
-
-        watermark_path = image_config.get('image_path', '')
+        watermark_path = spec.image_path
         if not watermark_path or not os.path.exists(watermark_path):
             return
 
         try:
-            from PIL import Image
-
-            # 加载水印图片
-            with Image.open(watermark_path) as wm_img:
-                # 获取尺寸
-                width = image_config.get('width', wm_img.width)
-                height = image_config.get('height', wm_img.height)
-
-                # 计算预览中的位置
-                watermark_pos = self.calculate_preview_watermark_position(config, text_size=(width, height))
-
-                if watermark_pos:
-                    x, y = watermark_pos
-
-                    # 调整到预览尺寸
-                    preview_width = int(width * self.current_image_scale)
-                    preview_height = int(height * self.current_image_scale)
-
-                    # 创建边框指示器
-                    self.watermark_overlay_id = self.preview_canvas.create_rectangle(
-                        x, y,
-                        x + preview_width, y + preview_height,
-                        fill='', outline='blue', width=2, dash=(3, 3),
-                        tags="watermark_overlay"
-                    )
-
-                    # 添加标签
-                    self.watermark_text_id = self.preview_canvas.create_text(
-                        x + preview_width // 2, y + preview_height // 2,
-                        text="图片水印",
-                        fill='blue',
-                        font=('Arial', 10, 'bold'),
-                        tags="watermark_overlay"
-                    )
-
-                    # 绑定拖拽事件
-                    self.preview_canvas.tag_bind("watermark_overlay", "<Button-1>", self.on_watermark_click)
-                    self.preview_canvas.tag_bind("watermark_overlay", "<B1-Motion>", self.on_watermark_drag)
-                    self.preview_canvas.tag_bind("watermark_overlay", "<ButtonRelease-1>", self.on_watermark_release)
+            from photo_watermark.core.asset_cache import get_asset_cache
+
+            # 从素材缓存获取水印图片尺寸
+            wm_width, wm_height = get_asset_cache().get_size(watermark_path)
+            width, height = spec.image_size or (wm_width, wm_height)
+
+            # 计算预览中的位置
+            watermark_pos = self.calculate_preview_watermark_position(spec, text_size=(width, height))
+
+            if watermark_pos:
+                x, y = watermark_pos
+
+                # 调整到预览尺寸
+                preview_width = int(width * self.current_image_scale)
+                preview_height = int(height * self.current_image_scale)
+
+                # 创建边框指示器
+                self.watermark_overlay_id = self.preview_canvas.create_rectangle(
+                    x, y,
+                    x + preview_width, y + preview_height,
+                    fill='', outline='blue', width=2, dash=(3, 3),
+                    tags="watermark_overlay"
+                )
+
+                # 添加标签
+                self.watermark_text_id = self.preview_canvas.create_text(
+                    x + preview_width // 2, y + preview_height // 2,
+                    text="图片水印",
+                    fill='blue',
+                    font=('Arial', 10, 'bold'),
+                    tags="watermark_overlay"
+                )
+
+                # 绑定拖拽事件
+                self.preview_canvas.tag_bind("watermark_overlay", "<Button-1>", self.on_watermark_click)
+                self.preview_canvas.tag_bind("watermark_overlay", "<B1-Motion>", self.on_watermark_drag)
+                self.preview_canvas.tag_bind("watermark_overlay", "<ButtonRelease-1>", self.on_watermark_release)
 
         except Exception as e:
             print(f"创建图片水印叠加层失败: {e}")
 
-    def calculate_preview_watermark_position(self, config: dict, text_size: tuple) -> tuple:
+    def calculate_preview_watermark_position(self, spec: WatermarkSpec, text_size: tuple) -> tuple:
         """计算水印在预览中的显示位置"""
-        layout_config = config.get('layout', {})
-
         # 获取原始图片尺寸
         if not self.current_preview_image:
             return None
@@ -444,32 +599,13 @@ class ImagePanel:
         preview_width = int(self.current_preview_image.width())
         preview_height = int(self.current_preview_image.height())
 
-        # 获取水印配置
-        from photo_watermark.core.watermark import WatermarkPosition, WatermarkCalculator, WatermarkLayout
-
-        position = layout_config.get('position', 'bottom_right')
-        if isinstance(position, str):
-            try:
-                position = WatermarkPosition(position)
-            except:
-                position = WatermarkPosition.BOTTOM_RIGHT
-
-        x_offset = layout_config.get('x_offset', 0)
-        y_offset = layout_config.get('y_offset', 0)
-        margin = layout_config.get('margin', 20)
-
-        # 创建布局对象
-        layout = WatermarkLayout()
-        layout.position = position
-        layout.x_offset = x_offset
-        layout.y_offset = y_offset
-        layout.margin = margin
+        from photo_watermark.core.watermark import WatermarkCalculator
 
         # 计算在原始图片中的位置
         original_size = (int(preview_width / self.current_image_scale), int(preview_height / self.current_image_scale))
         watermark_size = text_size
 
-        original_pos = WatermarkCalculator.calculate_position(original_size, watermark_size, layout)
+        original_pos = WatermarkCalculator.calculate_position(original_size, watermark_size, spec.layout)
 
         # 转换到预览坐标
         preview_x = int(original_pos[0] * self.current_image_scale) + img_offset_x
@@ -611,12 +747,13 @@ class ImagePanel:
         if self.is_dragging:
             self.on_watermark_release(event)
 
-    def update_preview_image_only(self, image: Optional[Image.Image]):
+    def update_preview_image_only(self, image: Optional[Image.Image], source_size: Optional[tuple] = None):
         """
         只更新预览图片，不重新创建水印叠加层
 
         Args:
             image: PIL图片对象
+            source_size: 图片对应的完整分辨率尺寸，image为缩小的代理图时指定
         """
         if image is None:
             return
@@ -653,13 +790,12 @@ class ImagePanel:
         # 保存缩放信息
         self.current_image_scale = scale
 
-        # 调整图片尺寸
-        if scale < 1.0:
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-            display_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        else:
-            display_image = image
+        # 调整图片尺寸：先整数倍reduce再LANCZOS，避免对全分辨率做LANCZOS
+        display_image = ImageProcessor.fit_image(image, (canvas_width, canvas_height))
+
+        # 显示的是代理图时，缩放比例相对完整分辨率计算
+        if source_size:
+            self.current_image_scale = display_image.width / source_size[0]
 
         # 转换为Tkinter可显示的格式
         self.current_preview_image = ImageTk.PhotoImage(display_image)
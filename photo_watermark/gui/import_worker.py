@@ -0,0 +1,159 @@
+"""
+图片导入模块
+
+在后台线程中扫描导入的文件和目录，并在主线程中分批回调，
+大目录导入时列表可以边扫描边显示，界面不会卡住。元数据索引在另一个
+低优先级的线程中分批刷新，扫描进行时暂停，不会推迟下一次导入
+"""
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from photo_watermark.core.image_scanner import ImageInfo, ImageScanner
+from photo_watermark.core.metadata_index import MetadataIndex
+
+
+class ImportWorker:
+    """后台图片导入器"""
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        on_chunk: Callable[[List[ImageInfo]], None],
+        on_finished: Callable[[int], None],
+        scanner: Optional[ImageScanner] = None,
+        metadata_index: Optional[MetadataIndex] = None,
+        poll_ms: int = 50,
+        chunks_per_poll: int = 8,
+        index_chunk_size: int = 64
+    ):
+        """
+        初始化导入器
+
+        Args:
+            root: Tk根窗口，用于after调度
+            on_chunk: 在主线程中调用，处理一批扫描结果
+            on_finished: 在主线程中调用，参数为本次导入识别出的图片数
+            scanner: 图片扫描器，None表示使用默认扫描器
+            metadata_index: 元数据索引，导入完成后在后台增量刷新，None表示不建立索引
+            poll_ms: 检查扫描结果的间隔（毫秒）
+            chunks_per_poll: 每次检查最多处理的批数，避免长时间阻塞界面
+            index_chunk_size: 每次刷新元数据索引的文件数，每批之间检查是否取消、
+                是否有导入正在扫描
+        """
+        self.root = root
+        self.on_chunk = on_chunk
+        self.on_finished = on_finished
+        self.scanner = scanner or ImageScanner()
+        self.metadata_index = metadata_index
+        self.poll_ms = poll_ms
+        self.chunks_per_poll = chunks_per_poll
+        self.index_chunk_size = index_chunk_size
+
+        # 导入任务依次执行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-import")
+        # 元数据索引在单独的线程中刷新，不占用导入线程
+        self._index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metadata-index")
+        # 没有导入正在扫描时置位；索引刷新在扫描期间让路
+        self._scan_idle = threading.Event()
+        self._scan_idle.set()
+        self._generation = 0
+        self._active_jobs = 0
+        self._polling = False
+        self._closed = False
+        self._results: "queue.Queue" = queue.Queue()
+
+    def is_running(self) -> bool:
+        """是否有尚未完成的导入"""
+        return self._active_jobs > 0
+
+    def start(self, paths: Iterable[str]):
+        """
+        开始导入
+
+        Args:
+            paths: 文件或目录路径
+        """
+        if self._closed:
+            return
+
+        self._active_jobs += 1
+        self._executor.submit(self._run, self._generation, list(paths))
+
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _run(self, generation: int, paths: List[str]):
+        """工作线程：扫描并把结果放入队列，结束时放入识别出的图片数"""
+        found: List[ImageInfo] = []
+        self._scan_idle.clear()
+        try:
+            if generation == self._generation:
+                for chunk in self.scanner.scan(paths):
+                    if generation != self._generation:
+                        break
+                    found.extend(chunk)
+                    self._results.put((generation, chunk))
+        except Exception as e:
+            print(f"导入图片失败: {e}")
+        finally:
+            self._scan_idle.set()
+        self._results.put((generation, len(found)))
+
+        # 列表显示完成后在索引线程中刷新元数据索引，只读取新增或修改过的文件
+        if self.metadata_index is not None and found and generation == self._generation and not self._closed:
+            self._index_executor.submit(self._refresh_index, generation, found)
+
+    def _refresh_index(self, generation: int, found: List[ImageInfo]):
+        """索引线程：分批刷新元数据索引，导入被取消后停止"""
+        for start in range(0, len(found), self.index_chunk_size):
+            # 有导入正在扫描时等待，先让新导入的列表显示出来
+            self._scan_idle.wait()
+            if generation != self._generation or self._closed:
+                return
+            try:
+                self.metadata_index.refresh(found[start:start + self.index_chunk_size])
+            except Exception as e:
+                print(f"更新元数据索引失败: {e}")
+                return
+
+    def _poll(self):
+        """主线程：分批处理扫描结果"""
+        if self._closed:
+            self._polling = False
+            return
+
+        for _ in range(self.chunks_per_poll):
+            try:
+                generation, item = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if isinstance(item, int):
+                # 一个导入任务结束
+                self._active_jobs -= 1
+                if generation == self._generation:
+                    self.on_finished(item)
+            elif generation == self._generation:
+                self.on_chunk(item)
+
+        if self._active_jobs > 0:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def cancel(self):
+        """取消正在进行和排队中的导入，以及尚未完成的索引刷新"""
+        self._generation += 1
+        self.scanner.cancel()
+
+    def shutdown(self):
+        """停止导入，之后的请求将被忽略"""
+        self.cancel()
+        self._closed = True
+        self._executor.shutdown(wait=False)
+        self._index_executor.shutdown(wait=False)
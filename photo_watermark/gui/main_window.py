@@ -7,22 +7,34 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import os
-import glob
 from typing import List, Optional
 from pathlib import Path
 
+from photo_watermark.core.image_library import ImageLibrary
+from photo_watermark.core.image_scanner import ImageInfo, sniff_image
+from photo_watermark.core.memory_budget import DEFAULT_MEMORY_BUDGET
+from photo_watermark.core.job_manifest import JobManifest
+from photo_watermark.core.metadata_index import MetadataIndex
 from photo_watermark.core.image_processor import ImageProcessor
+from photo_watermark.core.preview_renderer import PreviewRenderer
+from photo_watermark.core.read_ahead import ReadAheadPrefetcher
+from photo_watermark.core.stamp_transform import PREVIEW_ROTATION_STEP
 from photo_watermark.core.batch_processor import BatchProcessor
 from photo_watermark.core.watermark import (
     TextWatermark, ImageWatermark, WatermarkLayout,
     WatermarkPosition, WatermarkType
 )
+from photo_watermark.core.watermark_plan import get_plan
+from photo_watermark.core.watermark_spec import WatermarkSpec
 from photo_watermark.utils.app_config import AppConfig
 
 from .image_panel import ImagePanel
 from .watermark_panel import WatermarkPanel
 from .control_panel import ControlPanel
 from .export_panel import ExportSettingsPanel
+from .export_worker import ExportWorker
+from .import_worker import ImportWorker
+from .preview_scheduler import PreviewScheduler
 
 
 class MainWindow:
@@ -39,14 +51,50 @@ class MainWindow:
         self.root = tk.Tk()
         self.setup_window()
 
-        # 初始化处理器
+        # 图片元数据索引（尺寸、格式、EXIF方向、内容哈希），保存在配置目录中
+        try:
+            self.metadata_index = MetadataIndex(self.config.config_dir / "metadata.db")
+        except Exception as e:
+            print(f"打开元数据索引失败: {e}")
+            self.metadata_index = None
+
+        # 初始化处理器；批量导出启用预读和内存预算，估算时使用索引中的尺寸，不必打开文件头
         self.image_processor = ImageProcessor()
-        self.batch_processor = BatchProcessor()
+        self.batch_processor = BatchProcessor(
+            read_ahead=ReadAheadPrefetcher(),
+            memory_budget=DEFAULT_MEMORY_BUDGET,
+            metadata_index=self.metadata_index
+        )
+        self.preview_renderer = PreviewRenderer()
+
+        # 预览调度器：合并连续的设置变更，在工作线程中渲染预览
+        self.preview_scheduler = PreviewScheduler(
+            self.root,
+            self.prepare_preview_job,
+            self.render_preview_job,
+            self.on_preview_rendered
+        )
 
-        # 当前加载的图片列表
-        self.image_list: List[str] = []
+        # 当前加载的图片（按路径去重）
+        self.image_library = ImageLibrary()
         self.current_image_index = -1
 
+        # 后台批量导出：结果分批回到主线程更新状态
+        self.export_worker = ExportWorker(
+            self.root,
+            self.batch_processor,
+            self.on_export_progress,
+            self.on_export_finished
+        )
+
+        # 后台导入：扫描结果分批加入列表
+        self.import_worker = ImportWorker(
+            self.root,
+            self.on_import_chunk,
+            self.on_import_finished,
+            metadata_index=self.metadata_index
+        )
+
         # 水印配置
         self.text_watermark = TextWatermark()
         self.image_watermark = ImageWatermark()
@@ -86,7 +134,12 @@ class MainWindow:
 
         # 创建左侧面板（图片列表和预览）
         self.left_panel = ttk.Frame(self.main_frame)
-        self.image_panel = ImagePanel(self.left_panel, self.on_image_selected, self.on_watermark_position_changed)
+        self.image_panel = ImagePanel(
+            self.left_panel,
+            self.on_image_selected,
+            self.on_watermark_position_changed,
+            library=self.image_library
+        )
 
         # 设置拖拽完成回调
         self.image_panel.on_watermark_drag_finished = self.on_watermark_drag_finished
@@ -227,44 +280,44 @@ class MainWindow:
 
     def get_serializable_watermark_config(self) -> dict:
         """获取可序列化的水印配置"""
-        config = self.get_current_watermark_config()
-
-        # 转换枚举类型为字符串
-        serializable_config = {}
-        for key, value in config.items():
-            if hasattr(value, 'value'):  # 枚举类型
-                serializable_config[key] = value.value
-            elif isinstance(value, dict):
-                # 递归处理字典中的枚举
-                serializable_dict = {}
-                for k, v in value.items():
-                    if hasattr(v, 'value'):
-                        serializable_dict[k] = v.value
-                    else:
-                        serializable_dict[k] = v
-                serializable_config[key] = serializable_dict
-            else:
-                serializable_config[key] = value
-
-        return serializable_config
+        return self.get_watermark_spec().to_config()
 
     def update_status(self, message: str):
         """更新状态栏"""
         self.status_bar.config(text=message)
         self.root.update_idletasks()
 
-    def get_current_watermark_config(self) -> dict:
-        """获取当前水印配置"""
+    def get_watermark_spec(self) -> WatermarkSpec:
+        """获取当前水印规格（不可变，可直接交给工作线程使用）"""
         # 从水印面板获取最新配置
-        return self.watermark_panel.get_watermark_config()
+        return self.watermark_panel.get_watermark_spec()
 
     # 事件处理方法
     def on_image_selected(self, image_path: str, index: int):
         """图片选择事件处理"""
         self.current_image_index = index
-        if self.image_processor.load_image(image_path):
-            self.update_preview()
-            self.update_status(f"已加载图片: {os.path.basename(image_path)}")
+        # 在后台只解码显示分辨率的代理图，完整分辨率在导出时才加载
+        self.update_preview(status_message=f"已加载图片: {os.path.basename(image_path)}")
+
+        # 预取前后相邻图片的代理图，切换图片时可直接命中缓存
+        self.prefetch_neighbors(index)
+
+    def prefetch_neighbors(self, index: int, count: int = 3):
+        """
+        在后台预取指定图片前后各count张图片的代理图
+
+        Args:
+            index: 当前图片索引
+            count: 每个方向预取的数量
+        """
+        neighbors = []
+        for distance in range(1, count + 1):
+            for neighbor in (index + distance, index - distance):
+                if 0 <= neighbor < len(self.image_library):
+                    neighbors.append(self.image_library.path_at(neighbor))
+
+        if neighbors:
+            self.preview_renderer.prefetch(neighbors, self.image_panel.get_preview_size())
 
     def on_watermark_changed(self):
         """水印设置改变事件处理"""
@@ -299,17 +352,11 @@ class MainWindow:
     def on_watermark_drag_finished(self):
         """水印拖拽完成事件处理"""
         # 拖拽结束时，只更新实际水印，不重新创建叠加层
-        if self.current_image_index >= 0 and self.image_processor.current_image:
+        if self.current_image_index >= 0:
             show_watermark = self.watermark_panel.show_preview.get()
             if show_watermark:
-                # 重置图片并重新应用水印到新位置
-                self.image_processor.reset_image()
-                self.apply_current_watermark()
-
-                # 只更新预览图片，保持叠加层位置
-                result_image = self.image_processor.get_current_image()
-                if result_image and self.image_panel:
-                    self.image_panel.update_preview_image_only(result_image)
+                # 重新渲染水印到新位置，只更新预览图片，保持叠加层位置
+                self.update_preview(image_only=True)
 
     def on_import_images(self):
         """导入图片事件处理"""
@@ -334,15 +381,8 @@ class MainWindow:
         """导入文件夹事件处理"""
         folder = filedialog.askdirectory(title="选择图片文件夹")
         if folder:
-            image_files = []
-            for ext in ImageProcessor.SUPPORTED_FORMATS['input']:
-                pattern = os.path.join(folder, f"*{ext}")
-                image_files.extend(glob.glob(pattern, recursive=True))
-
-            if image_files:
-                self.add_images(image_files)
-            else:
-                messagebox.showinfo("提示", "所选文件夹中未找到支持的图片文件")
+            # 在后台递归扫描，按文件头识别图片
+            self.add_images([folder])
 
     def on_export_current(self):
         """导出当前图片事件处理"""
@@ -351,7 +391,7 @@ class MainWindow:
             return
 
         # 获取当前图片路径
-        current_image_path = self.image_list[self.current_image_index]
+        current_image_path = self.image_library.path_at(self.current_image_index)
 
         # 为防止覆盖原图，默认禁止导出到原文件夹
         # 使用桌面或文档文件夹作为默认导出位置
@@ -409,7 +449,7 @@ class MainWindow:
 
     def on_batch_export(self):
         """批量导出事件处理"""
-        if not self.image_list:
+        if not self.image_library:
             messagebox.showwarning("警告", "请先导入要处理的图片")
             return
 
@@ -432,21 +472,23 @@ class MainWindow:
 
     def on_clear_list(self):
         """清空图片列表事件处理"""
-        if self.image_list:
+        if self.image_library:
             # 确认对话框
             result = messagebox.askyesno(
                 "确认清空",
-                f"确定要清空所有图片吗？\n当前有 {len(self.image_list)} 张图片。"
+                f"确定要清空所有图片吗？\n当前有 {len(self.image_library)} 张图片。"
             )
             if result:
-                # 清空列表
-                self.image_list.clear()
+                # 清空列表，并停止正在进行的导入
+                self.import_worker.cancel()
                 self.current_image_index = -1
 
                 # 清空界面
                 self.image_panel.clear_list()
                 self.image_processor.current_image = None
                 self.image_processor.original_image = None
+                self.preview_scheduler.cancel()
+                self.preview_renderer.clear()
 
                 # 更新状态
                 self.update_status("图片列表已清空")
@@ -464,11 +506,9 @@ class MainWindow:
             # 重置水印面板设置
             self.watermark_panel.reset_to_defaults()
 
-            # 如果有当前图片，重新加载原始图片
-            if self.current_image_index >= 0 and self.current_image_index < len(self.image_list):
-                current_path = self.image_list[self.current_image_index]
-                self.image_processor.load_image(current_path)
-                self.image_panel.update_preview(self.image_processor.get_current_image())
+            # 如果有当前图片，显示不带水印的原始图片
+            if self.current_image_index >= 0:
+                self.update_preview(show_watermark=False)
 
             self.update_status("水印设置已重置")
             messagebox.showinfo("完成", "水印设置已重置为默认值")
@@ -498,19 +538,17 @@ class MainWindow:
         try:
             # 处理拖拽的文件路径
             files = event.data.split()
-            image_files = []
+            dropped_paths = []
 
             for file_path in files:
                 # 清理路径格式
                 file_path = file_path.strip('{}').strip()
                 if os.path.exists(file_path):
-                    ext = os.path.splitext(file_path)[1].lower()
-                    if ext in ImageProcessor.SUPPORTED_FORMATS['input']:
-                        image_files.append(file_path)
+                    dropped_paths.append(file_path)
 
-            if image_files:
-                self.add_images(image_files)
-                self.update_status(f"已通过拖拽导入 {len(image_files)} 张图片")
+            if dropped_paths:
+                # 文件格式由导入扫描按文件头识别
+                self.add_images(dropped_paths)
             else:
                 messagebox.showwarning("警告", "拖拽的文件中没有支持的图片格式")
 
@@ -520,9 +558,6 @@ class MainWindow:
 
     def on_save_template(self):
         """保存模板事件处理"""
-        # 获取当前水印配置
-        watermark_config = self.get_current_watermark_config()
-
         # 创建简单的输入对话框
         template_name = tk.simpledialog.askstring(
             "保存水印模板",
@@ -733,152 +768,213 @@ class MainWindow:
 
     def on_closing(self):
         """窗口关闭事件处理"""
+        self.import_worker.shutdown()
+        self.export_worker.shutdown()
+        self.preview_scheduler.shutdown()
+        self.preview_renderer.shutdown()
+        self.image_panel.shutdown()
+        if self.metadata_index is not None:
+            self.metadata_index.close()
         self.save_settings()
         self.root.quit()
 
     # 辅助方法
     def add_images(self, image_paths: List[str]):
-        """添加图片到列表"""
-        valid_images = [path for path in image_paths if self.is_supported_image(path)]
-        self.image_list.extend(valid_images)
-        self.image_panel.update_image_list(self.image_list)
+        """
+        添加图片到列表
+
+        在后台扫描文件和目录（递归），按文件头识别图片，结果分批加入列表。
+
+        Args:
+            image_paths: 文件或目录路径
+        """
+        self.update_status("正在导入图片...")
+        self.import_worker.start(image_paths)
+
+    def on_import_chunk(self, image_infos: List[ImageInfo]):
+        """一批图片扫描完成，在主线程中加入列表"""
+        added = False
+        for info in image_infos:
+            if self.image_library.add(info.path, info) is not None:
+                added = True
+        if not added:
+            return
 
-        if valid_images and self.current_image_index < 0:
-            self.on_image_selected(valid_images[0], 0)
+        self.image_panel.refresh_list()
+        self.update_status(f"正在导入图片... 已加载 {len(self.image_library)} 张")
+
+        if self.current_image_index < 0:
+            self.image_panel.select_image(0)
+            self.on_image_selected(self.image_library.path_at(0), 0)
+
+    def on_import_finished(self, image_count: int):
+        """导入任务结束"""
+        if image_count == 0:
+            self.update_status("未找到支持的图片文件")
+            messagebox.showinfo("提示", "未找到支持的图片文件")
+        else:
+            self.update_status(f"导入完成，共 {len(self.image_library)} 张图片")
 
     def is_supported_image(self, file_path: str) -> bool:
-        """检查文件是否为支持的图片格式"""
-        ext = os.path.splitext(file_path)[1].lower()
-        return ext in ImageProcessor.SUPPORTED_FORMATS['input']
+        """检查文件是否为支持的图片格式（按文件头识别）"""
+        return sniff_image(file_path) is not None
+
+    def update_preview(
+        self,
+        image_only: bool = False,
+        show_watermark: Optional[bool] = None,
+        status_message: Optional[str] = None
+    ):
+        """
+        请求更新预览
 
-    def update_preview(self):
-        """更新预览"""
-        if self.current_image_index >= 0 and self.image_processor.current_image:
-            # 重置图片
-            self.image_processor.reset_image()
+        请求经过防抖合并后在工作线程渲染，结果通过root.after回到主线程显示。
 
-            # 检查是否显示水印预览
-            show_watermark = self.watermark_panel.show_preview.get()
+        Args:
+            image_only: 只更新预览图片，保留现有的水印叠加层
+            show_watermark: 是否渲染水印，None表示按预览设置
+            status_message: 预览显示后在状态栏显示的消息
+        """
+        if self.current_image_index >= 0:
+            self.preview_scheduler.request(
+                image_only=image_only,
+                show_watermark=show_watermark,
+                status_message=status_message
+            )
 
-            # 如果启用预览，应用水印到图片上
-            if show_watermark:
-                self.apply_current_watermark()
+    def prepare_preview_job(
+        self,
+        image_only: bool = False,
+        show_watermark: Optional[bool] = None,
+        status_message: Optional[str] = None
+    ) -> Optional[dict]:
+        """在主线程中收集渲染预览所需的参数快照"""
+        if not 0 <= self.current_image_index < len(self.image_library):
+            return None
+
+        if show_watermark is None:
+            show_watermark = self.watermark_panel.show_preview.get()
 
+        return {
+            'image_path': self.image_library.path_at(self.current_image_index),
+            'display_size': self.image_panel.get_preview_size(),
+            'watermark_spec': self.get_watermark_spec(),
+            'show_watermark': show_watermark,
+            'show_indicator': self.watermark_panel.show_position_indicator.get(),
+            'image_only': image_only,
+            'status_message': status_message,
+        }
+
+    def render_preview_job(self, job: dict) -> Optional[tuple]:
+        """在工作线程中渲染一帧预览"""
+        # 画布尺寸或图片变化时重新生成代理图，否则直接复用
+        if not self.preview_renderer.load(job['image_path'], job['display_size']):
+            return None
+
+        # 在显示分辨率的代理图副本上渲染，不触碰完整分辨率图片
+        processor = self.preview_renderer.create_processor()
+        if processor is None:
+            return None
+
+        # 如果启用预览，按代理图比例应用水印
+        scale = self.preview_renderer.scale
+        if job['show_watermark']:
+            self.apply_current_watermark(processor, scale, job['watermark_spec'], job['image_path'])
+
+        # 叠加层的尺寸取自同一个预览计划，主线程不必编译完整分辨率的图章
+        watermark_size = None
+        if job['show_indicator'] and not job['image_only']:
+            plan = self.get_preview_plan(job['watermark_spec'], scale)
+            if plan.layer is not None:
+                watermark_size = plan.true_size
+
+        return processor.get_current_image(), self.preview_renderer.source_size, watermark_size
+
+    def on_preview_rendered(self, job: dict, result: tuple):
+        """在主线程中显示渲染完成的预览"""
+        preview_image, source_size, watermark_size = result
+
+        if job['image_only']:
+            self.image_panel.update_preview_image_only(preview_image, source_size)
+        else:
             # 更新预览显示（显示带或不带水印的图片）
-            preview_image = self.image_processor.get_current_image()
-            self.image_panel.update_preview(preview_image)
+            self.image_panel.update_preview(preview_image, source_size)
 
             # 检查是否显示可拖拽的水印叠加层
-            show_indicator = self.watermark_panel.show_position_indicator.get()
+            show_indicator = job['show_indicator']
             self.image_panel.show_watermark_indicator = show_indicator
 
             # 如果启用了拖拽指示器，添加水印叠加层
             if show_indicator:
-                watermark_config = self.get_current_watermark_config()
-                self.image_panel.add_watermark_overlay(watermark_config)
+                self.image_panel.add_watermark_overlay(job['watermark_spec'], watermark_size)
+
+        if job['status_message']:
+            self.update_status(job['status_message'])
+
+    def apply_current_watermark(
+        self,
+        processor: Optional[ImageProcessor] = None,
+        scale: float = 1.0,
+        spec: Optional[WatermarkSpec] = None,
+        image_path: Optional[str] = None
+    ):
+        """
+        应用当前水印设置到图片
+
+        预览、单张导出和批量导出执行同一个编译好的水印计划，
+        布局按完整分辨率计算，再按scale缩放到处理器中的图片上。
 
-    def apply_current_watermark(self):
-        """应用当前水印设置到图片"""
-        if not self.image_processor.current_image:
+        Args:
+            processor: 图像处理器，None表示使用导出用的处理器
+            scale: 处理器中图片相对完整分辨率的缩放比例
+            spec: 水印规格，None表示从水印面板读取
+            image_path: 图片路径，用于填充水印文本中的模板变量
+        """
+        processor = processor or self.image_processor
+        if not processor.current_image:
             return
 
         try:
-            # 获取水印配置
-            watermark_config = self.watermark_panel.get_watermark_config()
-            watermark_type = watermark_config.get('type', WatermarkType.TEXT)
+            # 获取水印规格
+            if spec is None:
+                spec = self.get_watermark_spec()
 
-            if watermark_type == WatermarkType.TEXT:
-                self.apply_text_watermark(watermark_config)
-            elif watermark_type == WatermarkType.IMAGE:
-                self.apply_image_watermark(watermark_config)
+            plan = self.get_preview_plan(spec, scale)
+            plan.apply(processor, self.get_source_size(processor, scale), image_path)
 
         except Exception as e:
             print(f"应用水印失败: {e}")
 
-    def apply_text_watermark(self, config: dict):
-        """应用文本水印"""
-        text_config = config.get('text_config', {})
-        layout_config = config.get('layout', {})
-
-        # 获取文本内容
-        text = text_config.get('text', 'Sample Watermark')
-        if not text:
-            return
-
-        # 计算水印位置
-        from photo_watermark.core.watermark import WatermarkCalculator, WatermarkPosition
-        image_size = self.image_processor.get_image_size()
-        if not image_size:
-            return
-
-        # 估算文本尺寸
-        font_size = text_config.get('font_size', 36)
-        text_size = WatermarkCalculator.get_text_size(text, font_size)
-
-        # 创建布局对象
-        layout = WatermarkLayout()
-        layout.position = WatermarkPosition(layout_config.get('position', 'bottom_right'))
-        layout.x_offset = layout_config.get('x_offset', 50)
-        layout.y_offset = layout_config.get('y_offset', 50)
-        layout.margin = layout_config.get('margin', 20)
-
-        # 计算位置
-        position = WatermarkCalculator.calculate_position(image_size, text_size, layout)
-
-        # 应用文本水印
-        self.image_processor.add_text_watermark(
-            text=text,
-            position=position,
-            font_size=font_size,
-            color=text_config.get('color', (255, 255, 255)),
-            opacity=text_config.get('opacity', 128),
-            rotation=layout_config.get('rotation', 0.0)
-        )
+    def get_preview_plan(self, spec: WatermarkSpec, scale: float = 1.0):
+        """
+        获取按scale编译的水印计划
 
-    def apply_image_watermark(self, config: dict):
-        """应用图片水印"""
-        image_config = config.get('image_config', {})
-        layout_config = config.get('layout', {})
+        预览时量化旋转角度，拖动滑块时相邻角度共用缓存的图章；导出使用精确角度
 
-        watermark_path = image_config.get('image_path', '')
-        if not watermark_path or not os.path.exists(watermark_path):
-            return
+        Args:
+            spec: 水印规格
+            scale: 目标图片相对完整分辨率的缩放比例
 
-        # 获取水印尺寸
-        width = image_config.get('width')
-        height = image_config.get('height')
-        size = (width, height) if width and height else None
+        Returns:
+            WatermarkPlan: 水印计划
+        """
+        rotation_step = PREVIEW_ROTATION_STEP if scale != 1.0 else None
+        return get_plan(spec, scale=scale, rotation_step=rotation_step)
 
-        # 计算位置
-        from photo_watermark.core.watermark import WatermarkCalculator, WatermarkPosition
-        image_size = self.image_processor.get_image_size()
-        if not image_size:
-            return
+    def get_source_size(self, processor: ImageProcessor, scale: float = 1.0) -> Optional[tuple]:
+        """
+        获取处理器中图片对应的完整分辨率尺寸
 
-        # 获取水印图片实际尺寸
-        try:
-            from PIL import Image
-            with Image.open(watermark_path) as wm_img:
-                wm_size = size if size else wm_img.size
-        except:
-            return
+        Args:
+            processor: 图像处理器
+            scale: 处理器中图片相对完整分辨率的缩放比例
 
-        # 创建布局对象
-        layout = WatermarkLayout()
-        layout.position = WatermarkPosition(layout_config.get('position', 'bottom_right'))
-        layout.x_offset = layout_config.get('x_offset', 50)
-        layout.y_offset = layout_config.get('y_offset', 50)
-        layout.margin = layout_config.get('margin', 20)
-
-        position = WatermarkCalculator.calculate_position(image_size, wm_size, layout)
-
-        # 应用图片水印
-        self.image_processor.add_image_watermark(
-            watermark_path=watermark_path,
-            position=position,
-            size=size,
-            opacity=image_config.get('opacity', 128)
-        )
+        Returns:
+            Optional[tuple]: 完整分辨率尺寸 (width, height)
+        """
+        if scale != 1.0 and processor.source_size:
+            return processor.source_size
+        return processor.get_image_size()
 
     def export_single_image(self, output_path: str):
         """导出单张图片"""
@@ -886,6 +982,14 @@ class MainWindow:
         export_settings = self.export_panel.get_export_settings()
         jpeg_quality = export_settings['format']['jpeg_quality']
 
+        # 导出时才加载完整分辨率图片并应用水印
+        current_image_path = self.image_library.path_at(self.current_image_index)
+        if not self.image_processor.load_image(current_image_path):
+            messagebox.showerror("错误", "图片导出失败！")
+            return
+        if self.watermark_panel.show_preview.get():
+            self.apply_current_watermark(image_path=current_image_path)
+
         if self.image_processor.save_image(output_path, quality=jpeg_quality):
             self.update_status(f"图片已保存: {os.path.basename(output_path)}")
             messagebox.showinfo("成功", "图片导出成功！")
@@ -893,99 +997,55 @@ class MainWindow:
             messagebox.showerror("错误", "图片导出失败！")
 
     def batch_export_images(self, output_dir: str):
-        """批量导出图片"""
-        if not self.image_list:
+        """
+        批量导出图片
+
+        在后台线程中由批量处理器导出，水印只编译一次；输出目录的任务清单
+        保存在配置目录中，再次导出到同一目录时跳过输出已是最新的图片
+        """
+        if not self.image_library:
             messagebox.showwarning("警告", "没有图片需要导出")
             return
+        if self.export_worker.is_running():
+            messagebox.showwarning("警告", "批量导出正在进行中")
+            return
 
-        # 获取当前水印配置和导出设置
-        watermark_config = self.get_current_watermark_config()
+        # 在主线程中取得水印规格、导出设置和图片列表的快照
         export_settings = self.export_panel.get_export_settings()
-        jpeg_quality = export_settings['format']['jpeg_quality']
-
-        # 简单的批量处理
-        success_count = 0
-        total_count = len(self.image_list)
+        spec = self.get_watermark_spec().replace(quality=export_settings['format']['jpeg_quality'])
+        naming_rule = self.export_panel.get_naming_rule()
+        image_paths = list(self.image_library)
 
-        for i, image_path in enumerate(self.image_list):
-            try:
-                # 更新状态
-                filename = os.path.basename(image_path)
-                self.update_status(f"正在处理 {filename} ({i+1}/{total_count})")
-                self.root.update()
-
-                # 处理单张图片
-                processor = ImageProcessor()
-                if processor.load_image(image_path):
-                    print(f"成功加载图片: {image_path}")  # 调试信息
-
-                    # 应用水印
-                    print(f"水印配置类型: {watermark_config['type']}")  # 调试信息
-                    if watermark_config['type'] == WatermarkType.TEXT:
-                        print("应用文本水印...")  # 调试信息
-                        self.apply_text_watermark_to_processor(processor, watermark_config)
-                    elif watermark_config['type'] == WatermarkType.IMAGE:
-                        print("应用图片水印...")  # 调试信息
-                        # TODO: 实现图片水印批量处理
-                        pass
-                    else:
-                        print(f"未知水印类型: {watermark_config['type']}")  # 调试信息
-
-                    # 使用导出设置生成输出文件名
-                    output_filename = self.export_panel.generate_filename(image_path)
-                    output_path = os.path.join(output_dir, output_filename)
-                    print(f"保存到: {output_path}")  # 调试信息
-
-                    # 保存图片（使用JPEG质量设置）
-                    if processor.save_image(output_path, quality=jpeg_quality):
-                        print(f"保存成功: {output_path}")  # 调试信息
-                        success_count += 1
-                    else:
-                        print(f"保存失败: {output_path}")  # 调试信息
-                else:
-                    print(f"加载图片失败: {image_path}")  # 调试信息
-
-            except Exception as e:
-                print(f"处理图片 {image_path} 失败: {e}")
+        try:
+            manifest = JobManifest.for_output_dir(output_dir, self.config.config_dir / "manifests")
+        except Exception as e:
+            print(f"打开任务清单失败: {e}")
+            manifest = None
+
+        if self.export_worker.start(image_paths, output_dir, spec, naming_rule, manifest):
+            self.update_status(f"正在批量导出 {len(image_paths)} 张图片...")
+        elif manifest is not None:
+            manifest.close()
+
+    def on_export_progress(self, completed: int, total: int, result):
+        """在主线程中显示批量导出进度"""
+        filename = os.path.basename(result.input_path)
+        if result.skipped:
+            self.update_status(f"已是最新，跳过 {filename} ({completed}/{total})")
+        elif result.success:
+            self.update_status(f"已导出 {filename} ({completed}/{total})")
+        else:
+            print(f"导出图片失败 {result.input_path}: {result.error}")
+            self.update_status(f"导出失败 {filename} ({completed}/{total})")
 
-        # 完成
+    def on_export_finished(self, succeeded: int, failed: int, skipped: int):
+        """在主线程中汇报批量导出结果"""
+        total = succeeded + failed + skipped
         self.update_status("批量处理完成")
-        messagebox.showinfo("完成", f"批量处理完成！\n成功: {success_count}/{total_count}")
-
-    def apply_text_watermark_to_processor(self, processor: ImageProcessor, config: dict):
-        """为指定的处理器应用文本水印"""
-        text_config = config.get('text_config', {})
-        layout_config = config.get('layout', {})
-
-        text = text_config.get('text', 'Sample Watermark')
-        if not text:
-            return
-
-        # 计算位置
-        from photo_watermark.core.watermark import WatermarkCalculator, WatermarkPosition
-        image_size = processor.get_image_size()
-        if not image_size:
-            return
-
-        font_size = text_config.get('font_size', 36)
-        text_size = WatermarkCalculator.get_text_size(text, font_size)
-
-        layout = WatermarkLayout()
-        layout.position = WatermarkPosition(layout_config.get('position', 'bottom_right'))
-        layout.x_offset = layout_config.get('x_offset', 50)
-        layout.y_offset = layout_config.get('y_offset', 50)
-        layout.margin = layout_config.get('margin', 20)
-
-        position = WatermarkCalculator.calculate_position(image_size, text_size, layout)
-
-        processor.add_text_watermark(
-            text=text,
-            position=position,
-            font_size=font_size,
-            color=text_config.get('color', (255, 255, 255)),
-            opacity=text_config.get('opacity', 128),
-            rotation=layout_config.get('rotation', 0.0)
-        )
+        message = f"批量处理完成！\n成功: {succeeded + skipped}/{total}"
+        if skipped:
+            message += f"\n其中 {skipped} 张输出已是最新，未重新处理"
+        messagebox.showinfo("完成", message)
 
     def run(self):
         """启动应用程序"""
@@ -0,0 +1,131 @@
+"""
+预览调度模块
+
+合并短时间内的连续预览请求，在工作线程中渲染，
+并丢弃已被更新请求取代的渲染结果
+"""
+
+import queue
+import threading
+import tkinter as tk
+from typing import Any, Callable, Optional
+
+
+class PreviewScheduler:
+    """防抖、后台渲染的预览调度器"""
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        prepare: Callable[..., Any],
+        render: Callable[[Any], Any],
+        on_rendered: Callable[[Any, Any], None],
+        delay_ms: int = 60,
+        poll_ms: int = 15
+    ):
+        """
+        初始化预览调度器
+
+        Args:
+            root: Tk根窗口，用于after调度
+            prepare: 在主线程中调用，收集渲染所需的参数快照
+            render: 在工作线程中调用，根据快照渲染预览
+            on_rendered: 在主线程中调用，显示渲染结果 (job, result)
+            delay_ms: 防抖延迟（毫秒），在此期间的连续请求会被合并
+            poll_ms: 检查渲染结果的间隔（毫秒）
+        """
+        self.root = root
+        self.prepare = prepare
+        self.render = render
+        self.on_rendered = on_rendered
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+
+        self._generation = 0
+        self._after_id: Optional[str] = None
+        self._request_kwargs: dict = {}
+        self._busy = False
+        self._pending = False
+        self._closed = False
+        self._results: "queue.Queue" = queue.Queue()
+
+    def request(self, **kwargs):
+        """
+        请求一次预览渲染，延迟期内的多次请求只渲染最后一次
+
+        Args:
+            **kwargs: 传递给prepare的参数
+        """
+        if self._closed:
+            return
+
+        self._generation += 1
+        self._request_kwargs = kwargs
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        """防抖延迟结束，提交渲染任务"""
+        self._after_id = None
+        if self._busy:
+            # 工作线程忙时只记录，当前任务结束后再渲染最新状态
+            self._pending = True
+            return
+
+        try:
+            job = self.prepare(**self._request_kwargs)
+        except Exception as e:
+            print(f"准备预览失败: {e}")
+            return
+        if job is None:
+            return
+
+        self._busy = True
+        generation = self._generation
+        thread = threading.Thread(
+            target=self._run, args=(generation, job), daemon=True
+        )
+        thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def _run(self, generation: int, job: Any):
+        """工作线程：渲染预览并把结果放入队列"""
+        try:
+            result = self.render(job)
+        except Exception as e:
+            print(f"渲染预览失败: {e}")
+            result = None
+        self._results.put((generation, job, result))
+
+    def _poll(self):
+        """主线程：取回渲染结果，丢弃过期结果"""
+        if self._closed:
+            return
+
+        try:
+            generation, job, result = self._results.get_nowait()
+        except queue.Empty:
+            self.root.after(self.poll_ms, self._poll)
+            return
+
+        self._busy = False
+        if generation == self._generation and result is not None:
+            self.on_rendered(job, result)
+
+        if self._pending:
+            self._pending = False
+            self._fire()
+
+    def cancel(self):
+        """取消尚未开始的请求，并使正在进行的渲染结果失效"""
+        self._generation += 1
+        self._pending = False
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def shutdown(self):
+        """停止调度，之后的请求将被忽略"""
+        self.cancel()
+        self._closed = True
@@ -0,0 +1,119 @@
+"""
+缩略图加载模块
+
+在线程池中生成缩略图，并在主线程中分批回调，
+使图片列表可以先显示文件名，缩略图完成后再逐步填入
+"""
+
+import os
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from PIL import Image
+
+from photo_watermark.core.thumbnail_cache import ThumbnailCache
+
+
+class ThumbnailLoader:
+    """后台缩略图加载器"""
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        on_loaded: Callable[[Any, Optional[Image.Image]], None],
+        cache: Optional[ThumbnailCache] = None,
+        max_workers: Optional[int] = None,
+        poll_ms: int = 30,
+        batch_size: int = 100
+    ):
+        """
+        初始化缩略图加载器
+
+        Args:
+            root: Tk根窗口，用于after调度
+            on_loaded: 在主线程中调用 (key, 缩略图)，生成失败时缩略图为None
+            cache: 缩略图缓存，None表示使用默认缓存
+            max_workers: 工作线程数，None表示按CPU核数确定
+            poll_ms: 检查完成结果的间隔（毫秒）
+            batch_size: 每次检查最多处理的结果数，避免长时间阻塞界面
+        """
+        self.root = root
+        self.on_loaded = on_loaded
+        self.cache = cache or ThumbnailCache()
+        self.poll_ms = poll_ms
+        self.batch_size = batch_size
+
+        if max_workers is None:
+            max_workers = min(8, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="thumbnail"
+        )
+        # 启动时在后台把磁盘缓存清理到大小上限以内
+        self._executor.submit(self.cache.prune)
+        self._generation = 0
+        self._outstanding = 0
+        self._polling = False
+        self._closed = False
+        self._results: "queue.Queue" = queue.Queue()
+
+    def request(self, items: Iterable[Tuple[Any, str]]):
+        """
+        请求生成一批缩略图
+
+        Args:
+            items: (key, 图片路径) 序列，key原样传回on_loaded
+        """
+        if self._closed:
+            return
+
+        generation = self._generation
+        for key, path in items:
+            self._outstanding += 1
+            self._executor.submit(self._load, generation, key, path)
+
+        if self._outstanding and not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _load(self, generation: int, key: Any, path: str):
+        """工作线程：生成缩略图并把结果放入队列"""
+        thumbnail = None
+        # 已取消的请求不再生成
+        if generation == self._generation:
+            try:
+                thumbnail = self.cache.get_thumbnail(path)
+            except Exception as e:
+                print(f"无法生成缩略图: {path}, 错误: {e}")
+        self._results.put((generation, key, thumbnail))
+
+    def _poll(self):
+        """主线程：分批取回缩略图，丢弃已取消请求的结果"""
+        if self._closed:
+            self._polling = False
+            return
+
+        for _ in range(self.batch_size):
+            try:
+                generation, key, thumbnail = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if generation == self._generation:
+                self.on_loaded(key, thumbnail)
+
+        if self._outstanding > 0:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def cancel(self):
+        """取消尚未完成的请求"""
+        self._generation += 1
+
+    def shutdown(self):
+        """停止加载，之后的请求将被忽略"""
+        self.cancel()
+        self._closed = True
+        self._executor.shutdown(wait=False)
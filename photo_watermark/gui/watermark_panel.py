@@ -12,6 +12,7 @@ from photo_watermark.core.watermark import (
     TextWatermark, ImageWatermark, WatermarkLayout,
     WatermarkPosition, WatermarkType
 )
+from photo_watermark.core.watermark_spec import WatermarkSpec
 
 
 class WatermarkPanel:
@@ -460,16 +461,18 @@ class WatermarkPanel:
 
         self.on_watermark_changed()
 
-    def get_watermark_config(self) -> dict:
-        """获取当前水印配置"""
-        watermark_type = WatermarkType(self.watermark_type.get())
+    def get_watermark_spec(self) -> WatermarkSpec:
+        """获取当前水印规格（不可变快照，不引用面板内的可变对象）"""
+        return WatermarkSpec.from_models(
+            WatermarkType(self.watermark_type.get()),
+            self.text_watermark,
+            self.image_watermark,
+            self.watermark_layout
+        )
 
-        return {
-            'type': watermark_type,
-            'text_config': self.text_watermark.__dict__ if watermark_type == WatermarkType.TEXT else {},
-            'image_config': self.image_watermark.__dict__ if watermark_type == WatermarkType.IMAGE else {},
-            'layout': self.watermark_layout.__dict__
-        }
+    def get_watermark_config(self) -> dict:
+        """获取当前水印配置（可序列化的字典）"""
+        return self.get_watermark_spec().to_config()
 
     def load_watermark_config(self, config: dict):
         """加载水印配置"""
@@ -10,6 +10,16 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List
 
 
+def get_default_config_dir() -> Path:
+    """
+    获取默认的应用配置目录
+
+    Returns:
+        Path: 用户目录下的应用配置文件夹
+    """
+    return Path.home() / ".photo_watermark"
+
+
 class AppConfig:
     """应用程序配置管理器"""
 
@@ -22,8 +32,7 @@ class AppConfig:
         """
         if config_dir is None:
             # 使用用户目录下的应用配置文件夹
-            home_dir = Path.home()
-            config_dir = home_dir / ".photo_watermark"
+            config_dir = get_default_config_dir()
 
         self.config_dir = Path(config_dir)
         self.config_file = self.config_dir / "config.json"
@@ -36,6 +36,7 @@ setup(
             'black>=22.0.0',
             'flake8>=4.0.0',
         ],
+        'numpy': ['numpy>=1.17'],
         'pyqt5': ['PyQt5>=5.15.0'],
         'pyqt6': ['PyQt6>=6.2.0'],
     },
@@ -0,0 +1,17 @@
+"""
+测试公用的夹具
+"""
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def image_paths(tmp_path):
+    """生成若干张小图片"""
+    paths = []
+    for i in range(12):
+        path = tmp_path / f"image_{i:02d}.png"
+        Image.new('RGB', (64, 48), (i * 20, 100, 150)).save(path)
+        paths.append(str(path))
+    return paths
@@ -0,0 +1,106 @@
+"""
+批量处理流水线测试
+
+覆盖流水线模式的输出、阶段之间的背压和出错时的内存预算
+"""
+
+import builtins
+import time
+
+from PIL import Image
+
+from photo_watermark.core import batch_pipeline
+from photo_watermark.core.batch_processor import BatchProcessor
+from photo_watermark.core.image_processor import ImageProcessor
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+SPEC = WatermarkSpec(text="test", font_size=12)
+
+# 每个阶段一个线程，阶段之间的队列长度为2
+SINGLE_WORKERS = {'read': 1, 'decode': 1, 'composite': 1, 'encode': 1, 'write': 1}
+
+
+def run(processor: BatchProcessor, image_paths, output_dir):
+    """按规格中的布局调用iter_process"""
+    return processor.iter_process(image_paths, str(output_dir), SPEC, SPEC.layout, {})
+
+
+def test_output_matches_thread_mode(image_paths, tmp_path):
+    thread_results = list(run(BatchProcessor(max_workers=2), image_paths, tmp_path / "thread"))
+    pipeline_results = list(run(
+        BatchProcessor(executor_type='pipeline', pipeline_workers={'decode': 2, 'composite': 2, 'encode': 2}),
+        image_paths, tmp_path / "pipeline"
+    ))
+
+    assert all(result.success for result in thread_results + pipeline_results)
+    expected = {result.input_path: open(result.output_path, 'rb').read() for result in thread_results}
+    actual = {result.input_path: open(result.output_path, 'rb').read() for result in pipeline_results}
+    assert actual == expected
+
+    # 每个阶段分别计时
+    assert set(pipeline_results[0].timings) == {'load', 'watermark', 'encode', 'write'}
+
+
+def test_slow_writes_apply_backpressure(tmp_path, monkeypatch):
+    paths = []
+    for i in range(30):
+        path = tmp_path / f"image_{i:02d}.png"
+        Image.new('RGB', (32, 32), (i * 8, 0, 0)).save(path)
+        paths.append(str(path))
+
+    loaded = []
+    written = []
+    backlog = []
+    original_load = ImageProcessor.load_image
+
+    def counting_load(self, *args, **kwargs):
+        loaded.append(1)
+        backlog.append(len(loaded) - len(written))
+        return original_load(self, *args, **kwargs)
+
+    def slow_open(path, mode='r', *args, **kwargs):
+        # 只有写入阶段在流水线模块中打开文件
+        time.sleep(0.02)
+        written.append(1)
+        return builtins.open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(ImageProcessor, 'load_image', counting_load)
+    monkeypatch.setattr(batch_pipeline, 'open', slow_open, raising=False)
+
+    processor = BatchProcessor(executor_type='pipeline', max_in_flight=2, pipeline_workers=SINGLE_WORKERS)
+    results = list(run(processor, paths, tmp_path / "out"))
+
+    assert len(results) == len(paths)
+    assert all(result.success for result in results)
+    # 已解码但尚未写入的图片不超过各阶段线程数加队列容量：4个线程 + 3个队列 x 2
+    assert max(backlog) <= 4 + 3 * 2
+
+
+def test_failed_composite_releases_memory_budget(image_paths, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        batch_pipeline.WatermarkPlan, 'apply', lambda self, processor, image_path=None: False
+    )
+
+    processor = BatchProcessor(executor_type='pipeline', memory_budget=1024 * 1024)
+    results = list(run(processor, image_paths, tmp_path / "out"))
+
+    assert all(result.error == "添加水印失败" for result in results)
+    assert processor.memory_budget.used_bytes == 0
+
+
+def test_closing_early_releases_memory_budget(image_paths, tmp_path):
+    processor = BatchProcessor(
+        executor_type='pipeline', max_in_flight=2, pipeline_workers=SINGLE_WORKERS, memory_budget=1024 * 1024
+    )
+
+    results = run(processor, image_paths, tmp_path / "out")
+    assert next(results).success
+    results.close()
+    assert processor.cancel_flag.is_set()
+
+    # 流水线中剩余的图片被跳过并归还预算
+    deadline = time.monotonic() + 5
+    while processor.memory_budget.used_bytes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert processor.memory_budget.used_bytes == 0
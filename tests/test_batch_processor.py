@@ -0,0 +1,162 @@
+"""
+批量处理器测试
+
+覆盖iter_process的有界提交窗口、生成器输入、结果顺序、失败结果、
+提前结束和进程模式的取消
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from photo_watermark.core import batch_processor
+from photo_watermark.core.batch_processor import MAX_DEFAULT_IN_FLIGHT, BatchProcessor
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+SPEC = WatermarkSpec(text="test", font_size=12)
+
+
+def run(processor: BatchProcessor, image_paths, output_dir):
+    """按规格中的布局调用iter_process"""
+    return processor.iter_process(image_paths, str(output_dir), SPEC, SPEC.layout, {'suffix': '_wm'})
+
+
+def test_single_worker_yields_results_in_order(image_paths, tmp_path):
+    results = list(run(BatchProcessor(max_workers=1, max_in_flight=1), image_paths, tmp_path / "out"))
+
+    assert [result.input_path for result in results] == image_paths
+    assert all(result.success for result in results)
+    assert all(os.path.exists(result.output_path) for result in results)
+
+
+def test_submission_window_is_bounded(image_paths, tmp_path):
+    consumed = []
+
+    def source():
+        for path in image_paths:
+            consumed.append(path)
+            yield path
+
+    processor = BatchProcessor(max_workers=2, max_in_flight=3)
+    yielded = 0
+    for _ in run(processor, source(), tmp_path / "out"):
+        yielded += 1
+        # 已取出但尚未产出结果的图片不超过提交窗口
+        assert len(consumed) - yielded <= processor.max_in_flight
+
+    assert yielded == len(image_paths)
+
+
+def test_bad_input_yields_failed_result(image_paths, tmp_path):
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    paths = [image_paths[0], str(broken), str(tmp_path / "missing.png"), image_paths[1]]
+
+    results = {result.input_path: result for result in run(BatchProcessor(max_workers=2), paths, tmp_path / "out")}
+
+    assert set(results) == set(paths)
+    assert results[image_paths[0]].success and results[image_paths[1]].success
+    for path in (str(broken), str(tmp_path / "missing.png")):
+        assert not results[path].success
+        assert results[path].error
+
+
+def test_closing_early_shuts_down_executor(image_paths, tmp_path, monkeypatch):
+    executors = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        """记录是否已关闭的线程池"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.was_shut_down = False
+            executors.append(self)
+
+        def shutdown(self, *args, **kwargs):
+            self.was_shut_down = True
+            super().shutdown(*args, **kwargs)
+
+    processor = BatchProcessor(max_workers=2, max_in_flight=2)
+    monkeypatch.setattr(processor, '_create_executor', lambda init_args: RecordingExecutor(max_workers=2))
+
+    results = run(processor, image_paths, tmp_path / "out")
+    first = next(results)
+    assert first.success
+    assert processor.is_processing
+
+    results.close()
+
+    assert len(executors) == 1
+    assert executors[0].was_shut_down
+    assert processor.cancel_flag.is_set()
+    assert not processor.is_processing
+    # 提前结束后不再提交新任务
+    written = os.listdir(tmp_path / "out")
+    assert len(written) < len(image_paths)
+
+
+def test_generator_is_consumed_lazily(image_paths, tmp_path):
+    consumed = []
+
+    def source():
+        for path in image_paths:
+            consumed.append(path)
+            yield path
+
+    results = run(BatchProcessor(max_workers=1, max_in_flight=2), source(), tmp_path / "out")
+    first = next(results)
+
+    # 第一张图片的结果在取完所有路径之前就已产出
+    assert first.success
+    assert len(consumed) <= 3
+    results.close()
+
+
+def test_process_images_accepts_generator(image_paths, tmp_path):
+    progress = []
+    processor = BatchProcessor(max_workers=2, max_in_flight=2)
+
+    results = processor.process_images(
+        (path for path in image_paths), str(tmp_path / "out"), SPEC, SPEC.layout, {},
+        progress_callback=lambda current, total, name: progress.append((current, total))
+    )
+
+    assert results == {path: True for path in image_paths}
+    # 生成器的总数未知，记为0
+    assert progress == [(i, 0) for i in range(1, len(image_paths) + 1)]
+
+
+def test_default_window_is_capped():
+    assert BatchProcessor(max_workers=4).max_in_flight == 8
+    assert BatchProcessor(max_workers=48).max_in_flight == MAX_DEFAULT_IN_FLIGHT
+    # 工作进程数超过上限时窗口等于工作进程数，不让进程空闲
+    assert BatchProcessor(max_workers=100).max_in_flight == 100
+
+
+def test_worker_checks_shared_cancel_flag(image_paths, tmp_path, monkeypatch):
+    # 在当前进程中模拟工作进程，测试结束后恢复全局状态
+    monkeypatch.setattr(batch_processor, '_worker_processor', None)
+    monkeypatch.setattr(batch_processor, '_worker_job', None)
+    cancel_flag = multiprocessing.Event()
+    batch_processor._init_worker(str(tmp_path / "out"), SPEC, SPEC.layout, {}, False, cancel_flag)
+    os.makedirs(tmp_path / "out")
+
+    assert batch_processor._process_in_worker(image_paths[0]).success
+
+    cancel_flag.set()
+    result = batch_processor._process_in_worker(image_paths[1])
+    assert not result.success
+    assert result.error == "已取消"
+
+
+def test_closing_early_cancels_process_workers(image_paths, tmp_path):
+    processor = BatchProcessor(max_workers=1, max_in_flight=4, executor_type='process')
+
+    results = run(processor, image_paths, tmp_path / "out")
+    assert next(results).success
+    results.close()
+
+    assert processor._worker_cancel_flag.is_set()
+    # 工作进程中排队的任务不再写出图片
+    assert len(os.listdir(tmp_path / "out")) < len(image_paths)
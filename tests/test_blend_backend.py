@@ -0,0 +1,74 @@
+"""
+混合后端测试
+
+覆盖NumPy后端与Pillow后端结果一致，以及默认后端
+"""
+
+import pytest
+from PIL import Image
+
+from photo_watermark.core import blend_backend
+from photo_watermark.core.blend_backend import PillowBlendBackend, get_backend
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def layer():
+    """随机颜色和透明度的RGBA图层，包含完全透明和完全不透明的像素"""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (64, 80, 4), dtype=np.uint8)
+    pixels[:8, :, 3] = 0
+    pixels[-8:, :, 3] = 255
+    return Image.fromarray(pixels, 'RGBA')
+
+
+def random_image(mode: str, size=(120, 100)) -> Image.Image:
+    """随机内容的图片"""
+    rng = np.random.default_rng(1)
+    return Image.fromarray(rng.integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8), mode)
+
+
+def max_difference(a: Image.Image, b: Image.Image) -> int:
+    """两张图片逐通道的最大差值"""
+    assert a.mode == b.mode and a.size == b.size
+    return int(np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16)).max())
+
+
+@pytest.mark.parametrize("position", [(0, 0), (10, 20), (40, 36)])
+def test_rgb_composite_matches_pillow(layer, position):
+    base = random_image('RGB')
+    expected = get_backend('pillow').composite(base.copy(), layer, position)
+    actual = get_backend('numpy').composite(base.copy(), layer, position)
+
+    assert actual.mode == 'RGB'
+    assert max_difference(actual, expected) == 0
+
+
+@pytest.mark.parametrize("position", [(0, 0), (10, 20), (40, 36)])
+def test_rgba_composite_matches_pillow(layer, position):
+    base = random_image('RGBA')
+    expected = get_backend('pillow').composite(base.copy(), layer, position)
+    actual = get_backend('numpy').composite(base.copy(), layer, position)
+
+    assert actual.mode == 'RGBA'
+    # 预乘alpha的舍入方式不同，最多相差1
+    assert max_difference(actual, expected) <= 1
+    assert max_difference(actual.getchannel('A'), expected.getchannel('A')) == 0
+
+
+@pytest.mark.parametrize("opacity", [0, 1, 128, 254, 255])
+def test_scale_alpha_matches_pillow(layer, opacity):
+    expected = get_backend('pillow').scale_alpha(layer, opacity)
+    actual = get_backend('numpy').scale_alpha(layer, opacity)
+    assert max_difference(actual, expected) == 0
+
+
+def test_default_backend_is_pillow(monkeypatch):
+    monkeypatch.setattr(blend_backend, '_default_backend_name', 'pillow')
+    assert type(get_backend()) is PillowBlendBackend
+
+
+def test_unknown_backend_falls_back_to_pillow():
+    assert type(get_backend('missing')) is PillowBlendBackend
+    assert not blend_backend.set_default_backend('missing')
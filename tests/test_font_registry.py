@@ -0,0 +1,57 @@
+"""
+字体注册表测试
+
+覆盖持久化索引的过期判断和解析缓存
+"""
+
+import os
+
+from photo_watermark.core.font_registry import FontRegistry
+
+
+FAMILIES = {'test sans': {'regular': '/fonts/TestSans.ttf', 'bold': '/fonts/TestSans-Bold.ttf'}}
+
+
+def make_registry(tmp_path, families=FAMILIES) -> FontRegistry:
+    """创建扫描结果固定的注册表"""
+    font_dir = tmp_path / "fonts"
+    (font_dir / "truetype" / "test").mkdir(parents=True, exist_ok=True)
+    registry = FontRegistry(font_dirs=[str(font_dir)], index_path=tmp_path / "font_index.json")
+    registry._scan = lambda: {name: dict(styles) for name, styles in families.items()}
+    return registry
+
+
+def test_index_is_reused_until_subdirectory_changes(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.list_families()
+
+    assert make_registry(tmp_path)._load_index() == FAMILIES
+
+    # 在子目录中添加字体只改变子目录的修改时间
+    subdir = tmp_path / "fonts" / "truetype" / "test"
+    (subdir / "New.ttf").write_bytes(b"")
+    stat = os.stat(subdir)
+    os.utime(subdir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert make_registry(tmp_path)._load_index() is None
+
+
+def test_resolve_is_cached_per_instance(tmp_path):
+    first = make_registry(tmp_path)
+    second = make_registry(tmp_path, {'other': {'regular': '/fonts/Other.ttf'}})
+    second.index_path = tmp_path / "other_index.json"
+
+    assert first.resolve('Test Sans', bold=True) == '/fonts/TestSans-Bold.ttf'
+    assert second.resolve('Test Sans', bold=True) == '/fonts/Other.ttf'
+    assert first.resolve.cache_info().currsize == 1
+
+
+def test_rescan_clears_resolve_cache(tmp_path):
+    registry = make_registry(tmp_path)
+    assert registry.resolve('Test Sans') == '/fonts/TestSans.ttf'
+
+    registry._scan = lambda: {'test sans': {'regular': '/fonts/Moved.ttf'}}
+    registry.rescan()
+
+    assert registry.resolve.cache_info().currsize == 0
+    assert registry.resolve('Test Sans') == '/fonts/Moved.ttf'
@@ -0,0 +1,113 @@
+"""
+任务清单测试
+
+覆盖重复运行时跳过已是最新的图片、输入或输出变化后重新处理、
+水印配置变化后全部失效，以及取消后从断点继续
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from photo_watermark.core.batch_processor import BatchProcessor
+from photo_watermark.core.job_manifest import MANIFEST_FILENAME, JobManifest
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+SPEC = WatermarkSpec(text="test", font_size=12)
+
+
+def run(processor: BatchProcessor, image_paths, output_dir, manifest, spec=SPEC):
+    """带任务清单运行，返回 路径->结果"""
+    results = processor.iter_process(image_paths, str(output_dir), spec, spec.layout, {}, manifest=manifest)
+    return {result.input_path: result for result in results}
+
+
+def skipped(results) -> set:
+    """跳过的图片"""
+    return {path for path, result in results.items() if result.skipped}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = JobManifest(tmp_path / "manifest.db")
+    yield manifest
+    manifest.close()
+
+
+@pytest.mark.parametrize("executor_type", ['thread', 'pipeline'])
+def test_rerun_skips_up_to_date_outputs(image_paths, tmp_path, manifest, executor_type):
+    processor = BatchProcessor(max_workers=2, executor_type=executor_type)
+
+    first = run(processor, image_paths, tmp_path / "out", manifest)
+    assert all(result.success and not result.skipped for result in first.values())
+    assert len(manifest) == len(image_paths)
+
+    second = run(processor, image_paths, tmp_path / "out", manifest)
+    assert skipped(second) == set(image_paths)
+    assert all(result.success for result in second.values())
+
+
+def test_changed_input_and_missing_output_are_redone(image_paths, tmp_path, manifest):
+    processor = BatchProcessor(max_workers=2)
+    first = run(processor, image_paths, tmp_path / "out", manifest)
+
+    Image.new('RGB', (64, 48), (0, 0, 0)).save(image_paths[0])
+    os.remove(first[image_paths[1]].output_path)
+
+    second = run(processor, image_paths, tmp_path / "out", manifest)
+    assert skipped(second) == set(image_paths[2:])
+    assert second[image_paths[0]].success and second[image_paths[1]].success
+    assert os.path.exists(first[image_paths[1]].output_path)
+
+
+def test_touched_input_with_same_content_is_skipped(image_paths, tmp_path, manifest):
+    processor = BatchProcessor(max_workers=2)
+    run(processor, image_paths, tmp_path / "out", manifest)
+
+    stat = os.stat(image_paths[0])
+    os.utime(image_paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert skipped(run(processor, image_paths, tmp_path / "out", manifest)) == set(image_paths)
+
+
+def test_config_change_invalidates_all(image_paths, tmp_path, manifest):
+    processor = BatchProcessor(max_workers=2)
+    run(processor, image_paths, tmp_path / "out", manifest)
+
+    changed = SPEC.replace(text="changed")
+    assert skipped(run(processor, image_paths, tmp_path / "out", manifest, spec=changed)) == set()
+    assert skipped(run(processor, image_paths, tmp_path / "out", manifest, spec=changed)) == set(image_paths)
+
+
+def test_resume_after_cancel(image_paths, tmp_path, manifest):
+    processor = BatchProcessor(max_workers=1, max_in_flight=1)
+
+    results = processor.iter_process(image_paths, str(tmp_path / "out"), SPEC, SPEC.layout, {}, manifest=manifest)
+    done = [next(results).input_path for _ in range(4)]
+    results.close()
+
+    # 取消前产出的结果已写入清单，再次运行时只处理其余图片
+    resumed = run(processor, image_paths, tmp_path / "out", manifest)
+    assert skipped(resumed) == set(done)
+    assert all(resumed[path].success for path in image_paths)
+
+
+def test_manifest_dir_keeps_output_dir_clean(tmp_path):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    first = JobManifest.for_output_dir(output_dir, tmp_path / "manifests")
+    second = JobManifest.for_output_dir(str(output_dir) + os.sep, tmp_path / "manifests")
+    try:
+        assert first.db_path == second.db_path
+        assert first.db_path.parent == tmp_path / "manifests"
+        assert os.listdir(output_dir) == []
+    finally:
+        first.close()
+        second.close()
+
+    default = JobManifest.for_output_dir(output_dir)
+    default.close()
+    assert default.db_path == output_dir / MANIFEST_FILENAME
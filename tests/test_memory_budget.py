@@ -0,0 +1,134 @@
+"""
+内存预算测试
+
+覆盖按字节计数的信号量、按文件头估算内存，以及批量处理器在预算不足时暂缓提交
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from photo_watermark.core.batch_processor import BatchProcessor
+from photo_watermark.core.memory_budget import (
+    DEFAULT_ESTIMATE, MemoryBudget, estimate_image_bytes, estimate_working_set
+)
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+SPEC = WatermarkSpec(text="test", font_size=12)
+
+# conftest中64x48的RGB图片的估算值
+IMAGE_COST = estimate_working_set(64, 48, 'RGB')
+
+
+class TestMemoryBudget:
+    """按字节计数的信号量"""
+
+    def test_try_acquire_within_budget(self):
+        budget = MemoryBudget(100)
+        assert budget.try_acquire(60)
+        assert not budget.try_acquire(50)
+        budget.release(60)
+        assert budget.try_acquire(50)
+        assert budget.used_bytes == 50
+
+    def test_oversized_request_is_admitted_alone(self):
+        budget = MemoryBudget(100)
+        assert budget.try_acquire(500)
+        assert not budget.try_acquire(1)
+        budget.release(500)
+        assert budget.used_bytes == 0
+
+    def test_acquire_waits_for_release(self):
+        budget = MemoryBudget(100)
+        budget.acquire(80)
+        acquired = threading.Event()
+
+        def waiter():
+            budget.acquire(50)
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        assert not acquired.wait(0.05)
+        budget.release(80)
+        assert acquired.wait(1)
+        thread.join()
+        assert budget.used_bytes == 50
+
+    def test_acquire_timeout(self):
+        budget = MemoryBudget(100)
+        budget.acquire(80)
+        assert not budget.acquire(50, timeout=0.01)
+        assert budget.used_bytes == 80
+
+
+class TestEstimate:
+    """按文件头估算"""
+
+    def test_estimate_from_path_and_bytes(self, image_paths):
+        with open(image_paths[0], 'rb') as f:
+            data = f.read()
+        assert estimate_image_bytes(image_paths[0]) == IMAGE_COST
+        assert estimate_image_bytes(data) == IMAGE_COST
+
+    def test_unreadable_header_uses_default(self, tmp_path):
+        broken = tmp_path / "broken.png"
+        broken.write_bytes(b"not an image")
+        assert estimate_image_bytes(str(broken)) == DEFAULT_ESTIMATE
+
+    def test_metadata_index_is_used_before_header(self, tmp_path):
+        index = SimpleNamespace(lookup=lambda path: SimpleNamespace(width=1000, height=500))
+        processor = BatchProcessor(memory_budget=1, metadata_index=index)
+        # 文件不存在，估算只能来自索引
+        assert processor.estimate_cost(str(tmp_path / "missing.png")) == estimate_working_set(1000, 500, 'RGB')
+
+    def test_no_budget_costs_nothing(self, image_paths):
+        assert BatchProcessor().estimate_cost(image_paths[0]) == 0
+
+
+def max_concurrency(processor: BatchProcessor, image_paths, output_dir, monkeypatch) -> int:
+    """运行批量处理，返回同时处理的图片数的最大值"""
+    original = processor._process_single_image
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def tracking(*args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.01)
+            return original(*args, **kwargs)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(processor, '_process_single_image', tracking)
+    results = list(processor.iter_process(image_paths, str(output_dir), SPEC, SPEC.layout, {}))
+
+    assert len(results) == len(image_paths)
+    assert all(result.success for result in results)
+    assert processor.memory_budget.used_bytes == 0
+    return peak[0]
+
+
+@pytest.mark.parametrize("images_in_budget", [1, 2])
+def test_submissions_wait_for_budget(image_paths, tmp_path, monkeypatch, images_in_budget):
+    processor = BatchProcessor(
+        max_workers=4, max_in_flight=8, memory_budget=IMAGE_COST * images_in_budget + IMAGE_COST // 2
+    )
+    assert max_concurrency(processor, image_paths, tmp_path / "out", monkeypatch) == images_in_budget
+
+
+def test_image_larger_than_budget_is_processed_alone(image_paths, tmp_path, monkeypatch):
+    processor = BatchProcessor(max_workers=4, max_in_flight=8, memory_budget=IMAGE_COST // 10)
+    assert max_concurrency(processor, image_paths, tmp_path / "out", monkeypatch) == 1
+
+
+def test_large_budget_does_not_limit_workers(image_paths, tmp_path, monkeypatch):
+    processor = BatchProcessor(max_workers=4, max_in_flight=8, memory_budget=IMAGE_COST * 100)
+    assert max_concurrency(processor, image_paths, tmp_path / "out", monkeypatch) > 1
@@ -0,0 +1,80 @@
+"""
+图片元数据索引测试
+
+覆盖增量刷新、按条件筛选排序和默认数据库位置
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from photo_watermark.core import metadata_index
+from photo_watermark.core.metadata_index import MetadataIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(tmp_path / "metadata.db")
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def mixed_images(tmp_path):
+    """不同尺寸和格式的图片"""
+    specs = [('a.png', (300, 200), 'PNG'), ('b.jpg', (100, 400), 'JPEG'), ('c.png', (50, 50), 'PNG')]
+    paths = {}
+    for name, size, image_format in specs:
+        path = tmp_path / name
+        Image.new('RGB', size).save(path, image_format)
+        paths[name] = str(path)
+    return paths
+
+
+def test_refresh_reuses_fresh_records(index, mixed_images, monkeypatch):
+    records = index.refresh(mixed_images.values())
+    assert {record.path: record.size for record in records} == {
+        mixed_images['a.png']: (300, 200),
+        mixed_images['b.jpg']: (100, 400),
+        mixed_images['c.png']: (50, 50),
+    }
+
+    built = []
+    original = metadata_index.build_record
+    monkeypatch.setattr(metadata_index, 'build_record', lambda *args: built.append(args) or original(*args))
+
+    Image.new('RGB', (60, 70)).save(mixed_images['c.png'])
+    stat = os.stat(mixed_images['c.png'])
+    os.utime(mixed_images['c.png'], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    index.refresh(mixed_images.values())
+
+    # 只重新读取修改过的文件
+    assert [args[0] for args in built] == [mixed_images['c.png']]
+    assert index.lookup(mixed_images['c.png']).size == (60, 70)
+
+
+def test_query_filters_and_sorts(index, mixed_images):
+    index.refresh(mixed_images.values())
+
+    by_width = index.query(order_by='width', descending=True)
+    assert [record.path for record in by_width] == [mixed_images['a.png'], mixed_images['b.jpg'], mixed_images['c.png']]
+
+    assert [record.path for record in index.query(formats=['JPEG'])] == [mixed_images['b.jpg']]
+    assert [record.path for record in index.query(min_width=60, min_height=60, order_by='height')] == [
+        mixed_images['a.png'], mixed_images['b.jpg']
+    ]
+    assert index.query(formats=[]) == []
+    assert [record.path for record in index.query(paths=[mixed_images['c.png']])] == [mixed_images['c.png']]
+
+
+def test_query_rejects_unknown_column(index):
+    with pytest.raises(ValueError):
+        index.query(order_by='content_hash; DROP TABLE images')
+
+
+def test_default_path_is_in_config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_index, 'get_default_config_dir', lambda: tmp_path / "config")
+    index = MetadataIndex()
+    index.close()
+    assert index.db_path == tmp_path / "config" / "metadata.db"
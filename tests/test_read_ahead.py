@@ -0,0 +1,99 @@
+"""
+预读器测试
+
+覆盖预读深度和内存预算的上限、读取失败、非路径项和等待统计
+"""
+
+import time
+
+import pytest
+
+from photo_watermark.core.read_ahead import PrefetchedFile, ReadAheadPrefetcher
+
+
+@pytest.fixture
+def file_paths(tmp_path):
+    """生成若干个1000字节的文件"""
+    paths = []
+    for i in range(10):
+        path = tmp_path / f"file_{i}.bin"
+        path.write_bytes(bytes([i]) * 1000)
+        paths.append(str(path))
+    return paths
+
+
+def max_lookahead(prefetcher: ReadAheadPrefetcher, paths) -> int:
+    """逐个取出文件，返回已从输入取出但尚未产出的项数的最大值"""
+    pulled = []
+
+    def source():
+        for path in paths:
+            pulled.append(path)
+            yield path
+
+    lookahead = []
+    for yielded, item in enumerate(prefetcher.iter_files(source()), 1):
+        assert item.path == paths[yielded - 1]
+        lookahead.append(len(pulled) - yielded + 1)
+    return max(lookahead)
+
+
+def test_yields_contents_in_order(file_paths):
+    files = list(ReadAheadPrefetcher().iter_files(file_paths))
+
+    assert [f.path for f in files] == file_paths
+    assert [f.open().read() for f in files] == [open(path, 'rb').read() for path in file_paths]
+    assert all(f.stat.st_size == 1000 for f in files)
+
+
+def test_depth_bounds_lookahead(file_paths):
+    assert max_lookahead(ReadAheadPrefetcher(depth=3), file_paths) == 3
+
+
+def test_byte_budget_bounds_lookahead(file_paths):
+    # 已预读的数据达到预算后不再提交新的读取
+    assert max_lookahead(ReadAheadPrefetcher(max_bytes=2500, depth=16), file_paths) == 3
+
+
+def test_file_larger_than_budget_is_still_read(file_paths):
+    prefetcher = ReadAheadPrefetcher(max_bytes=10, depth=16)
+
+    assert max_lookahead(prefetcher, file_paths) == 1
+    assert prefetcher.stats.files == len(file_paths)
+    assert prefetcher.stats.bytes_read == 1000 * len(file_paths)
+
+
+def test_missing_file_yields_error(file_paths, tmp_path):
+    missing = str(tmp_path / "missing.bin")
+    files = list(ReadAheadPrefetcher().iter_files([file_paths[0], missing, file_paths[1]]))
+
+    assert [f.path for f in files] == [file_paths[0], missing, file_paths[1]]
+    assert files[1].data is None
+    assert files[1].error
+    assert files[0].data and files[2].data
+
+
+def test_non_path_items_pass_through_in_order(file_paths):
+    marker = object()
+    items = list(ReadAheadPrefetcher().iter_files([file_paths[0], marker, file_paths[1]]))
+
+    assert isinstance(items[0], PrefetchedFile)
+    assert items[1] is marker
+    assert items[2].path == file_paths[1]
+
+
+def test_slow_reads_are_counted_as_waits(file_paths, monkeypatch):
+    original_read = ReadAheadPrefetcher._read
+
+    def slow_read(path):
+        time.sleep(0.02)
+        return original_read(path)
+
+    monkeypatch.setattr(ReadAheadPrefetcher, '_read', staticmethod(slow_read))
+    prefetcher = ReadAheadPrefetcher(depth=2, max_workers=1)
+    list(prefetcher.iter_files(file_paths))
+
+    assert prefetcher.stats.files == len(file_paths)
+    assert prefetcher.stats.waits > 0
+    assert prefetcher.stats.wait_time > 0
+    assert 0 < prefetcher.stats.wait_ratio <= 1
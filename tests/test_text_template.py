@@ -0,0 +1,110 @@
+"""
+文本模板测试
+
+覆盖从EXIF和文件名填充模板变量，以及字形图集拼接的图章与整段渲染的图章一致
+"""
+
+import pytest
+from PIL import Image, ImageChops
+
+from photo_watermark.core.glyph_atlas import get_glyph_atlas
+from photo_watermark.core.image_processor import ImageProcessor
+from photo_watermark.core.text_template import (
+    EXIF_ARTIST_TAG,
+    EXIF_DATETIME_ORIGINAL_TAG,
+    EXIF_DATETIME_TAG,
+    EXIF_IFD_TAG,
+    has_template_fields,
+    read_template_values,
+    render_template,
+)
+from photo_watermark.core.watermark import WatermarkPosition
+from photo_watermark.core.watermark_plan import WatermarkPlan
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+def save_jpeg(path, artist=None, date_original=None, date=None):
+    """保存带指定EXIF的JPEG图片"""
+    exif = Image.Exif()
+    if artist:
+        exif[EXIF_ARTIST_TAG] = artist
+    if date:
+        exif[EXIF_DATETIME_TAG] = date
+    if date_original:
+        exif.get_ifd(EXIF_IFD_TAG)[EXIF_DATETIME_ORIGINAL_TAG] = date_original
+    Image.new('RGB', (160, 120), (40, 80, 120)).save(path, 'JPEG', exif=exif)
+    return str(path)
+
+
+class TestTemplateValues:
+    """模板变量的取值"""
+
+    def test_values_from_exif_and_filename(self, tmp_path):
+        path = save_jpeg(tmp_path / "IMG_0001.jpg", artist="Alice", date_original="2024:05:06 07:08:09")
+
+        values = read_template_values(path)
+
+        assert values == {'author': "Alice", 'date_taken': "2024-05-06", 'filename': "IMG_0001.jpg"}
+
+    def test_date_falls_back_to_datetime(self, tmp_path):
+        path = save_jpeg(tmp_path / "a.jpg", date="2023:01:02 03:04:05")
+        assert read_template_values(path)['date_taken'] == "2023-01-02"
+
+    def test_loaded_exif_is_used(self, tmp_path):
+        path = save_jpeg(tmp_path / "a.jpg", artist="Bob")
+        processor = ImageProcessor()
+        assert processor.load_image(path)
+
+        assert read_template_values(path, processor.exif)['author'] == "Bob"
+
+    def test_missing_exif_gives_empty_values(self, tmp_path):
+        path = tmp_path / "plain.png"
+        Image.new('RGB', (8, 8)).save(path)
+        assert read_template_values(str(path)) == {'author': '', 'date_taken': '', 'filename': "plain.png"}
+
+    def test_render_keeps_unknown_fields(self):
+        text = "© {author} {date_taken} {filename} {unknown}"
+        assert has_template_fields(text)
+        assert not has_template_fields("{unknown}")
+        assert render_template(text, {'author': "A", 'date_taken': "2024-01-01", 'filename': "f.jpg"}) == (
+            "© A 2024-01-01 f.jpg {unknown}"
+        )
+
+
+@pytest.mark.parametrize("text", ["HIH 111", "Test 2024-05-06 photo.jpg", "第一行\n2nd line"])
+def test_atlas_stamp_matches_render_text_stamp(text):
+    atlas_stamp, atlas_offset = get_glyph_atlas().render(text, None, 36, color=(255, 255, 255), opacity=200)
+    stamp, offset = ImageProcessor.render_text_stamp(text, None, 36, (255, 255, 255), 200)
+
+    # 不含字偶距的文本，图集拼接与整段渲染的尺寸和偏移相同
+    assert atlas_stamp.size == stamp.size
+    assert atlas_offset == offset
+
+
+def test_template_plan_matches_expanded_text(tmp_path):
+    path = save_jpeg(tmp_path / "IMG_0002.jpg", artist="Alice", date_original="2024:05:06 07:08:09")
+    template = WatermarkSpec(
+        text="{author} {date_taken} {filename}", font_size=14, text_opacity=255,
+        position=WatermarkPosition.TOP_LEFT, x_offset=0, y_offset=0, margin=5
+    )
+    literal = template.replace(text="Alice 2024-05-06 IMG_0002.jpg")
+
+    assert WatermarkPlan(template).is_template
+    # 模板按EXIF和文件名展开后，与直接写出展开后的文本位置和范围相同
+    assert ink_bbox(apply_plan(template, path)) == ink_bbox(apply_plan(literal, path))
+    assert ink_bbox(apply_plan(literal, path)) is not None
+
+
+def apply_plan(spec: WatermarkSpec, path: str) -> Image.Image:
+    """把水印加到图片上，返回结果"""
+    processor = ImageProcessor()
+    assert processor.load_image(path)
+    assert WatermarkPlan(spec).apply(processor, image_path=path)
+    return processor.current_image.convert('RGB')
+
+
+def ink_bbox(image: Image.Image):
+    """与背景色明显不同的区域"""
+    background = Image.new('RGB', image.size, (40, 80, 120))
+    difference = ImageChops.difference(image, background).convert('L')
+    return difference.point(lambda v: 255 if v > 40 else 0).getbbox()
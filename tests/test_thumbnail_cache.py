@@ -0,0 +1,76 @@
+"""
+缩略图缓存测试
+
+覆盖缓存命中和按访问时间清理到大小上限
+"""
+
+import os
+
+from photo_watermark.core.thumbnail_cache import ThumbnailCache
+
+
+def cached_files(cache: ThumbnailCache):
+    """缓存目录中的缩略图文件"""
+    return sorted(str(path) for path in cache.cache_dir.glob("*/*.png"))
+
+
+def set_atime(path, atime):
+    """设置访问时间，保留修改时间"""
+    os.utime(path, (atime, os.stat(path).st_mtime))
+
+
+def test_second_request_is_served_from_disk(image_paths, tmp_path, monkeypatch):
+    cache = ThumbnailCache(tmp_path / "thumbnails", size=(16, 16))
+    first = cache.get_thumbnail(image_paths[0])
+    assert first.size == (16, 12)
+
+    def fail(path):
+        raise AssertionError("不应重新生成缩略图")
+
+    monkeypatch.setattr(cache, 'generate', fail)
+    assert cache.get_thumbnail(image_paths[0]).tobytes() == first.tobytes()
+
+
+def test_prune_removes_least_recently_used(image_paths, tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbnails", size=(16, 16), max_bytes=10 ** 9)
+    for path in image_paths:
+        cache.get_thumbnail(path)
+    paths = [str(cache.cache_path(path)) for path in image_paths]
+    sizes = [os.path.getsize(path) for path in paths]
+
+    for i, path in enumerate(paths):
+        set_atime(path, 1_000_000 + i)
+    # 最早生成的缩略图刚被访问过，不应被删除
+    cache.get_thumbnail(image_paths[0])
+
+    cache.max_bytes = sum(sizes) // 2
+    removed = cache.prune()
+
+    remaining = cached_files(cache)
+    assert removed == len(paths) - len(remaining)
+    assert sum(os.path.getsize(path) for path in remaining) <= cache.max_bytes * 0.8
+    assert paths[0] in remaining
+    # 删除的是访问时间最早的文件
+    assert paths[1] not in remaining
+    assert paths[-1] in remaining
+
+
+def test_prune_under_limit_keeps_everything(image_paths, tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbnails", size=(16, 16))
+    for path in image_paths:
+        cache.get_thumbnail(path)
+
+    assert cache.prune() == 0
+    assert len(cached_files(cache)) == len(image_paths)
+
+
+def test_writes_beyond_limit_trigger_prune(image_paths, tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbnails", size=(16, 16), max_bytes=1000)
+    for path in image_paths:
+        cache.get_thumbnail(path)
+
+    assert sum(os.path.getsize(path) for path in cached_files(cache)) <= cache.max_bytes
+
+
+def test_missing_cache_dir_prunes_nothing(tmp_path):
+    assert ThumbnailCache(tmp_path / "missing").prune() == 0
@@ -0,0 +1,68 @@
+"""
+水印执行计划测试
+
+覆盖图片水印的旋转和位置
+"""
+
+import pytest
+from PIL import Image
+
+from photo_watermark.core.image_processor import ImageProcessor
+from photo_watermark.core.watermark import WatermarkPosition, WatermarkType
+from photo_watermark.core.watermark_plan import WatermarkPlan
+from photo_watermark.core.watermark_spec import WatermarkSpec
+
+
+RED = (255, 0, 0)
+
+
+@pytest.fixture
+def logo_spec(tmp_path):
+    """40x10的不透明红色图片水印，居中放置"""
+    path = tmp_path / "logo.png"
+    Image.new('RGBA', (40, 10), RED + (255,)).save(path)
+    return WatermarkSpec(
+        type=WatermarkType.IMAGE,
+        image_path=str(path),
+        image_opacity=255,
+        position=WatermarkPosition.CENTER,
+        x_offset=0,
+        y_offset=0,
+    )
+
+
+def red_bbox(spec: WatermarkSpec):
+    """把水印加到200x200的白色图片上，返回红色区域的包围盒"""
+    processor = ImageProcessor()
+    processor.original_image = Image.new('RGB', (200, 200), (255, 255, 255))
+    processor.current_image = processor.original_image.copy()
+    assert WatermarkPlan(spec).apply(processor)
+
+    # 白色背景上只有水印处的绿色通道接近0
+    green = processor.current_image.convert('RGB').getchannel('G')
+    return green.point(lambda v: 255 if v < 128 else 0).getbbox()
+
+
+def test_unrotated_image_watermark(logo_spec):
+    plan = WatermarkPlan(logo_spec)
+    assert plan.layer.size == (40, 10)
+    assert plan.true_size == (40, 10)
+    assert red_bbox(logo_spec) == (80, 95, 120, 105)
+
+
+def test_image_watermark_is_rotated(logo_spec):
+    spec = logo_spec.replace(rotation=90)
+    plan = WatermarkPlan(spec)
+
+    # 旋转90度后宽高互换，位置按旋转后的尺寸计算
+    assert plan.layer.size == (10, 40)
+    assert plan.true_size == (10, 40)
+    assert red_bbox(spec) == (95, 80, 105, 120)
+
+
+def test_rotated_image_watermark_bounding_box(logo_spec):
+    plan = WatermarkPlan(logo_spec.replace(rotation=45))
+
+    # 裁剪到不透明像素的包围盒：约 (40 + 10) / sqrt(2)
+    assert all(34 <= side <= 37 for side in plan.layer.size)
+    assert plan.layer.getchannel('A').getbbox() == (0, 0) + plan.layer.size
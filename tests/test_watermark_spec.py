@@ -0,0 +1,175 @@
+"""
+水印规格测试
+
+覆盖二进制、JSON和pickle往返，以及配置字典的类型转换
+"""
+
+import pickle
+
+import pytest
+
+from photo_watermark.core.watermark import WatermarkLayout, WatermarkPosition, WatermarkType
+from photo_watermark.core.watermark_spec import FIELD_NAMES, WatermarkSpec
+
+
+def make_spec(**changes) -> WatermarkSpec:
+    """创建所有字段都不是默认值的规格"""
+    fields = dict(
+        type=WatermarkType.IMAGE,
+        text="© 测试 {filename}",
+        font_family="DejaVu Sans",
+        font_size=48,
+        font_bold=True,
+        font_italic=True,
+        color=(10, 20, 30),
+        text_opacity=200,
+        shadow=True,
+        shadow_color=(1, 2, 3),
+        stroke=True,
+        stroke_color=(4, 5, 6),
+        stroke_width=3,
+        image_path="/tmp/水印.png",
+        image_width=120,
+        image_height=80,
+        keep_aspect_ratio=False,
+        image_opacity=90,
+        position=WatermarkPosition.CENTER,
+        x_offset=-15,
+        y_offset=25,
+        rotation=33.5,
+        margin=7,
+        quality=80,
+    )
+    fields.update(changes)
+    return WatermarkSpec(**fields)
+
+
+def assert_same_fields(a: WatermarkSpec, b: WatermarkSpec):
+    """逐字段比较，失败时指出不同的字段"""
+    for name in FIELD_NAMES:
+        assert getattr(a, name) == getattr(b, name), name
+
+
+class TestRoundTrip:
+    """序列化往返"""
+
+    @pytest.mark.parametrize("spec", [WatermarkSpec(), make_spec(), make_spec(image_width=None)])
+    def test_bytes(self, spec):
+        restored = WatermarkSpec.from_bytes(spec.to_bytes())
+        assert_same_fields(restored, spec)
+        assert restored == spec
+        assert hash(restored) == hash(spec)
+        assert restored.digest == spec.digest
+
+    @pytest.mark.parametrize("spec", [WatermarkSpec(), make_spec()])
+    def test_json(self, spec):
+        restored = WatermarkSpec.from_json(spec.to_json())
+        assert_same_fields(restored, spec)
+        assert restored == spec
+
+    @pytest.mark.parametrize("spec", [WatermarkSpec(), make_spec()])
+    def test_pickle(self, spec):
+        restored = pickle.loads(pickle.dumps(spec))
+        assert_same_fields(restored, spec)
+        assert restored.digest == spec.digest
+
+    def test_config(self):
+        spec = make_spec()
+        assert WatermarkSpec.from_config(spec.to_config()) == spec
+
+    @pytest.mark.parametrize("watermark_type", [WatermarkType.TEXT, WatermarkType.IMAGE])
+    def test_config_keeps_both_opacities(self, watermark_type):
+        spec = make_spec(type=watermark_type)
+        config = spec.to_config()
+        assert config['text_config']['opacity'] == 200
+        assert config['image_config']['opacity'] == 90
+
+        restored = WatermarkSpec.from_json(spec.to_json())
+        assert (restored.text_opacity, restored.image_opacity) == (200, 90)
+
+    def test_bytes_rejects_unknown_version(self):
+        data = bytearray(WatermarkSpec().to_bytes())
+        data[0] = 99
+        with pytest.raises(ValueError):
+            WatermarkSpec.from_bytes(bytes(data))
+
+    def test_bytes_rejects_truncated_data(self):
+        with pytest.raises(ValueError):
+            WatermarkSpec.from_bytes(WatermarkSpec().to_bytes()[:10])
+
+
+class TestFromConfig:
+    """配置字典的转换"""
+
+    def test_empty_config_uses_defaults(self):
+        assert WatermarkSpec.from_config({}) == WatermarkSpec()
+
+    def test_string_values_are_coerced(self):
+        spec = WatermarkSpec.from_config({
+            'type': 'text',
+            'text_config': {'text': 123, 'font_size': '40', 'color': [300, -5, '7', 9], 'opacity': '999'},
+            'layout': {'position': 'top_left', 'rotation': '15', 'x_offset': 3.9},
+            'quality': '90',
+        })
+        assert spec.type is WatermarkType.TEXT
+        assert spec.text == "123"
+        assert spec.font_size == 40
+        assert spec.color == (255, 0, 7)
+        assert spec.opacity == 255
+        assert spec.position is WatermarkPosition.TOP_LEFT
+        assert spec.rotation == 15.0
+        assert spec.x_offset == 3
+        assert spec.quality == 90
+
+    def test_image_config_size_and_opacity(self):
+        spec = WatermarkSpec.from_config({
+            'type': WatermarkType.IMAGE,
+            'text_config': {'opacity': 10},
+            'image_config': {'image_path': 'logo.png', 'size': (64, 32), 'opacity': 150},
+        })
+        assert spec.is_image
+        assert spec.image_size == (64, 32)
+        # 透明度取自当前类型的配置，另一类型的透明度也保留
+        assert spec.opacity == 150
+        assert spec.text_opacity == 10
+        assert spec.replace(type=WatermarkType.TEXT).opacity == 10
+
+    def test_non_positive_image_size_is_unset(self):
+        spec = WatermarkSpec.from_config({'image_config': {'width': 0, 'height': -1}})
+        assert spec.image_width is None
+        assert spec.image_size is None
+
+    def test_invalid_enum_raises(self):
+        with pytest.raises(ValueError):
+            WatermarkSpec.from_config({'layout': {'position': 'nowhere'}})
+
+    def test_coerce_keeps_spec(self):
+        spec = make_spec()
+        assert WatermarkSpec.coerce(spec) is spec
+        assert WatermarkSpec.coerce(spec.to_config()) == spec
+
+
+class TestImmutability:
+    """不可变和派生值"""
+
+    def test_setattr_raises(self):
+        spec = WatermarkSpec()
+        with pytest.raises(AttributeError):
+            spec.text = "changed"
+
+    def test_unknown_field_raises(self):
+        with pytest.raises(TypeError):
+            WatermarkSpec(colour=(1, 2, 3))
+
+    def test_replace_returns_new_spec(self):
+        spec = WatermarkSpec()
+        changed = spec.replace(text="changed")
+        assert changed.text == "changed"
+        assert spec.text != "changed"
+        assert changed != spec
+        assert changed.digest != spec.digest
+
+    def test_with_layout(self):
+        layout = WatermarkLayout(position=WatermarkPosition.CENTER, x_offset=1, y_offset=2, rotation=30, margin=4)
+        spec = WatermarkSpec().with_layout(layout)
+        assert spec.layout == layout